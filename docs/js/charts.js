@@ -5,6 +5,22 @@
 
 const ChartCreator = {
     charts: {},
+    // Indices of the downsampled points drawn per chart (null: all points)
+    lod: {},
+
+    /**
+     * Points a chart can usefully draw: about one per 3px of its width
+     */
+    maxPoints(ctx) {
+        return Math.max(50, Math.floor((ctx.parentElement?.clientWidth || 600) / 3));
+    },
+
+    /**
+     * Pick the downsampled points from a full series
+     */
+    pick(values, indices) {
+        return indices ? indices.map(i => values[i]) : values;
+    },
 
     /**
      * Create the rolling average chart (Featured)
@@ -14,15 +30,18 @@ const ChartCreator = {
         if (!ctx) return;
 
         const rollingData = data.rolling_average_data;
+        // Full resolution stays in rollingData for the insight and zoomed views
+        const indices = DataLoader.levelOfDetail(rollingData, this.maxPoints(ctx));
+        this.lod.rollingAverage = indices;
 
         this.charts.rollingAverage = new Chart(ctx, {
             type: 'line',
             data: {
-                labels: rollingData.dates,
+                labels: this.pick(rollingData.dates, indices),
                 datasets: [
                     {
                         label: 'Tore erzielt (Durchschnitt)',
-                        data: rollingData.goals_for,
+                        data: this.pick(rollingData.goals_for, indices),
                         borderColor: colors.primary,
                         backgroundColor: colors.primary + '30',
                         borderWidth: 3,
@@ -33,7 +52,7 @@ const ChartCreator = {
                     },
                     {
                         label: 'Tore kassiert (Durchschnitt)',
-                        data: rollingData.goals_against,
+                        data: this.pick(rollingData.goals_against, indices),
                         borderColor: colors.highlight,
                         backgroundColor: colors.highlight + '30',
                         borderWidth: 3,
@@ -89,10 +108,74 @@ const ChartCreator = {
             }
         });
 
+        this.setupRollingControls(data);
+
         // Generate trend insight
         this.generateTrendInsight(rollingData, colors);
     },
 
+    // Per aggregation: dataset suffix, chart title and section description (from the window label), y axis title
+    rollingLabels: {
+        mean: {
+            dataset: 'Durchschnitt', title: w => `Rollierender ${w}-Durchschnitt`,
+            description: w => `Rollierender Durchschnitt der Tore (${w}-Fenster)`, axis: 'Durchschnittliche Tore'
+        },
+        ewm: {
+            dataset: 'gewichteter Durchschnitt', title: w => `Exponentiell gewichteter ${w}-Durchschnitt`,
+            description: w => `Exponentiell gewichteter Durchschnitt der Tore (${w}-Fenster)`, axis: 'Durchschnittliche Tore'
+        },
+        sum: {
+            dataset: 'Summe', title: w => `Rollierende ${w}-Summe`,
+            description: w => `Rollierende Summe der Tore (${w}-Fenster)`, axis: 'Tore'
+        }
+    },
+
+    /**
+     * Switch the rolling average chart to another precomputed window
+     * (e.g. '3', '10' or '30D') and aggregation ('mean', 'ewm', 'sum')
+     */
+    setRollingWindow(data, window, aggregation = 'mean') {
+        const chart = this.charts.rollingAverage;
+        const stats = data.rolling_stats;
+        const labels = this.rollingLabels[aggregation];
+        if (!chart || !stats || !labels || !stats.goals_for[aggregation]?.[window]) return;
+
+        const indices = this.lod.rollingAverage;
+        chart.data.datasets[0].data = this.pick(stats.goals_for[aggregation][window], indices);
+        chart.data.datasets[1].data = this.pick(stats.goals_against[aggregation][window], indices);
+        chart.data.datasets[0].label = `Tore erzielt (${labels.dataset})`;
+        chart.data.datasets[1].label = `Tore kassiert (${labels.dataset})`;
+        const windowLabel = window.endsWith('D') ? `${parseInt(window, 10)}-Tage` : `${window}-Spiele`;
+        chart.options.plugins.title.text = labels.title(windowLabel);
+        chart.options.scales.y.title.text = labels.axis;
+        chart.update();
+
+        const description = document.getElementById('rollingDescription');
+        if (description) description.textContent = labels.description(windowLabel);
+    },
+
+    /**
+     * Connect the window and aggregation selects to setRollingWindow;
+     * options without precomputed values are removed
+     */
+    setupRollingControls(data) {
+        const windowSelect = document.getElementById('rollingWindowSelect');
+        const aggregationSelect = document.getElementById('rollingAggregationSelect');
+        const stats = data.rolling_stats?.goals_for;
+        if (!windowSelect || !aggregationSelect) return;
+        if (!stats) {
+            windowSelect.closest('.chart-controls').hidden = true;
+            return;
+        }
+
+        [...aggregationSelect.options].filter(o => !stats[o.value]).forEach(o => o.remove());
+        [...windowSelect.options].filter(o => !stats[aggregationSelect.value]?.[o.value]).forEach(o => o.remove());
+
+        const update = () => this.setRollingWindow(data, windowSelect.value, aggregationSelect.value);
+        windowSelect.addEventListener('change', update);
+        aggregationSelect.addEventListener('change', update);
+    },
+
     /**
      * Generate insight text for rolling average trend
      */
@@ -100,17 +183,23 @@ const ChartCreator = {
         const goalsFor = rollingData.goals_for;
         const goalsAgainst = rollingData.goals_against;
 
+        // Mean of the games with a value (windows without played games are null)
+        const average = (values) => {
+            const valid = values.filter(value => value !== null);
+            return valid.reduce((a, b) => a + b, 0) / valid.length;
+        };
+
         // Compare first half vs second half of season
         const midPoint = Math.floor(goalsFor.length / 2);
-        const firstHalfFor = goalsFor.slice(0, midPoint).reduce((a, b) => a + b, 0) / midPoint;
-        const secondHalfFor = goalsFor.slice(midPoint).reduce((a, b) => a + b, 0) / (goalsFor.length - midPoint);
-        const firstHalfAgainst = goalsAgainst.slice(0, midPoint).reduce((a, b) => a + b, 0) / midPoint;
-        const secondHalfAgainst = goalsAgainst.slice(midPoint).reduce((a, b) => a + b, 0) / (goalsAgainst.length - midPoint);
+        const firstHalfFor = average(goalsFor.slice(0, midPoint));
+        const secondHalfFor = average(goalsFor.slice(midPoint));
+        const firstHalfAgainst = average(goalsAgainst.slice(0, midPoint));
+        const secondHalfAgainst = average(goalsAgainst.slice(midPoint));
 
         // Also check recent trend (last quarter)
         const lastQuarter = Math.floor(goalsFor.length * 0.75);
-        const recentFor = goalsFor.slice(lastQuarter).reduce((a, b) => a + b, 0) / (goalsFor.length - lastQuarter);
-        const recentAgainst = goalsAgainst.slice(lastQuarter).reduce((a, b) => a + b, 0) / (goalsAgainst.length - lastQuarter);
+        const recentFor = average(goalsFor.slice(lastQuarter));
+        const recentAgainst = average(goalsAgainst.slice(lastQuarter));
 
         const forImprovement = secondHalfFor - firstHalfFor;
         const againstImprovement = firstHalfAgainst - secondHalfAgainst;
@@ -255,15 +344,17 @@ const ChartCreator = {
         if (!ctx) return;
 
         const attendanceData = data.training_attendance_over_time;
+        const indices = DataLoader.levelOfDetail(attendanceData, this.maxPoints(ctx));
+        this.lod.trainingAttendance = indices;
 
         this.charts.trainingAttendance = new Chart(ctx, {
             type: 'line',
             data: {
-                labels: attendanceData.dates,
+                labels: this.pick(attendanceData.dates, indices),
                 datasets: [
                     {
                         label: 'Teilnehmer pro Training',
-                        data: attendanceData.attendees,
+                        data: this.pick(attendanceData.attendees, indices),
                         borderColor: colors.accent,
                         backgroundColor: colors.accent + '30',
                         borderWidth: 2,
@@ -274,7 +365,7 @@ const ChartCreator = {
                     },
                     {
                         label: 'Rollierender Durchschnitt (6 Trainings)',
-                        data: attendanceData.rolling_avg,
+                        data: this.pick(attendanceData.rolling_avg, indices),
                         borderColor: colors.highlight,
                         backgroundColor: 'transparent',
                         borderWidth: 3,
@@ -323,6 +414,82 @@ const ChartCreator = {
         });
     },
 
+    /**
+     * Create response rate per month chart (games vs. trainings), sliced
+     * from the attendance cube
+     */
+    createResponseRateChart(data, colors) {
+        const ctx = document.getElementById('responseRateChart');
+        if (!ctx) return;
+        if (!data.attendance_cube) {
+            // Older participation files have no cube: drop the whole section instead of an empty chart
+            ctx.closest('section').hidden = true;
+            return;
+        }
+
+        const cube = DataLoader.decodeCube(data.attendance_cube);
+        const responded = ['STATUS_CONFIRMED', 'STATUS_REJECTED', 'STATUS_ABSENCE'];
+        const rate = (eventType) => {
+            const all = cube.count(['month'], { event_type: eventType });
+            const answered = cube.count(['month'], { event_type: eventType, user_participation: responded });
+            return all.map((count, i) => count > 0 ? Math.round(answered[i] / count * 1000) / 10 : null);
+        };
+
+        this.charts.responseRate = new Chart(ctx, {
+            type: 'line',
+            data: {
+                labels: cube.labels.month,
+                datasets: [
+                    {
+                        label: 'Training',
+                        data: rate('training'),
+                        borderColor: colors.primary,
+                        backgroundColor: 'transparent',
+                        borderWidth: 2,
+                        tension: 0.3,
+                        pointRadius: 2,
+                        spanGaps: true
+                    },
+                    {
+                        label: 'Spiele',
+                        data: rate('game'),
+                        borderColor: colors.accent,
+                        backgroundColor: 'transparent',
+                        borderWidth: 2,
+                        tension: 0.3,
+                        pointRadius: 2,
+                        spanGaps: true
+                    }
+                ]
+            },
+            options: {
+                responsive: true,
+                maintainAspectRatio: false,
+                plugins: {
+                    legend: {
+                        display: true,
+                        position: 'top'
+                    },
+                    title: {
+                        display: true,
+                        text: 'Rückmeldequote pro Monat',
+                        font: { size: 14 }
+                    }
+                },
+                scales: {
+                    y: {
+                        beginAtZero: true,
+                        max: 100,
+                        title: {
+                            display: true,
+                            text: 'Rückmeldungen (%)'
+                        }
+                    }
+                }
+            }
+        });
+    },
+
     /**
      * Create monthly training statistics chart
      */
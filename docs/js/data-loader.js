@@ -9,19 +9,37 @@ const DataLoader = {
     playerParticipation: null,
     historicalPlayers: null,
 
+    seasonIndex: null,
+    seasons: {},
+    availability: null,
+
     /**
      * Load all data files
+     * With season shards (assets/data/seasons/index.json) only the current
+     * season's games and participation are fetched; older seasons are
+     * loaded on demand via loadSeason().
      */
     async loadAll() {
         try {
             console.log('Loading all data...');
 
             // Load all JSON files in parallel
-            const [colors, games, players, historical] = await Promise.all([
+            const [colors, historical, index] = await Promise.all([
                 this.loadJSON('assets/data/colors.json'),
-                this.loadJSON('assets/data/games_stats.json'),
-                this.loadJSON('assets/data/player_participation.json'),
-                this.loadJSON('assets/data/historical_players.json')
+                this.loadJSON('assets/data/historical_players.json'),
+                this.loadJSON('assets/data/seasons/index.json').catch(() => null)
+            ]);
+
+            let season = { gamesStats: null, playerParticipation: null };
+            if (index && index.current_season) {
+                this.seasonIndex = index;
+                season = await this.loadSeason(index.current_season);
+            }
+
+            // Fall back to the full files when there are no shards
+            const [games, players] = await Promise.all([
+                season.gamesStats || this.loadJSON('assets/data/games_stats.json'),
+                season.playerParticipation || this.loadJSON('assets/data/player_participation.json')
             ]);
 
             this.colors = colors;
@@ -38,14 +56,157 @@ const DataLoader = {
     },
 
     /**
-     * Load a single JSON file
+     * Load the games and participation shards of one season (cached)
+     */
+    async loadSeason(season) {
+        if (!this.seasons[season]) {
+            const entry = this.seasonIndex?.seasons.find(s => s.season === season);
+            if (!entry) {
+                throw new Error(`Unknown season ${season}`);
+            }
+
+            const load = (shard) => shard ? this.loadJSON(`assets/data/seasons/${shard.file}`) : null;
+            const [gamesStats, playerParticipation] = await Promise.all([
+                load(entry.games),
+                load(entry.participation)
+            ]);
+            this.seasons[season] = { gamesStats, playerParticipation };
+        }
+        return this.seasons[season];
+    },
+
+    /**
+     * Load the player x event availability matrix and per-player attendance
+     * (cached, fetched on demand). The matrix is decoded once into bytes;
+     * availability.state(player, event) returns an index into
+     * availability.availability.states.
+     */
+    async loadAvailability() {
+        if (!this.availability) {
+            const data = await this.loadJSON('assets/data/player_availability.json');
+            const matrix = data.availability;
+            const bytes = Uint8Array.from(atob(matrix.data), c => c.charCodeAt(0));
+
+            // Four 2-bit cells per byte, first cell in the highest bits
+            data.state = (player, event) =>
+                (bytes[player * matrix.bytes_per_row + (event >> 2)] >> (6 - 2 * (event & 3))) & 3;
+            this.availability = data;
+        }
+        return this.availability;
+    },
+
+    /**
+     * Decode the attendance cube of player_participation.json (written by
+     * utils/attendance_cube.py): counts per month x team_name x event_type
+     * x user_participation as a dense row-major array. cube.count(keep,
+     * selected) sums over every dimension not in keep (the kept ones stay
+     * in cube.dimensions order), restricted to the selected labels, e.g. cube.count(['month'], { event_type: 'training' })
+     * gives one number per cube.labels.month. cube.sessions(month, eventType)
+     * is the number of events (label indices).
+     */
+    decodeCube(block) {
+        // Little-endian like every browser platform
+        const arrayTypes = { uint8: Uint8Array, uint16: Uint16Array, uint32: Uint32Array };
+        const decode = (data) => new arrayTypes[block.dtype](Uint8Array.from(atob(data), c => c.charCodeAt(0)).buffer);
+        const counts = decode(block.registrations);
+        const sessions = decode(block.sessions.data);
+        const dimensions = block.dimensions;
+        const shape = block.shape;
+
+        return {
+            labels: block.labels,
+            sessions: (month, eventType) => sessions[month * block.sessions.shape[1] + eventType],
+            count(keep, selected = {}) {
+                const allowed = dimensions.map(dimension => {
+                    const wanted = selected[dimension];
+                    if (wanted === undefined) return null;
+                    const labels = Array.isArray(wanted) ? wanted : [wanted];
+                    return new Set(labels.map(label => block.labels[dimension].indexOf(label)));
+                });
+                const kept = dimensions.map(dimension => keep.includes(dimension));
+                const size = shape.reduce((product, length, d) => kept[d] ? product * length : product, 1);
+                const result = new Array(size).fill(0);
+
+                const index = new Array(shape.length).fill(0);
+                for (let cell = 0; cell < counts.length; cell++) {
+                    if (counts[cell] && allowed.every((set, d) => !set || set.has(index[d]))) {
+                        let position = 0;
+                        for (let d = 0; d < shape.length; d++) {
+                            if (kept[d]) position = position * shape[d] + index[d];
+                        }
+                        result[position] += counts[cell];
+                    }
+                    // Advance the row-major index
+                    for (let d = shape.length - 1; d >= 0 && ++index[d] === shape[d]; d--) {
+                        index[d] = 0;
+                    }
+                }
+                return result;
+            }
+        };
+    },
+
+    /**
+     * Indices of the largest downsampled variant (series.lod, written by
+     * utils/downsample.py) with at most maxPoints points, or null to draw
+     * every point
+     */
+    levelOfDetail(series, maxPoints) {
+        if (!series.lod || series.dates.length <= maxPoints) return null;
+        const fitting = Object.keys(series.lod)
+            .map(Number)
+            .filter(target => series.lod[target].length <= maxPoints);
+        const target = fitting.length > 0 ? Math.max(...fitting) : Math.min(...Object.keys(series.lod).map(Number));
+        return series.lod[target];
+    },
+
+    /**
+     * Load a single JSON file (regular or compact columnar layout)
      */
     async loadJSON(path) {
         const response = await fetch(path);
         if (!response.ok) {
             throw new Error(`Failed to load ${path}: ${response.statusText}`);
         }
-        return response.json();
+        return this.expandColumnar(await response.json());
+    },
+
+    /**
+     * Expand the compact layout written by utils/compact_output.py:
+     * {"$columnar": {column: values}} becomes a list of records, and a
+     * column given as "@" and a JSON pointer ("@/games/dates") reuses
+     * another array of the file.
+     */
+    expandColumnar(root) {
+        const resolve = (reference) => reference.slice(1).split('/').slice(1)
+            .map(token => token.replace(/~1/g, '/').replace(/~0/g, '~'))
+            .reduce((value, key) => value?.[key], root);
+
+        const expand = (value) => {
+            if (!value || typeof value !== 'object' || Array.isArray(value)) {
+                return value;
+            }
+            if (value.$columnar) {
+                const names = Object.keys(value.$columnar);
+                const columns = names.map(name => {
+                    const column = value.$columnar[name];
+                    return typeof column === 'string' ? resolve(column) : column;
+                });
+                const length = columns.length > 0 ? columns[0].length : 0;
+                return Array.from({ length }, (_, i) => {
+                    const record = {};
+                    names.forEach((name, c) => { record[name] = columns[c][i]; });
+                    return record;
+                });
+            }
+            const expanded = {};
+            for (const [key, item] of Object.entries(value)) {
+                expanded[key] = expand(item);
+            }
+            return expanded;
+        };
+
+        return expand(root);
     },
 
     /**
@@ -29,6 +29,7 @@ document.addEventListener('DOMContentLoaded', async function() {
     ChartCreator.createHistoricalChart(DataLoader.historicalPlayers, colors);
     ChartCreator.createTrainingAttendanceChart(DataLoader.playerParticipation, colors);
     ChartCreator.createMonthlyTrainingChart(DataLoader.playerParticipation, colors);
+    ChartCreator.createResponseRateChart(DataLoader.playerParticipation, colors);
 
     // Hide loading state
     hideLoadingState();
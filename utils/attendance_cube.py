@@ -0,0 +1,132 @@
+"""
+Pre-aggregated attendance cube: month x team x event type x response
+
+Registrations are counted once per (month, team_name, event_type,
+user_participation) and emitted as a dense array with one label list per
+dimension, so any slice (games vs. trainings per month, one team, the
+response rate trend, ...) is answered by indexing instead of rescanning
+the raw rows. Months run continuously from the first to the last event.
+Sessions (distinct events per month and event type) come along so
+averages per training can be derived. Arrays are row-major, stored as
+little-endian unsigned integers of the smallest fitting width and base64
+encoded; registrations without a date are left out of the cube.
+"""
+import base64
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import instrumented
+
+DIMENSIONS = ['month', 'team_name', 'event_type', 'user_participation']
+SESSION_DIMENSIONS = ['month', 'event_type']
+
+DTYPES = ['uint8', 'uint16', 'uint32']
+
+def _month_counts(dates, columns):
+    """Row counts per (month label, *columns) with '' for missing values, grouped on month numbers"""
+    month_number = (dates.dt.year * 12 + dates.dt.month - 1).astype('int64').rename('month')
+    counts = pd.Series(1, index=dates.index).groupby([month_number] + columns, sort=False, observed=True,
+                                                      dropna=False).size()
+    # Label the (few) groups instead of every row
+    levels = [[f"{n // 12}-{n % 12 + 1:02d}" for n in counts.index.get_level_values(0)]]
+    levels += [['' if pd.isna(value) else str(value) for value in counts.index.get_level_values(level)]
+               for level in range(1, counts.index.nlevels)]
+    return pd.Series(counts.to_numpy(), index=pd.MultiIndex.from_arrays(levels))
+
+def registration_counts(df):
+    """Registrations per (month, team_name, event_type, user_participation) of dated rows"""
+    dated = df[df['event_date_start'].notna()]
+    return _month_counts(dated['event_date_start'], [dated[column] for column in DIMENSIONS[1:]])
+
+def session_counts(df):
+    """Distinct events per (month, event_type) of dated rows"""
+    events = df[df['event_date_start'].notna()].drop_duplicates('event_id')
+    return _month_counts(events['event_date_start'], [events['event_type']])
+
+def month_range(months):
+    """Every 'YYYY-MM' label from the earliest to the latest of months"""
+    if len(months) == 0:
+        return []
+    periods = pd.PeriodIndex(sorted(months), freq='M')
+    return [str(period) for period in pd.period_range(periods[0], periods[-1], freq='M')]
+
+def _dense(counts, labels, dimensions):
+    """Scatter a count Series with a (multi) index into a dense array over labels"""
+    shape = tuple(len(labels[dimension]) for dimension in dimensions)
+    dense = np.zeros(shape, dtype=np.int64)
+    if len(counts):
+        index = tuple(
+            pd.Index(labels[dimension]).get_indexer(counts.index.get_level_values(level))
+            for level, dimension in enumerate(dimensions)
+        )
+        np.add.at(dense, index, counts.to_numpy())
+    return dense
+
+def _encode(array, dtype):
+    return base64.b64encode(array.astype(np.dtype(dtype).newbyteorder('<')).tobytes()).decode('ascii')
+
+@instrumented()
+def cube_payload(registrations, sessions):
+    """
+    Dense cube JSON block from registration_counts / session_counts shaped Series
+
+    The counts may come from pandas, chunk-wise aggregation or SQL as long
+    as the index levels are in DIMENSIONS / SESSION_DIMENSIONS order.
+    """
+    def values(counts, level):
+        return set(counts.index.get_level_values(level)) if len(counts) else set()
+
+    labels = {'month': month_range(values(registrations, 0) | values(sessions, 0))}
+    for level, dimension in enumerate(DIMENSIONS[1:], 1):
+        labels[dimension] = sorted(values(registrations, level))
+    labels['event_type'] = sorted(set(labels['event_type']) | values(sessions, 1))
+
+    counts = _dense(registrations, labels, DIMENSIONS)
+    session_array = _dense(sessions, labels, SESSION_DIMENSIONS)
+    largest = max(counts.max(initial=0), session_array.max(initial=0))
+    dtype = next(name for name in DTYPES if largest <= np.iinfo(name).max)
+
+    return {
+        'dimensions': DIMENSIONS,
+        'labels': labels,
+        'shape': list(counts.shape),
+        'dtype': dtype,
+        'registrations': _encode(counts, dtype),
+        'sessions': {
+            'dimensions': SESSION_DIMENSIONS,
+            'shape': list(session_array.shape),
+            'data': _encode(session_array, dtype)
+        }
+    }
+
+def build_cube(df):
+    """Attendance cube of registrations with parsed dates"""
+    return cube_payload(registration_counts(df), session_counts(df))
+
+def cube_arrays(cube):
+    """Decode a cube block into (registrations, sessions) arrays"""
+    dtype = np.dtype(cube['dtype']).newbyteorder('<')
+    registrations = np.frombuffer(base64.b64decode(cube['registrations']), dtype=dtype).reshape(cube['shape'])
+    sessions = np.frombuffer(base64.b64decode(cube['sessions']['data']), dtype=dtype)
+    return registrations.astype(np.int64), sessions.reshape(cube['sessions']['shape']).astype(np.int64)
+
+def cube_slice(cube, keep=('month',), **selected):
+    """
+    Registrations summed over every dimension not in keep (kept axes in DIMENSIONS order)
+
+    selected restricts dimensions to one label or a list of labels, e.g.
+    cube_slice(cube, ['month'], event_type='training',
+    user_participation='STATUS_CONFIRMED') gives confirmed training
+    registrations per month, in the order of cube['labels']['month'].
+    """
+    counts, _ = cube_arrays(cube)
+    for axis, dimension in enumerate(DIMENSIONS):
+        if dimension in selected:
+            wanted = selected[dimension]
+            wanted = [wanted] if isinstance(wanted, str) else list(wanted)
+            positions = [cube['labels'][dimension].index(label) for label in wanted
+                         if label in cube['labels'][dimension]]
+            counts = np.take(counts, positions, axis=axis)
+    summed = tuple(axis for axis, dimension in enumerate(DIMENSIONS) if dimension not in keep)
+    return counts.sum(axis=summed)
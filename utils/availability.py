@@ -0,0 +1,134 @@
+"""
+Player x event availability matrix and per-player attendance over time
+
+The matrix has one 2-bit state per player and event (see STATES), packed
+four cells to a byte with every player row starting on a byte boundary and
+base64 encoded. Events are ordered by date. Attendance is the rolling share
+of confirmed registrations per player and month. Everything is built with
+index arrays and cumulative sums, no per-player Python loops.
+"""
+import base64
+
+import numpy as np
+import pandas as pd
+
+from instrumentation import instrumented
+
+# Cell values of the matrix
+STATES = ['none', 'confirmed', 'unavailable', 'no_response']
+STATE_CODES = {
+    'STATUS_CONFIRMED': 1,
+    'STATUS_REJECTED': 2,
+    'STATUS_ABSENCE': 2,
+    'STATUS_NOT_NOMINATED': 3,
+    'STATUS_NOT_CHOOSED': 3,
+}
+
+CELLS_PER_BYTE = 4
+ATTENDANCE_WINDOW_MONTHS = 3
+
+def pack_states(matrix):
+    """Pack a (players, events) array of 2-bit states row by row; returns (bytes, bytes_per_row)"""
+    rows, columns = matrix.shape
+    bytes_per_row = -(-columns // CELLS_PER_BYTE)
+    padded = np.zeros((rows, bytes_per_row * CELLS_PER_BYTE), dtype=np.uint8)
+    padded[:, :columns] = matrix
+
+    # First cell of each group of four goes into the highest two bits
+    cells = padded.reshape(rows, bytes_per_row, CELLS_PER_BYTE)
+    packed = (cells[..., 0] << 6) | (cells[..., 1] << 4) | (cells[..., 2] << 2) | cells[..., 3]
+    return packed.astype(np.uint8).tobytes(), bytes_per_row
+
+def unpack_states(data, rows, columns):
+    """Inverse of pack_states"""
+    packed = np.frombuffer(data, dtype=np.uint8).reshape(rows, -1)
+    shifts = np.array([6, 4, 2, 0], dtype=np.uint8)
+    cells = (packed[..., None] >> shifts) & 3
+    return cells.reshape(rows, -1)[:, :columns]
+
+def rolling_attendance(player_idx, dates, confirmed, num_players, window=ATTENDANCE_WINDOW_MONTHS):
+    """
+    Confirmed share (percent) per player over the last `window` months
+
+    Returns (month labels, rates) where rates[player][month] runs over every
+    month from the first to the last date and is None when the player had no
+    registration in the window.
+    """
+    month_number = (dates.dt.year * 12 + dates.dt.month - 1).to_numpy()
+    if len(month_number) == 0:
+        return [], [[] for _ in range(num_players)]
+    first, last = month_number.min(), month_number.max()
+    labels = [f"{number // 12}-{number % 12 + 1:02d}" for number in range(first, last + 1)]
+
+    shape = (num_players, len(labels))
+    registered = np.zeros(shape, dtype=np.int64)
+    attended = np.zeros(shape, dtype=np.int64)
+    np.add.at(registered, (player_idx, month_number - first), 1)
+    np.add.at(attended, (player_idx, month_number - first), confirmed.astype(np.int64))
+
+    def window_sums(counts):
+        cumulative = np.concatenate((np.zeros((num_players, 1), dtype=np.int64), counts.cumsum(axis=1)), axis=1)
+        shifted = np.concatenate((np.zeros((num_players, window), dtype=np.int64), cumulative), axis=1)
+        return cumulative[:, 1:] - shifted[:, 1:len(labels) + 1]
+
+    total = window_sums(registered)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rates = np.where(total > 0, np.round(window_sums(attended) / total * 100), np.nan)
+
+    return labels, [[None if np.isnan(rate) else int(rate) for rate in row] for row in rates.tolist()]
+
+@instrumented()
+def build_availability_data(df, anonymize=True, window=ATTENDANCE_WINDOW_MONTHS):
+    """Build the availability JSON payload from registrations with parsed dates"""
+    # Players in user id order (the anonymized ids of build_player_stats), events by date
+    first_rows = df.drop_duplicates('user_id').sort_values('user_id')
+    user_ids = first_rows['user_id'].to_numpy()
+    events = df.drop_duplicates('event_id').sort_values(['event_date_start', 'event_id'], na_position='last')
+    event_ids = events['event_id'].to_numpy()
+
+    player_idx = np.searchsorted(user_ids, df['user_id'].to_numpy())
+    event_order = np.argsort(event_ids, kind='stable')
+    event_idx = event_order[np.searchsorted(event_ids[event_order], df['event_id'].to_numpy())]
+
+    status = df['user_participation'].astype(str)
+    states = status.map(STATE_CODES).fillna(0).to_numpy(dtype=np.uint8)
+    matrix = np.zeros((len(user_ids), len(event_ids)), dtype=np.uint8)
+    matrix[player_idx, event_idx] = states
+    packed, bytes_per_row = pack_states(matrix)
+
+    dated = df['event_date_start'].notna().to_numpy()
+    months, rates = rolling_attendance(
+        player_idx[dated], df['event_date_start'][dated],
+        (status == 'STATUS_CONFIRMED').to_numpy()[dated], len(user_ids), window=window
+    )
+
+    if anonymize:
+        ids = list(range(1, len(user_ids) + 1))
+        names = [f"Spieler {player_id}" for player_id in ids]
+    else:
+        ids = [int(user_id) for user_id in user_ids]
+        names = first_rows['user_name'].astype(str).tolist()
+
+    return {
+        'players': {
+            'ids': ids,
+            'names': names,
+            'teams': first_rows['team_name'].astype(str).tolist()
+        },
+        'events': {
+            'dates': [d.strftime('%d.%m.%Y') if pd.notna(d) else '' for d in events['event_date_start']],
+            'types': events['event_type'].astype(str).tolist()
+        },
+        'availability': {
+            'states': STATES,
+            'rows': len(user_ids),
+            'columns': len(event_ids),
+            'bytes_per_row': bytes_per_row,
+            'data': base64.b64encode(packed).decode('ascii')
+        },
+        'attendance': {
+            'window_months': window,
+            'months': months,
+            'rates': rates
+        }
+    }
@@ -0,0 +1,425 @@
+"""
+Benchmark the data processing steps on synthetic inputs
+"""
+import gzip
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from contextlib import closing
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+import columnar_cache
+import json_output
+import match_store
+from PIL import Image
+from availability import build_availability_data
+from extract_colors import extract_colors, rgb_to_hex
+from excel_ingest import read_historical_sheet
+from fetch_pages import update_matches
+from match_results import compute_results
+from output_schemas import GAMES_STATS, PLAYER_AVAILABILITY, PLAYER_PARTICIPATION
+from participation_stream import aggregate_playerlist
+from process_all_data import build_games_data, build_participation_data, build_player_stats, participation_payload
+from process_excel_data import historical_payload
+from serve import PreviewHandler
+from synthetic_data import (generate_match_page, generate_playerlist, write_games_csv, write_historical_excel,
+                            write_playerlist_csv)
+
+def legacy_player_stats(df, anonymize=True):
+    """Reference implementation: the original per-player filter loop"""
+    player_name_map = {}
+    if anonymize:
+        unique_ids = sorted(df['user_id'].unique())
+        for idx, user_id in enumerate(unique_ids, 1):
+            player_name_map[user_id] = f"Spieler {idx}"
+
+    player_stats = []
+    for user_id in df['user_id'].unique():
+        player_data = df[df['user_id'] == user_id]
+        real_name = player_data['user_name'].iloc[0]
+        player_name = player_name_map.get(user_id, real_name) if anonymize else real_name
+        team_name = player_data['team_name'].iloc[0]
+
+        confirmed = len(player_data[player_data['user_participation'] == 'STATUS_CONFIRMED'])
+        rejected = len(player_data[player_data['user_participation'] == 'STATUS_REJECTED'])
+        absent = len(player_data[player_data['user_participation'] == 'STATUS_ABSENCE'])
+
+        training_events = player_data[player_data['event_type'] == 'training']
+        game_events = player_data[player_data['event_type'] == 'game']
+
+        training_confirmed = len(training_events[training_events['user_participation'] == 'STATUS_CONFIRMED'])
+        games_confirmed = len(game_events[game_events['user_participation'] == 'STATUS_CONFIRMED'])
+
+        total_events = len(player_data)
+        attendance_rate = round(confirmed / total_events * 100, 1) if total_events > 0 else 0
+
+        anon_user_id = list(player_name_map.keys()).index(user_id) + 1 if anonymize else int(user_id)
+
+        player_stats.append({
+            'user_id': anon_user_id,
+            'user_name': player_name,
+            'team_name': team_name,
+            'total_events': int(total_events),
+            'confirmed': int(confirmed),
+            'rejected': int(rejected),
+            'absent': int(absent),
+            'training_confirmed': int(training_confirmed),
+            'games_confirmed': int(games_confirmed),
+            'attendance_rate': attendance_rate
+        })
+
+    player_stats.sort(key=lambda x: x['attendance_rate'], reverse=True)
+    return player_stats
+
+def timed(func, *args, **kwargs):
+    """Run func once and return (result, seconds)"""
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+def benchmark_player_stats(num_rows=100_000, num_players=None):
+    """Compare the groupby player stats against the legacy loop"""
+    print(f"\n=== Player Stats Benchmark ({num_rows:,} rows) ===")
+    df = generate_playerlist(num_rows, num_players=num_players)
+    print(f"Players: {df['user_id'].nunique()}")
+
+    for anonymize in (True, False):
+        new_stats, new_time = timed(build_player_stats, df, anonymize=anonymize)
+        old_stats, old_time = timed(legacy_player_stats, df, anonymize=anonymize)
+
+        if new_stats != old_stats:
+            raise AssertionError(f"Player stats differ from legacy output (anonymize={anonymize})")
+
+        print(f"anonymize={anonymize}: groupby {new_time:.3f}s, "
+              f"legacy loop {old_time:.3f}s ({old_time / new_time:.1f}x faster), output identical")
+
+def check_player_stats(num_rows=5_000):
+    """Fast check: groupby player stats equal the legacy loop on a small playerlist"""
+    df = generate_playerlist(num_rows, num_players=40)
+    # A player with a single registration
+    df = pd.concat([df, df.iloc[[0]].assign(user_id=df['user_id'].max() + 1)], ignore_index=True)
+
+    for anonymize in (True, False):
+        if build_player_stats(df, anonymize=anonymize) != legacy_player_stats(df, anonymize=anonymize):
+            raise AssertionError(f"Player stats differ from legacy output (anonymize={anonymize})")
+    print(f"player_stats: identical to the legacy loop ({len(df):,} rows, {df['user_id'].nunique()} players)")
+
+def check_participation_paths(num_rows=20_000):
+    """Fast check: the CSV, chunked and SQLite store paths give the same participation and availability data"""
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'playerlist.csv')
+        # Random player/event pairs: the playerlist repeats some (event, player) registrations
+        df = write_playerlist_csv(csv_path, num_rows)
+        repeated = int(df.duplicated(['event_id', 'user_id']).sum())
+
+        registrations = columnar_cache.read_playerlist_csv(csv_path)
+        payloads = {'csv': build_participation_data(registrations)}
+        # Small chunks, so repeated registrations span chunks
+        overall, _ = aggregate_playerlist(csv_path, chunksize=num_rows // 7)
+        payloads['chunked'] = participation_payload(overall.totals(), overall.training_attendance(), overall.cube())
+        with closing(match_store.connect(os.path.join(tmp, 'store.sqlite'))) as conn:
+            match_store.ingest_playerlist_csv(conn, csv_path)
+            payloads['store'] = participation_payload(match_store.participation_totals(conn),
+                                                      match_store.training_attendance(conn),
+                                                      match_store.attendance_cube(conn))
+            store_availability = build_availability_data(match_store.read_playerlist(conn))
+
+    expected = json_output.dumps(payloads['csv'])
+    for name, payload in payloads.items():
+        if json_output.dumps(payload) != expected:
+            raise AssertionError(f"Participation data of the {name} path differs from the CSV path")
+    if json_output.dumps(store_availability) != json_output.dumps(build_availability_data(registrations)):
+        raise AssertionError("Availability data of the store path differs from the CSV path")
+    print(f"participation: CSV, chunked and store paths identical ({num_rows:,} rows, {repeated} repeated)")
+
+def benchmark_columnar_cache(num_rows=1_000_000, num_matches=10_000, num_seasons=200):
+    """Compare parsing the raw CSV/Excel inputs against loading the Parquet cache"""
+    print(f"\n=== Columnar Cache Benchmark ({num_rows:,} registrations, "
+          f"{num_matches:,} matches, {num_seasons} seasons) ===")
+    if columnar_cache.pyarrow is None:
+        print("⚠ pyarrow not installed, nothing to compare")
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        inputs = [
+            ('playerlist CSV', columnar_cache.read_playerlist_csv,
+             write_playerlist_csv, os.path.join(tmp, 'playerlist.csv'), num_rows),
+            ('games CSV', columnar_cache.read_games_csv,
+             write_games_csv, os.path.join(tmp, 'games.csv'), num_matches),
+            ('historical Excel', columnar_cache.read_excel_sheet,
+             write_historical_excel, os.path.join(tmp, 'historical.xlsx'), num_seasons),
+        ]
+        cache_dir = os.path.join(tmp, 'cache')
+
+        for name, reader, writer, path, size in inputs:
+            writer(path, size)
+            cold, cold_time = timed(columnar_cache.load_cached, path, reader, cache_dir)
+            warm, warm_time = timed(columnar_cache.load_cached, path, reader, cache_dir)
+            parse_time = timed(reader, path)[1]
+
+            if not warm.equals(cold):
+                raise AssertionError(f"Cached {name} differs from the parsed input")
+
+            print(f"{name}: parse {parse_time:.3f}s, first run incl. caching {cold_time:.3f}s, "
+                  f"warm Parquet {warm_time:.3f}s ({parse_time / warm_time:.1f}x faster)")
+
+def legacy_result_counts(df):
+    """Reference implementation: row-wise apply plus one boolean mask per result"""
+    def get_result_code(row):
+        if row['goals_for'] > row['goals_against']:
+            return 'W'
+        elif row['goals_for'] < row['goals_against']:
+            return 'L'
+        else:
+            return 'D'
+
+    result_code = df.apply(get_result_code, axis=1)
+    df = df.assign(result_code=result_code)
+    return result_code, {
+        'wins': len(df[df['result_code'] == 'W']),
+        'draws': len(df[df['result_code'] == 'D']),
+        'losses': len(df[df['result_code'] == 'L']),
+    }
+
+def benchmark_match_results(num_matches=100_000):
+    """Compare the vectorized results engine against the row-wise apply"""
+    print(f"\n=== Match Results Benchmark ({num_matches:,} matches) ===")
+    rng = np.random.default_rng(42)
+    df = pd.DataFrame({
+        'goals_for': rng.poisson(1.8, num_matches),
+        'goals_against': rng.poisson(1.5, num_matches),
+    })
+
+    results, new_time = timed(compute_results, df['goals_for'].to_numpy(), df['goals_against'].to_numpy())
+    (codes, counts), old_time = timed(legacy_result_counts, df)
+
+    if list(results['result_code']) != codes.tolist() or \
+            {key: results['totals'][key] for key in counts} != counts:
+        raise AssertionError("Result codes or W/D/L totals differ from the row-wise apply")
+
+    print(f"vectorized (codes, points, form, streaks) {new_time:.3f}s, "
+          f"apply + masks (codes only) {old_time:.3f}s ({old_time / new_time:.1f}x faster)")
+    print(f"W/D/L totals identical: {counts['wins']}W-{counts['draws']}D-{counts['losses']}L")
+
+def check_match_results(num_matches=2_000):
+    """Fast check: result codes and W/D/L totals equal the row-wise apply; unplayed games are skipped"""
+    rng = np.random.default_rng(7)
+    df = pd.DataFrame({
+        'goals_for': rng.poisson(1.8, num_matches),
+        'goals_against': rng.poisson(1.5, num_matches),
+    })
+    for games in (df, df.iloc[:1]):
+        results = compute_results(games['goals_for'].to_numpy(), games['goals_against'].to_numpy())
+        codes, counts = legacy_result_counts(games)
+        if list(results['result_code']) != codes.tolist() or \
+                {key: results['totals'][key] for key in counts} != counts:
+            raise AssertionError(f"Result codes or W/D/L totals differ from the row-wise apply ({len(games)} games)")
+    if compute_results([], [])['totals']['wins'] != 0:
+        raise AssertionError("Results of an empty season")
+
+    # A game without a result yet (empty goal cells, as read from the CSV)
+    games = df.iloc[:20].astype(float).assign(
+        date=pd.date_range('2025-01-01', periods=20, freq='7D'), competition='Kreisliga',
+        home_team='TSV Marquartstein', away_team='TSV Grassau', opponent='TSV Grassau')
+    games.loc[19, ['goals_for', 'goals_against']] = np.nan
+    statistics = build_games_data(games)['statistics']
+    expected = legacy_result_counts(games.iloc[:19])[1]
+    if statistics['total_games'] != 19 or {key: statistics[key] for key in expected} != expected:
+        raise AssertionError("Unplayed game counted in the games statistics")
+    print(f"match_results: codes and W/D/L totals identical to the row-wise apply ({num_matches:,} matches), "
+          f"unplayed games skipped")
+
+def legacy_extract_colors(image_path, num_colors=8, downscale=True):
+    """Reference implementation: 150x150 downscale, Counter and brightness filter"""
+    img = Image.open(image_path).convert('RGB')
+    if downscale:
+        img = img.resize((150, 150))
+    most_common = Counter(list(img.getdata())).most_common(num_colors * 3)
+
+    filtered_colors = []
+    for color, count in most_common:
+        r, g, b = color
+        if not (r > 240 and g > 240 and b > 240) and not (r < 15 and g < 15 and b < 15):
+            brightness = (r + g + b) / 3
+            is_unique = True
+            for existing_color, _ in filtered_colors:
+                if abs(brightness - sum(existing_color) / 3) < 30:
+                    is_unique = False
+                    break
+            if is_unique:
+                filtered_colors.append((color, count))
+        if len(filtered_colors) >= num_colors:
+            break
+
+    return [rgb_to_hex(color) for color, _ in filtered_colors]
+
+def benchmark_colors(image_path=None):
+    """Time the quantizing palette extractor against the original Counter approach"""
+    image_path = image_path or os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'logo.png')
+    with Image.open(image_path) as img:
+        print(f"\n=== Color Extraction Benchmark ({img.size[0]}x{img.size[1]} logo) ===")
+
+    new_colors, new_time = timed(extract_colors, image_path)
+    old_colors, old_time = timed(legacy_extract_colors, image_path)
+    full_colors, full_time = timed(legacy_extract_colors, image_path, downscale=False)
+    print(f"median cut, full resolution: {new_time:.3f}s -> {new_colors['all_colors']}")
+    print(f"Counter, 150x150:            {old_time:.3f}s -> {old_colors}")
+    print(f"Counter, full resolution:    {full_time:.3f}s -> {full_colors}")
+
+def legacy_historical_payload(excel_path):
+    """Reference implementation: pd.read_excel, fillna(0) and row records"""
+    df = pd.read_excel(excel_path).fillna(0)
+    return {'columns': df.columns.tolist(), 'data': df.to_dict('records')}
+
+def benchmark_excel(num_seasons=100, num_sheets=8):
+    """Compare the read-only openpyxl ingestion against pd.read_excel on a multi-sheet workbook"""
+    print(f"\n=== Excel Ingestion Benchmark ({num_sheets} sheets x {num_seasons:,} seasons) ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_historical_excel(os.path.join(tmp, 'historical.xlsx'), num_seasons, num_sheets=num_sheets)
+
+        new_data, new_time = timed(lambda: historical_payload(read_historical_sheet(path)))
+        old_data, old_time = timed(legacy_historical_payload, path)
+
+    dropped = [column for column in old_data['columns'] if column not in new_data['columns']]
+    print(f"read-only + cleanup {new_time:.3f}s, pd.read_excel + fillna {old_time:.3f}s "
+          f"({old_time / new_time:.1f}x faster)")
+    print(f"columns: {len(new_data['columns'])} typed ({', '.join(f'{c}:{t}' for c, t in new_data['types'].items())}), "
+          f"dropped {dropped}")
+
+def _write_page(pages_dir, index, num_matches, seed):
+    """Synthetic match page plus its gzip variant, as a web server would send it"""
+    path = os.path.join(pages_dir, f'page-{index:04d}.html')
+    html = generate_match_page(num_matches, seed=seed).encode('utf-8')
+    with open(path, 'wb') as f:
+        f.write(html)
+    with open(path + '.gz', 'wb') as f:
+        f.write(gzip.compress(html))
+
+def benchmark_fetch(num_matches=20_000, num_pages=100, changed_share=0.1, connections=8):
+    """Fetch match pages from a local server: cold cache, all unchanged (304), some changed"""
+    per_page = max(10, num_matches // num_pages)
+    print(f"\n=== Page Fetch Benchmark ({num_pages} pages x {per_page:,} matches, {connections} connections) ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        pages_dir = os.path.join(tmp, 'site')
+        os.makedirs(pages_dir)
+        for index in range(num_pages):
+            _write_page(pages_dir, index, per_page, seed=index)
+
+        class PageHandler(PreviewHandler):
+            def __init__(self, *args, **kwargs):
+                SimpleHTTPRequestHandler.__init__(self, *args, directory=pages_dir, **kwargs)
+
+            def _timed(self, handle):
+                self._status, self._size, self._encoding = None, 0, None
+                handle()
+
+        server = ThreadingHTTPServer(('127.0.0.1', 0), PageHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            pages_path = os.path.join(tmp, 'pages.json')
+            with open(pages_path, 'w', encoding='utf-8') as f:
+                json.dump([{'url': f'http://127.0.0.1:{server.server_port}/page-{index:04d}.html',
+                            'name': f'page-{index:04d}'} for index in range(num_pages)], f)
+            cache_dir, output_path = os.path.join(tmp, 'cache'), os.path.join(tmp, 'games.csv')
+
+            def run(label):
+                metrics, seconds = timed(update_matches, pages_path, cache_dir, output_path,
+                                         max_connections=connections)
+                return (f"{label}: {seconds:.2f}s total, fetch {metrics['pages_per_second']} pages/s "
+                        f"({metrics['bytes'] / 1e6:.1f} MB), {metrics['cache_hits']} cache hits, "
+                        f"{metrics['extracted']} pages parsed")
+
+            lines = [run('cold cache')]
+            lines.append(run('unchanged'))
+            changed = max(1, int(num_pages * changed_share))
+            for index in range(changed):
+                _write_page(pages_dir, index, per_page, seed=num_pages + index)
+            lines.append(run(f'{changed} changed'))
+        finally:
+            server.shutdown()
+            server.server_close()
+    print()
+    for line in lines:
+        print(line)
+
+def _stringified(legacy, typed):
+    """Number of values json.dump(default=str) wrote as strings where the typed output has a number or date"""
+    if isinstance(typed, dict):
+        return sum(_stringified(legacy[key], value) for key, value in typed.items())
+    if isinstance(typed, list):
+        return sum(_stringified(old, new) for old, new in zip(legacy, typed))
+    return int(isinstance(legacy, str) and legacy != typed)
+
+def benchmark_serialization(num_rows=200_000, num_matches=10_000):
+    """Compare json.dump(indent=2, default=str) against the typed json_output writer"""
+    print(f"\n=== Serialization Benchmark ({num_rows:,} registrations, {num_matches:,} matches) ===")
+    with tempfile.TemporaryDirectory() as tmp:
+        games_path, playerlist_path = os.path.join(tmp, 'games.csv'), os.path.join(tmp, 'playerlist.csv')
+        write_games_csv(games_path, num_matches)
+        write_playerlist_csv(playerlist_path, num_rows)
+        games = columnar_cache.read_games_csv(games_path)
+        playerlist = columnar_cache.read_playerlist_csv(playerlist_path)
+    payloads = [
+        ('games_stats', build_games_data(games.sort_values('date')), GAMES_STATS),
+        ('player_participation', build_participation_data(playerlist), PLAYER_PARTICIPATION),
+        ('player_availability', build_availability_data(playerlist), PLAYER_AVAILABILITY),
+    ]
+    encoder = 'orjson' if json_output.orjson is not None else 'json (orjson not installed)'
+
+    for name, data, schema in payloads:
+        legacy, legacy_time = timed(lambda: json.dumps(data, indent=2, ensure_ascii=False, default=str).encode('utf-8'))
+        _, validate_time = timed(json_output.validate, data, schema)
+        pretty, pretty_time = timed(json_output.dumps, data)
+        compact, compact_time = timed(json_output.dumps, data, pretty=False)
+        orjson, json_output.orjson = json_output.orjson, None
+        try:
+            fallback, fallback_time = timed(json_output.dumps, data)
+        finally:
+            json_output.orjson = orjson
+
+        typed = json.loads(pretty)
+        if json.loads(fallback) != typed or json.loads(compact) != typed:
+            raise AssertionError(f"{name}: {encoder} and stdlib fallback output differ")
+        stringified = _stringified(json.loads(legacy), typed)
+
+        print(f"{name}: json.dump {legacy_time:.3f}s {len(legacy):,} B ({stringified:,} values as str) | "
+              f"{encoder} {pretty_time:.3f}s {len(pretty):,} B ({legacy_time / pretty_time:.1f}x faster), "
+              f"minified {compact_time:.3f}s {len(compact):,} B | stdlib fallback {fallback_time:.3f}s | "
+              f"validation {validate_time:.3f}s")
+
+BENCHMARKS = {
+    'player_stats': benchmark_player_stats,
+    'columnar_cache': benchmark_columnar_cache,
+    'match_results': benchmark_match_results,
+    'colors': benchmark_colors,
+    'excel': benchmark_excel,
+    'fetch': benchmark_fetch,
+    'serialization': benchmark_serialization,
+}
+
+# Small equivalence checks against the reference implementations (seconds, not minutes)
+CHECKS = {
+    'player_stats': check_player_stats,
+    'match_results': check_match_results,
+    'participation': check_participation_paths,
+}
+
+if __name__ == '__main__':
+    # python benchmark.py check: run the equivalence checks only
+    if sys.argv[1:2] == ['check']:
+        for check in CHECKS.values():
+            check()
+        sys.exit()
+
+    # python benchmark.py [name] [size]: rows/matches/seasons (logo path for colors), default per benchmark
+    names = [sys.argv[1]] if len(sys.argv) > 1 else list(BENCHMARKS)
+    args = sys.argv[2:3]
+    for name in names:
+        BENCHMARKS[name](*(arg if name == 'colors' else int(arg) for arg in args))
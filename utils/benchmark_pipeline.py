@@ -0,0 +1,153 @@
+"""
+Time every pipeline stage on synthetic inputs at 1x/10x/100x scale
+
+Inputs come from synthetic_data.write_inputs, so runs are reproducible on
+any machine without the club's data. Results (best and median of the
+repeats per stage and scale) are written to a JSON file together with the
+git commit (default: data/metrics/benchmark_pipeline-<timestamp>.json),
+which --compare reads back to show the change per stage:
+
+    python utils/benchmark_pipeline.py --output bench_new.json --compare bench_old.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime
+
+from benchmark import timed
+from extract_colors import extract_colors_to_json
+from extract_matches import extract_matches, write_matches_csv
+from generate_qr import generate_qr_code
+from instrumentation import METRICS_DIR
+from process_all_data import process_games_data, process_player_participation
+from process_excel_data import process_excel_to_json
+from synthetic_data import scaled_sizes, write_inputs
+
+DEFAULT_SCALES = (1, 10, 100)
+
+def _extract_matches(paths, out_dir, sizes):
+    write_matches_csv(extract_matches(paths['html']), os.path.join(out_dir, 'matches.csv'))
+
+def _process_games(paths, out_dir, sizes):
+    process_games_data(paths['games_csv'], os.path.join(out_dir, 'games_stats.json'))
+
+def _process_participation(paths, out_dir, sizes):
+    process_player_participation(paths['player_csv'], os.path.join(out_dir, 'player_participation.json'))
+
+def _process_excel(paths, out_dir, sizes):
+    process_excel_to_json(paths['excel'], os.path.join(out_dir, 'historical_players.json'))
+
+def _extract_colors(paths, out_dir, sizes):
+    extract_colors_to_json(paths['logo'], os.path.join(out_dir, 'colors.json'))
+
+def _generate_qr(paths, out_dir, sizes):
+    for i in range(sizes['qr_codes']):
+        generate_qr_code(f"https://example.org/stats/{i}", os.path.join(out_dir, 'qr_code.png'), paths['logo'])
+
+# name: (function, size key reported with the result)
+STAGES = {
+    'extract_matches': (_extract_matches, 'matches'),
+    'process_games_data': (_process_games, 'matches'),
+    'process_player_participation': (_process_participation, 'playerlist_rows'),
+    'process_excel_to_json': (_process_excel, 'seasons'),
+    'extract_colors': (_extract_colors, 'logo_px'),
+    'generate_qr_code': (_generate_qr, 'qr_codes'),
+}
+
+def git_commit():
+    """Current commit hash, or None outside a git checkout"""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def time_stage(func, paths, out_dir, sizes, repeat=3):
+    """Run one stage `repeat` times with its console output suppressed; returns the timings"""
+    timings = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            timings.append(timed(func, paths, out_dir, sizes)[1])
+    return timings
+
+def run_benchmarks(scales=DEFAULT_SCALES, stages=None, repeat=3, seed=42):
+    """Benchmark the selected stages at every scale and return the results document"""
+    stages = stages or list(STAGES)
+    results = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for scale in scales:
+            sizes = scaled_sizes(scale)
+            input_dir = os.path.join(tmp, f"inputs_{scale}x")
+            out_dir = os.path.join(tmp, f"outputs_{scale}x")
+            os.makedirs(out_dir)
+
+            print(f"\n=== Scale {scale}x: {sizes} ===")
+            paths = write_inputs(input_dir, scale, seed=seed)
+
+            for name in stages:
+                func, size_key = STAGES[name]
+                timings = time_stage(func, paths, out_dir, sizes, repeat=repeat)
+                results.append({
+                    'stage': name,
+                    'scale': scale,
+                    'size': sizes[size_key],
+                    'unit': size_key,
+                    'best': round(min(timings), 4),
+                    'median': round(statistics.median(timings), 4),
+                    'runs': [round(t, 4) for t in timings],
+                })
+                print(f"{name:<30} {sizes[size_key]:>10,} {size_key:<16} "
+                      f"best {min(timings):8.3f}s  median {statistics.median(timings):8.3f}s")
+
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'seed': seed,
+        'results': results,
+    }
+
+def compare(current, previous):
+    """Print best times of two result documents side by side"""
+    before = {(r['stage'], r['scale']): r['best'] for r in previous['results']}
+    print(f"\n=== Compared to {previous.get('commit') or 'previous run'} ===")
+    for result in current['results']:
+        old = before.get((result['stage'], result['scale']))
+        if old is None:
+            continue
+        change = (result['best'] - old) / old * 100 if old > 0 else 0
+        print(f"{result['stage']:<30} {result['scale']:>4}x  {old:8.3f}s -> {result['best']:8.3f}s ({change:+.1f}%)")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark all pipeline stages on synthetic inputs')
+    parser.add_argument('--scales', type=float, nargs='+', default=list(DEFAULT_SCALES))
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='results JSON (default: data/metrics/benchmark_pipeline-<timestamp>.json)')
+    parser.add_argument('--compare', metavar='JSON', help='earlier results to compare against')
+    args = parser.parse_args()
+
+    scales = [int(scale) if scale == int(scale) else scale for scale in args.scales]
+    report = run_benchmarks(scales, args.stages, repeat=args.repeat, seed=args.seed)
+
+    output = args.output
+    if not output:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        output = os.path.join(METRICS_DIR, f"benchmark_pipeline-{datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(report, json.load(f))
@@ -0,0 +1,344 @@
+"""
+Build all website data in one run
+
+Stages and the files they read and write are declared below; a stage
+depends on every stage that produces one of its inputs. Independent stages
+(colors, historical Excel, participation, ...) run concurrently, each in
+its own process, and unchanged stages are skipped via the build manifest.
+Paths come from DEFAULT_CONFIG, optionally overridden by a JSON file:
+
+    python utils/build.py --config build_config.json [--force] [--only games colors]
+
+With --clubs every club of a clubs file is built in the same run, all
+stages of all clubs sharing one process pool, each club into its own
+output directory (see load_clubs):
+
+    python utils/build.py --clubs clubs.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+
+from build_manifest import code_inputs, run_step
+from clubs import resolve_club
+from instrumentation import METRICS_DIR, PROFILERS, collected, peak_rss_mb, profiled, record, session, span
+from season_shards import index_path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Relative paths are resolved against the repository root
+DEFAULT_CONFIG = {
+    'html': None,  # saved DFB page, directory or glob; the matches stage is skipped without it
+    'pages': None,  # JSON list of DFB page URLs to fetch instead (fetch_pages.py)
+    'pages_cache': 'data/page_cache',
+    'games_csv': 'data/games_first_second_team_friendlies.csv',
+    'player_csv': 'data/training_game_playerlist.csv',
+    'excel': 'data/First_Second_A_youth_playerscount_years.xlsx',
+    'logo': 'data/logo.png',
+    'qr_code': 'docs/qr_code.png',  # QR codes from generate_qr.py, resized with the logo
+    'qr_printable': 'docs/qr_code_printable.png',
+    'output_dir': 'docs/assets/data',
+    'images_dir': 'docs/assets/images',
+    'manifest': 'data/build_manifest.json',
+    'cache_dir': 'data/cache',
+    'store': None,  # SQLite store (match_store.py) to read games and registrations from instead of the CSVs
+    'compact': False,
+    'shards': False,
+    'chunksize': None,  # stream the playerlist in chunks of this many rows
+    'workers': None,
+    'club': None,  # club identity and second team rules (see clubs.py), default clubs.DEFAULT_CLUB
+}
+
+PATH_KEYS = ['html', 'pages', 'pages_cache', 'games_csv', 'player_csv', 'excel', 'logo', 'qr_code', 'qr_printable',
+             'output_dir', 'images_dir', 'manifest', 'cache_dir', 'store']
+
+def load_config(config_path=None, overrides=None):
+    """DEFAULT_CONFIG updated from a JSON file and overrides, with absolute paths and output files"""
+    config = dict(DEFAULT_CONFIG)
+    if config_path:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            config.update(json.load(f))
+    config.update(overrides or {})
+
+    for key in PATH_KEYS:
+        if config[key]:
+            config[key] = os.path.join(ROOT, config[key])
+
+    output_dir = config['output_dir']
+    config['games_json'] = os.path.join(output_dir, 'games_stats.json')
+    config['participation_json'] = os.path.join(output_dir, 'player_participation.json')
+    config['availability_json'] = None if config['chunksize'] else os.path.join(output_dir, 'player_availability.json')
+    config['historical_json'] = os.path.join(output_dir, 'historical_players.json')
+    config['colors_json'] = os.path.join(output_dir, 'colors.json')
+    config['images_json'] = os.path.join(config['images_dir'], 'images.json')
+    config['shard_dir'] = os.path.join(output_dir, 'seasons') if config['shards'] else None
+    return config
+
+def load_clubs(clubs_path):
+    """
+    {club slug: config} for a clubs file
+
+    The file holds shared settings under "defaults" and one entry per club
+    under "clubs", each with its "club" identity (see clubs.py) and its own
+    paths. Unless its entry says otherwise, a club writes to
+    docs/clubs/<slug>/ and keeps its manifest and cache under
+    data/clubs/<slug>/, even if "defaults" sets these paths.
+    """
+    with open(clubs_path, 'r', encoding='utf-8') as f:
+        clubs = json.load(f)
+
+    configs = {}
+    for entry in clubs['clubs']:
+        slug = resolve_club(entry['club']).slug
+        if slug in configs:
+            raise ValueError(f"Duplicate club {entry['club']['name']!r} in {clubs_path}")
+        # Shared defaults first; the per-club paths win over them so clubs never share
+        # outputs or a manifest, and the club's own entry wins over both
+        overrides = {
+            'qr_code': None,
+            'qr_printable': None,
+            **clubs.get('defaults', {}),
+            'output_dir': f'docs/clubs/{slug}',
+            'images_dir': f'docs/clubs/{slug}/images',
+            'manifest': f'data/clubs/{slug}/build_manifest.json',
+            'cache_dir': f'data/clubs/{slug}/cache',
+            **entry
+        }
+        configs[slug] = load_config(overrides=overrides)
+    return configs
+
+def run_matches(config, force):
+    """Extract matches from the saved or fetched DFB page(s) into the games CSV"""
+    import extract_matches
+
+    if config['pages']:
+        import fetch_pages
+
+        # Remote pages cannot be hashed up front; conditional requests and the
+        # page cache skip the work instead, the CSV is only rewritten on changes
+        fetch_pages.update_matches(config['pages'], config['pages_cache'], config['games_csv'], club=config['club'])
+        return
+
+    html_files = extract_matches.find_html_files(config['html'])
+    if len(html_files) == 1 and html_files[0] == config['html']:
+        def extract(html_path, output_path, club):
+            matches = extract_matches.extract_matches(html_path, club=club)
+            count = extract_matches.write_matches_csv(matches, output_path)
+            print(f"Extracted {count} matches to {os.path.basename(output_path)}")
+        params = {'html_path': config['html'], 'output_path': config['games_csv'], 'club': config['club']}
+    else:
+        extract = extract_matches.extract_matches_batch
+        params = {'path_or_pattern': config['html'], 'output_path': config['games_csv'], 'club': config['club']}
+
+    run_step(config['manifest'], 'matches', extract,
+             inputs=code_inputs(extract_matches.__file__) + html_files, outputs=[config['games_csv']],
+             params=params, force=force)
+
+def shard_outputs(config, kind):
+    """index.json and the entries file of kind, if the step writes season shards"""
+    if not config['shard_dir']:
+        return []
+    return [index_path(config['shard_dir']), index_path(config['shard_dir'], kind)]
+
+def run_games(config, force):
+    """Games statistics JSON"""
+    import process_all_data
+
+    run_step(config['manifest'], 'games_stats', process_all_data.process_games_data,
+             inputs=code_inputs(process_all_data.__file__) + [config['store'] or config['games_csv']],
+             outputs=[config['games_json']] + shard_outputs(config, 'games'),
+             params={'csv_path': config['games_csv'], 'output_path': config['games_json'],
+                     'compact': config['compact'], 'shard_dir': config['shard_dir'],
+                     'cache_dir': config['cache_dir'], 'store_path': config['store'], 'club': config['club']},
+             force=force)
+
+def run_participation(config, force):
+    """Training and game participation JSON"""
+    import process_all_data
+
+    outputs = [path for path in (config['participation_json'], config['availability_json']) if path]
+    outputs += shard_outputs(config, 'participation')
+    run_step(config['manifest'], 'player_participation', process_all_data.process_player_participation,
+             inputs=code_inputs(process_all_data.__file__) + [config['store'] or config['player_csv']], outputs=outputs,
+             params={'csv_path': config['player_csv'], 'output_path': config['participation_json'],
+                     'anonymize': True, 'compact': config['compact'], 'shard_dir': config['shard_dir'],
+                     'cache_dir': config['cache_dir'], 'chunksize': config['chunksize'],
+                     'availability_path': config['availability_json'], 'store_path': config['store']},
+             force=force)
+
+def run_historical(config, force):
+    """Historical player counts JSON from the Excel file"""
+    import process_excel_data
+
+    run_step(config['manifest'], 'historical_players', process_excel_data.process_excel_to_json,
+             inputs=code_inputs(process_excel_data.__file__) + [config['excel']], outputs=[config['historical_json']],
+             params={'excel_path': config['excel'], 'output_path': config['historical_json'],
+                     'compact': config['compact'], 'cache_dir': config['cache_dir']},
+             force=force)
+
+def run_colors(config, force):
+    """Club colors JSON from the logo"""
+    import extract_colors
+
+    run_step(config['manifest'], 'colors', extract_colors.extract_colors_to_json,
+             inputs=code_inputs(extract_colors.__file__) + [config['logo']], outputs=[config['colors_json']],
+             params={'image_path': config['logo'], 'output_path': config['colors_json'], 'num_colors': 8},
+             force=force)
+
+def run_assets(config, force):
+    """Responsive variants of the logo and QR codes"""
+    import image_assets
+
+    sources = {name: config[key] for name, key in
+               (('logo', 'logo'), ('qr_code', 'qr_code'), ('qr_code_printable', 'qr_printable'))
+               if config[key] and os.path.exists(config[key])}
+    # Unchanged sources are not re-encoded even when the step runs
+    run_step(config['manifest'], 'image_assets', image_assets.build_image_assets,
+             inputs=code_inputs(image_assets.__file__) + list(sources.values()), outputs=[config['images_json']],
+             params={'sources': sources, 'output_dir': config['images_dir']}, force=force)
+
+# name: (input config keys, output config keys, function)
+STAGES = {
+    'matches': (['html', 'pages'], ['games_csv'], run_matches),
+    'games': (['games_csv', 'store'], ['games_json'], run_games),
+    'participation': (['player_csv', 'store'], ['participation_json', 'availability_json'], run_participation),
+    'historical': (['excel'], ['historical_json'], run_historical),
+    'colors': (['logo'], ['colors_json'], run_colors),
+    'assets': (['logo', 'qr_code', 'qr_printable'], ['images_json'], run_assets),
+}
+
+def stage_dependencies(stages):
+    """{stage: set of stages producing one of its inputs}"""
+    producers = {output: name for name in stages for output in STAGES[name][1]}
+    return {
+        name: {producers[key] for key in STAGES[name][0] if key in producers and producers[key] != name}
+        for name in stages
+    }
+
+def affected_stages(changed_keys):
+    """Stages reading one of the changed config keys, plus every stage downstream of them"""
+    dependencies = stage_dependencies(STAGES)
+    affected = {name for name, (inputs, _, _) in STAGES.items() if set(inputs) & set(changed_keys)}
+    while True:
+        downstream = {name for name, deps in dependencies.items() if deps & affected} - affected
+        if not downstream:
+            return [name for name in STAGES if name in affected]
+        affected |= downstream
+
+def _run_stage(task, name, config, force, profile=None):
+    """Worker: run one stage in a fresh process; returns wall time, peak RSS and its spans"""
+    start = time.perf_counter()
+    with span(task):
+        if profile:
+            stem = f"build-{task.replace('/', '-')}-{datetime.now():%Y%m%d-%H%M%S}"
+            with profiled(profile, os.path.join(METRICS_DIR, stem)):
+                STAGES[name][2](config, force)
+        else:
+            STAGES[name][2](config, force)
+    seconds = time.perf_counter() - start
+    return seconds, peak_rss_mb(), collected()
+
+def build(config, stages=None, force=False, profile=None):
+    """Run the selected stages (default: all) in dependency order, independent ones in parallel"""
+    return build_clubs({None: config}, stages=stages, force=force, profile=profile)
+
+def build_clubs(configs, stages=None, force=False, profile=None):
+    """
+    Run the selected stages of every {club: config} in one process pool
+
+    Tasks are named "<club>/<stage>" (just "<stage>" for the club None);
+    a stage waits only for the stages of its own club.
+    """
+    tasks = {}
+    dependencies = {}
+    for club, config in configs.items():
+        os.makedirs(config['output_dir'], exist_ok=True)
+        os.makedirs(os.path.dirname(config['manifest']), exist_ok=True)
+        prefix = f"{club}/" if club else ''
+        selected = [name for name in (stages or STAGES) if name != 'matches' or config['html'] or config['pages']]
+        for name, deps in stage_dependencies(selected).items():
+            tasks[prefix + name] = (name, config)
+            dependencies[prefix + name] = {prefix + dep for dep in deps}
+    workers = next((config['workers'] for config in configs.values() if config['workers']), None)
+    summary = {}
+
+    start = time.perf_counter()
+    pending = set(tasks)
+    running = {}
+    # Each stage gets its own process so peak RSS is measured per stage
+    with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=1) as executor:
+        while pending or running:
+            for task in sorted(pending):
+                blocked = dependencies[task] & (pending | set(running.values()))
+                failed = [dep for dep in dependencies[task] if summary.get(dep, {}).get('status') != 'ok']
+                if failed and not blocked:
+                    summary[task] = {'status': f"skipped ({', '.join(failed)} failed)"}
+                    pending.discard(task)
+                elif not blocked:
+                    name, config = tasks[task]
+                    running[executor.submit(_run_stage, task, name, config, force, profile)] = task
+                    pending.discard(task)
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                task = running.pop(future)
+                try:
+                    seconds, peak_mb, spans = future.result()
+                    summary[task] = {'status': 'ok', 'seconds': seconds, 'peak_mb': peak_mb}
+                    record(spans)
+                except Exception as e:
+                    print(f"⚠ Stage {task} failed: {e}")
+                    summary[task] = {'status': 'failed', 'error': str(e)}
+
+    total = time.perf_counter() - start
+    print_summary(summary, total)
+    if len(configs) > 1:
+        print_club_summary(summary, configs)
+    return summary
+
+def print_summary(summary, total):
+    """Per-stage wall-clock and peak memory"""
+    width = max([15] + [len(task) for task in summary])
+    print("\n=== Build Summary ===")
+    print(f"{'Stage':<{width}} {'Status':<10} {'Wall':>9} {'Peak RSS':>10}")
+    for task, result in summary.items():
+        if result['status'] == 'ok':
+            peak = f"{result['peak_mb']:>7.0f} MB" if result['peak_mb'] is not None else ''
+            print(f"{task:<{width}} {'ok':<10} {result['seconds']:>8.2f}s {peak}")
+        else:
+            print(f"{task:<{width}} {result['status']}")
+    print(f"{'total':<{width}} {'':<10} {total:>8.2f}s")
+
+def print_club_summary(summary, configs):
+    """Stages ok per club, their summed wall-clock and the club's output directory"""
+    print("\n=== Clubs ===")
+    width = max(len(club) for club in configs)
+    for club, config in configs.items():
+        results = [result for task, result in summary.items() if task.split('/', 1)[0] == club]
+        ok = [result for result in results if result['status'] == 'ok']
+        seconds = sum(result['seconds'] for result in ok)
+        print(f"{club:<{width}} {len(ok)}/{len(results)} ok {seconds:>8.2f}s  -> {config['output_dir']}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build all website data')
+    parser.add_argument('--config', help='JSON file overriding DEFAULT_CONFIG')
+    parser.add_argument('--clubs', help='clubs JSON file: build every club (see load_clubs)')
+    parser.add_argument('--only', nargs='+', choices=list(STAGES), help='run only these stages')
+    parser.add_argument('--force', action='store_true', help='rerun stages even if inputs are unchanged')
+    parser.add_argument('--profile', nargs='?', const='cprofile', choices=PROFILERS,
+                        help='profile every stage (cprofile or pyinstrument) into data/metrics/')
+    args = parser.parse_args()
+
+    # Spans of all stages end up in one metrics file per build
+    with session('build'):
+        if args.clubs:
+            summary = build_clubs(load_clubs(args.clubs), stages=args.only, force=args.force, profile=args.profile)
+        else:
+            summary = build(load_config(args.config), stages=args.only, force=args.force, profile=args.profile)
+    sys.exit(0 if all(result['status'] == 'ok' for result in summary.values()) else 1)
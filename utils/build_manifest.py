@@ -0,0 +1,118 @@
+"""
+Build manifest for incremental rebuilds of the website data
+
+Each processing step records the content hash of its inputs and the
+parameters it ran with. A step is skipped on the next run when nothing
+changed and its outputs still exist, so unchanged JSON files keep their
+content and modification time. A step's code counts as an input: its
+script and every local module it imports (see code_inputs).
+"""
+import ast
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: steps are not run concurrently there
+    fcntl = None
+
+def file_hash(path, chunk_size=1 << 20):
+    """Return the SHA-256 hex digest of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def code_inputs(path):
+    """
+    path and every module next to it that it imports, directly or indirectly
+
+    Editing a helper module (e.g. match_results.py) changes the output of
+    every step whose script imports it, so those files are step inputs too.
+    Imports inside functions count as well.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    found = set()
+    pending = [os.path.abspath(path)]
+    while pending:
+        current = pending.pop()
+        if current in found:
+            continue
+        found.add(current)
+        with open(current, 'r', encoding='utf-8') as f:
+            tree = ast.parse(f.read(), current)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                module_path = os.path.join(directory, name.split('.')[0] + '.py')
+                if os.path.exists(module_path):
+                    pending.append(module_path)
+    return sorted(found)
+
+def load_manifest(manifest_path):
+    """Load the manifest, or an empty one if it does not exist yet"""
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_manifest(manifest, manifest_path):
+    """Write the manifest next to the raw data"""
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+@contextmanager
+def locked(manifest_path):
+    """Hold an exclusive lock while a step updates the shared manifest"""
+    if fcntl is None:
+        yield
+        return
+    with open(manifest_path + '.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+def step_fingerprint(inputs, params=None):
+    """Fingerprint of a step: input content hashes plus its parameters"""
+    return {
+        'inputs': {str(path): file_hash(path) for path in inputs},
+        'params': params or {}
+    }
+
+def run_step(manifest_path, step, func, inputs, outputs, params=None, force=False):
+    """
+    Run func(**params) unless the step's inputs and parameters are unchanged
+
+    Returns the result of func, or None when the step was skipped.
+    """
+    params = params or {}
+    manifest = load_manifest(manifest_path)
+    fingerprint = step_fingerprint(inputs, params)
+
+    previous = manifest.get(step)
+    outputs_exist = all(os.path.exists(path) for path in outputs)
+    if not force and outputs_exist and previous is not None and \
+            previous.get('inputs') == fingerprint['inputs'] and \
+            previous.get('params') == fingerprint['params']:
+        print(f"\n=== Skipping {step}: inputs unchanged ===")
+        return None
+
+    result = func(**params)
+
+    # Reload in case another step updated the manifest meanwhile
+    with locked(manifest_path):
+        manifest = load_manifest(manifest_path)
+        manifest[step] = {**fingerprint, 'outputs': [str(path) for path in outputs]}
+        save_manifest(manifest, manifest_path)
+    return result
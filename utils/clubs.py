@@ -0,0 +1,103 @@
+"""
+Club identity and team rules, compiled once per club
+
+A club is described by a plain dict (JSON friendly, so it can live in a
+build config and in the build manifest):
+
+    {
+        "name": "TSV Marquartstein",
+        "names": ["Marquartstein"],                 # how the club appears in team names
+        "second_team": {
+            "teams": ["Marquartstein II"],          # team names of the second team
+            "competitions": ["C Klasse", "C-Klasse"]
+        }
+    }
+
+Club compiles these rules into one regular expression per rule, and
+column matches are evaluated once per distinct value (categoricals), not
+once per row.
+"""
+import json
+import re
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CLUB = {
+    'name': 'TSV Marquartstein',
+    'names': ['Marquartstein'],
+    'second_team': {
+        'teams': ['Marquartstein II'],
+        'competitions': ['C Klasse', 'C-Klasse'],
+    },
+}
+
+def _pattern(needles, ignore_case=False):
+    """One compiled alternation of literal needles (never matches if there are none)"""
+    if not needles:
+        return re.compile(r'(?!)')
+    return re.compile('|'.join(re.escape(needle) for needle in needles), re.IGNORECASE if ignore_case else 0)
+
+def column_matches(series, pattern):
+    """Boolean array: pattern found in each value (missing values never match)"""
+    values = series if isinstance(series.dtype, pd.CategoricalDtype) else series.astype('category')
+    hits = np.array([pattern.search(str(value)) is not None for value in values.cat.categories], dtype=bool)
+    # Code -1 (missing) picks the appended False
+    return np.append(hits, False)[values.cat.codes.to_numpy()]
+
+def _like_escape(needle):
+    return needle.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+class Club:
+    """Precompiled matchers for one club"""
+
+    def __init__(self, config=None):
+        config = config or DEFAULT_CLUB
+        second_team = config.get('second_team', {})
+        self.config = config
+        self.name = config['name']
+        self.names = list(config.get('names') or [config['name']])
+        self.second_team_teams = list(second_team.get('teams', []))
+        self.second_team_competitions = list(second_team.get('competitions', []))
+
+        # Team names are matched as written, the second team rules ignore case
+        self.team_pattern = _pattern(self.names)
+        self.second_team_pattern = _pattern(self.second_team_teams, ignore_case=True)
+        self.competition_pattern = _pattern(self.second_team_competitions, ignore_case=True)
+
+    @property
+    def slug(self):
+        """File system friendly name, e.g. 'tsv-marquartstein'"""
+        return re.sub(r'[^a-z0-9]+', '-', self.name.lower()).strip('-')
+
+    def is_club_team(self, team_name):
+        """True if a team name belongs to the club"""
+        return self.team_pattern.search(team_name) is not None
+
+    def second_team_mask(self, df):
+        """Boolean array marking second team games of a games table"""
+        return (column_matches(df['competition'], self.competition_pattern)
+                | column_matches(df['home_team'], self.second_team_pattern)
+                | column_matches(df['away_team'], self.second_team_pattern))
+
+    def second_team_sql(self):
+        """(condition, parameters) marking second team games in SQL (LIKE ignores ASCII case)"""
+        conditions, params = [], []
+        for columns, needles in (('competition', self.second_team_competitions),
+                                 ('home_team away_team', self.second_team_teams)):
+            for needle in needles:
+                for column in columns.split():
+                    conditions.append(f"coalesce({column}, '') LIKE ? ESCAPE '\\'")
+                    params.append(f"%{_like_escape(needle)}%")
+        return f"({' OR '.join(conditions) or '0'})", params
+
+@lru_cache(maxsize=None)
+def _compiled(config_json):
+    return Club(json.loads(config_json))
+
+def resolve_club(club=None):
+    """Club for None (DEFAULT_CLUB), a club config dict or a Club; dicts are compiled once per process"""
+    if isinstance(club, Club):
+        return club
+    return _compiled(json.dumps(club or DEFAULT_CLUB, sort_keys=True))
@@ -0,0 +1,129 @@
+"""
+Normalized Parquet cache between the raw CSV/Excel inputs and the JSON stage
+
+Each raw input is parsed once (dates extracted and converted, text columns
+stored as categoricals) and written to <cache_dir>/<name>-<hash>.parquet,
+where <hash> is the SHA-256 of the raw file. A changed raw file gets a new
+cache entry and the stale one is removed. Without pyarrow the loaders
+simply parse the raw file every time.
+"""
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+
+from build_manifest import file_hash
+from excel_ingest import read_historical_sheet
+from instrumentation import instrumented, span
+
+try:
+    import pyarrow  # noqa: F401 (Parquet engine)
+except ImportError:
+    pyarrow = None
+
+# Bump when the normalization below changes, so old cache files are not reused
+CACHE_VERSION = 3
+
+GAMES_CATEGORICALS = ['competition', 'home_team', 'away_team', 'opponent']
+PLAYERLIST_CATEGORICALS = ['event_type', 'team_name', 'user_name', 'user_participation']
+
+# A player has one registration per event; repeated rows update it (like match_store's upsert)
+REGISTRATION_KEY = ['event_id', 'user_id']
+
+@instrumented()
+def read_games_csv(csv_path):
+    """Read the games CSV and parse its dates (format: "So. 27.07.2025 18:00")"""
+    df = pd.read_csv(csv_path)
+
+    # Extract just the date portion after the day abbreviation
+    df['date'] = df['date'].str.extract(r'(\d{2}\.\d{2}\.\d{4})')[0]
+    df['date'] = pd.to_datetime(df['date'], format='%d.%m.%Y')
+
+    for column in GAMES_CATEGORICALS:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+    return df
+
+def dedupe_registrations(df):
+    """
+    One row per (event_id, user_id): the values of the last repeat at the position of the first
+
+    This is what upserting the rows into match_store gives, so the CSV,
+    chunked and store paths count the same registrations. Rows without an
+    event or user id are kept as they are.
+    """
+    keyed = df[REGISTRATION_KEY].notna().all(axis=1).to_numpy()
+    repeated = df.duplicated(REGISTRATION_KEY, keep='last').to_numpy() & keyed
+    if not repeated.any():
+        return df
+
+    # Position of the first row of each key (unkeyed rows: their own)
+    positions = pd.Series(np.arange(len(df)), index=df.index)
+    first = positions.groupby([df[column] for column in REGISTRATION_KEY], sort=False,
+                              dropna=False).transform('min').to_numpy()
+    anchor = np.where(keyed, first, positions.to_numpy())
+    rows = np.flatnonzero(~repeated)
+    return df.iloc[rows[np.argsort(anchor[rows], kind='stable')]].reset_index(drop=True)
+
+@instrumented()
+def read_playerlist_csv(csv_path):
+    """Read the semicolon separated playerlist and parse its dates (format: "17-11-2025")"""
+    df = dedupe_registrations(pd.read_csv(csv_path, sep=';'))
+    df['event_date_start'] = pd.to_datetime(df['event_date_start'], format='%d-%m-%Y', errors='coerce')
+
+    for column in PLAYERLIST_CATEGORICALS:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+    return df
+
+@instrumented()
+def read_excel_sheet(excel_path):
+    """Read and clean the first sheet of the historical Excel file"""
+    return read_historical_sheet(excel_path)
+
+def cache_path(raw_path, cache_dir):
+    """Cache file for the current content of raw_path"""
+    stem = os.path.splitext(os.path.basename(raw_path))[0]
+    digest = file_hash(raw_path)[:16]
+    return os.path.join(cache_dir, f"{stem}-v{CACHE_VERSION}-{digest}.parquet")
+
+def load_cached(raw_path, reader, cache_dir=None):
+    """Return reader(raw_path), served from the Parquet cache when it is still valid"""
+    if cache_dir is None or pyarrow is None:
+        return reader(raw_path)
+
+    path = cache_path(raw_path, cache_dir)
+    if os.path.exists(path):
+        with span('read_parquet_cache') as s:
+            df = pd.read_parquet(path)
+            s.count('rows', len(df))
+        return df
+
+    df = reader(raw_path)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(raw_path))[0]
+    for stale in glob.glob(os.path.join(cache_dir, f"{stem}-v*.parquet")):
+        os.remove(stale)
+
+    try:
+        df.to_parquet(path, index=False)
+    except (ValueError, TypeError, pyarrow.ArrowException) as e:
+        # e.g. a spreadsheet column mixing numbers and text
+        print(f"⚠ Could not cache {os.path.basename(raw_path)}: {e}")
+        if os.path.exists(path):
+            os.remove(path)
+    return df
+
+def load_games(csv_path, cache_dir=None):
+    """Normalized games table"""
+    return load_cached(csv_path, read_games_csv, cache_dir)
+
+def load_playerlist(csv_path, cache_dir=None):
+    """Normalized training/game registrations"""
+    return load_cached(csv_path, read_playerlist_csv, cache_dir)
+
+def load_excel(excel_path, cache_dir=None):
+    """Historical player counts from the Excel file"""
+    return load_cached(excel_path, read_excel_sheet, cache_dir)
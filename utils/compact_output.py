@@ -0,0 +1,163 @@
+"""
+Compact, column-oriented and precompressed variants of the website data files
+
+Lists of records are stored column by column under a "$columnar" key. A
+column that is identical to another array in the same document is stored
+as a reference instead of repeating its values: "@" and the JSON pointer
+(RFC 6901) of the array, e.g. "@/games/dates", so keys may contain dots.
+DataLoader.loadJSON expands both back into the regular layout.
+"""
+import glob
+import gzip
+import os
+import sys
+
+from instrumentation import instrumented
+from json_output import dumps, validate, write_atomic
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COLUMNAR_KEY = '$columnar'
+
+def _is_record_list(value):
+    """True for a non-empty list of dicts (a table stored row by row)"""
+    return isinstance(value, list) and len(value) > 0 and all(isinstance(item, dict) for item in value)
+
+def _array_key(values):
+    """Hashable key for comparing arrays by content"""
+    return dumps(values, pretty=False)
+
+def _pointer_token(key):
+    """Escape one key for a JSON pointer ('~' -> '~0', '/' -> '~1')"""
+    return str(key).replace('~', '~0').replace('/', '~1')
+
+def _plain_arrays(data, prefix=''):
+    """Yield (JSON pointer, list) for every plain array in a nested dict"""
+    for key, value in data.items():
+        path = f"{prefix}/{_pointer_token(key)}"
+        if isinstance(value, dict):
+            yield from _plain_arrays(value, path)
+        elif isinstance(value, list) and not _is_record_list(value):
+            yield path, value
+
+def to_columnar(records, references=None):
+    """Convert a list of records to {column: values}, replacing known arrays by references"""
+    references = references or {}
+    columns = {}
+    for record in records:
+        for key in record:
+            columns.setdefault(key, None)
+
+    for key in columns:
+        values = [record.get(key) for record in records]
+        columns[key] = references.get(_array_key(values), values)
+    return {COLUMNAR_KEY: columns}
+
+def compact_payload(data):
+    """Return a copy of data with every record list stored column by column"""
+    references = {}
+    for path, values in _plain_arrays(data):
+        references.setdefault(_array_key(values), f"@{path}")
+
+    def convert(value):
+        if _is_record_list(value):
+            return to_columnar(value, references)
+        if isinstance(value, dict):
+            return {key: convert(item) for key, item in value.items()}
+        return value
+
+    return convert(data)
+
+def expand_columnar(data):
+    """Inverse of compact_payload (what DataLoader.loadJSON does in the browser)"""
+    def resolve(reference):
+        value = data
+        for token in reference[1:].split('/')[1:]:
+            value = value[token.replace('~1', '/').replace('~0', '~')]
+        return value
+
+    def expand(value):
+        if isinstance(value, dict):
+            if COLUMNAR_KEY in value:
+                columns = {
+                    key: resolve(values) if isinstance(values, str) else values
+                    for key, values in value[COLUMNAR_KEY].items()
+                }
+                length = len(next(iter(columns.values()), []))
+                return [{key: values[i] for key, values in columns.items()} for i in range(length)]
+            return {key: expand(item) for key, item in value.items()}
+        return value
+
+    return expand(data)
+
+@instrumented()
+def write_compact_json(data, output_path, precompressed=True, schema=None):
+    """
+    Write data in the columnar layout with minified separators (plus .gz/.br siblings)
+
+    schema (see output_schemas.py) is checked against data before compaction.
+    """
+    if schema is not None:
+        validate(data, schema, os.path.basename(output_path))
+    encoded = dumps(compact_payload(data), pretty=False)
+    write_atomic(output_path, encoded)
+
+    pretty_size = len(dumps(data))
+    saved = 100 - len(encoded) / pretty_size * 100 if pretty_size else 0
+    print(f"Compact JSON: {len(encoded):,} bytes (pretty: {pretty_size:,} bytes, -{saved:.1f}%)")
+
+    sizes = {'raw': len(encoded)}
+    if precompressed:
+        sizes = precompress(output_path)
+        print(', '.join(f"{key}: {size:,} bytes" for key, size in sizes.items() if key != 'raw'))
+    return sizes
+
+@instrumented()
+def precompress(path):
+    """Write .gz (and .br, if brotli is installed) siblings of a file; returns sizes"""
+    with open(path, 'rb') as f:
+        raw = f.read()
+
+    sizes = {'raw': len(raw)}
+
+    # mtime=0 keeps the .gz byte-identical between runs
+    gz = gzip.compress(raw, compresslevel=9, mtime=0)
+    write_atomic(path + '.gz', gz)
+    sizes['gz'] = len(gz)
+
+    if brotli is not None:
+        br = brotli.compress(raw, quality=11)
+        write_atomic(path + '.br', br)
+        sizes['br'] = len(br)
+
+    return sizes
+
+def precompress_dir(data_dir):
+    """Precompress every JSON file in data_dir and report the byte savings"""
+    print("\n=== Precompressing Data Files ===")
+    if brotli is None:
+        print("⚠ brotli not installed, writing .gz only")
+
+    totals = {}
+    for path in sorted(glob.glob(os.path.join(data_dir, '*.json'))):
+        sizes = precompress(path)
+        for key, size in sizes.items():
+            totals[key] = totals.get(key, 0) + size
+
+        report = ', '.join(
+            f"{key} {size:,} bytes (-{100 - size / sizes['raw'] * 100:.1f}%)"
+            for key, size in sizes.items() if key != 'raw'
+        )
+        print(f"{os.path.basename(path)}: {sizes['raw']:,} bytes -> {report}")
+
+    if totals:
+        report = ', '.join(f"{key} {size:,}" for key, size in totals.items() if key != 'raw')
+        print(f"Total: {totals['raw']:,} bytes -> {report}")
+    return totals
+
+if __name__ == '__main__':
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else '/home/shell/test_fb/docs/assets/data'
+    precompress_dir(data_dir)
@@ -0,0 +1,70 @@
+"""
+Level-of-detail variants of long chart series (Largest-Triangle-Three-Buckets)
+
+LTTB keeps the first and last point and, per bucket in between, the point
+spanning the largest triangle with the previously kept point and the
+average of the next bucket, so peaks and dips survive the reduction. A
+variant is stored as indices into the full arrays, shared by every line
+of a chart (the union of each line's selection), so labels and datasets
+stay aligned and the full resolution remains in the file for zoomed views.
+"""
+import numpy as np
+
+from instrumentation import instrumented
+
+# Target point counts of the variants (only those smaller than the series)
+LOD_TARGETS = (100, 300)
+
+def lttb_indices(x, y, target):
+    """Indices of the `target` points LTTB keeps from (x, y); all indices if the series is shorter"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.nan_to_num(np.asarray(y, dtype=np.float64))
+    n = len(x)
+    if target >= n or target < 3:
+        return np.arange(n)
+
+    # Bucket boundaries for the n - 2 inner points
+    edges = np.linspace(1, n - 1, target - 1).astype(np.int64)
+    # Average of every bucket, the last "next bucket" is the final point
+    sums_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1)
+    sizes = np.diff(edges)
+    avg_x = np.append(sums_x / sizes, x[-1])
+    avg_y = np.append(sums_y / sizes, y[-1])
+
+    selected = np.empty(target, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(target - 2):
+        start, stop = edges[bucket], edges[bucket + 1]
+        # Twice the triangle area, vectorized over the bucket
+        areas = np.abs((x[previous] - avg_x[bucket + 1]) * (y[start:stop] - y[previous])
+                       - (x[previous] - x[start:stop]) * (avg_y[bucket + 1] - y[previous]))
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return selected
+
+@instrumented()
+def level_of_detail(x, series, targets=LOD_TARGETS):
+    """
+    {str(target): indices} for the targets smaller than the series
+
+    x: positions (e.g. dates), series: list of y arrays drawn together. Each
+    series gets an equal share of the target and a variant holds the union
+    of their LTTB picks, so it never exceeds the target.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    if np.isnan(x).any():
+        # Missing dates: fall back to evenly spaced points
+        x = np.arange(len(x), dtype=np.float64)
+    variants = {}
+    for target in targets:
+        if target < len(x):
+            share = max(3, target // len(series))
+            picked = np.unique(np.concatenate([lttb_indices(x, y, share) for y in series]))
+            variants[str(target)] = picked.tolist()
+    return variants
+
+def day_numbers(dates):
+    """Days since the epoch of a datetime Series (NaT becomes NaN) as x positions"""
+    return (dates - np.datetime64('1970-01-01')).dt.days.to_numpy(dtype=np.float64)
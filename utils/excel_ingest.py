@@ -0,0 +1,114 @@
+"""
+Streaming ingestion of the historical player count workbook
+
+The sheet is read with openpyxl in read-only mode (rows are streamed and
+other sheets are never parsed), then cleaned into a typed table: columns
+without a header ("Unnamed: 6" in pandas) or without any value are
+dropped, numeric columns become the smallest nullable integer type that
+fits (float only if there are fractions), text stays text, and rows are
+sorted chronologically by season ("25/26").
+"""
+import re
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+SEASON_COLUMN = 'Saison'
+SEASON_PATTERN = re.compile(r'^\s*(\d{2}|\d{4})\s*/\s*(\d{2}|\d{4})\s*$')
+
+INT_TYPES = ['Int8', 'Int16', 'Int32', 'Int64']
+
+def read_sheet_rows(excel_path, sheet=0):
+    """Header and value rows of one sheet (index or name), streamed in read-only mode"""
+    workbook = load_workbook(excel_path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook.worksheets[sheet] if isinstance(sheet, int) else workbook[sheet]
+        rows = worksheet.iter_rows(values_only=True)
+        header = next(rows, ())
+        return list(header), [row for row in rows if any(_present(value) for value in row)]
+    finally:
+        workbook.close()
+
+def _present(value):
+    """True for a cell with content (not None and not just whitespace)"""
+    return value is not None and not (isinstance(value, str) and not value.strip())
+
+def season_start_year(label, pivot=None):
+    """Start year of a season label like '25/26' or '2025/2026' (None if unparseable)"""
+    match = SEASON_PATTERN.match(str(label)) if label is not None else None
+    if not match:
+        return None
+    year = int(match.group(1))
+    if year < 100:
+        # Two-digit years up to next year's are this century
+        pivot = (date.today().year + 1) % 100 if pivot is None else pivot
+        year += 2000 if year <= pivot else 1900
+    return year
+
+def _typed_column(values):
+    """Series of a column: nullable int, float or text"""
+    present = [value for value in values if _present(value)]
+    if present and all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in present):
+        numbers = np.array([value if _present(value) else np.nan for value in values], dtype=np.float64)
+        finite = numbers[~np.isnan(numbers)]
+        if np.all(finite == np.round(finite)):
+            low, high = finite.min(), finite.max()
+            dtype = next(t for t in INT_TYPES if np.iinfo(t.lower()).min <= low and high <= np.iinfo(t.lower()).max)
+            return pd.array([None if np.isnan(n) else int(n) for n in numbers], dtype=dtype)
+        return pd.array(numbers, dtype='Float64')
+    return pd.array([str(value).strip() if _present(value) else None for value in values], dtype='string')
+
+def unique_names(names):
+    """Column names with repeats renamed like pandas does: X, X.1, X.2, ... (skipping names in use)"""
+    taken = set(names)
+    first = set()
+    repeats = {}
+    unique = []
+    for name in names:
+        if name not in first:
+            first.add(name)
+            unique.append(name)
+            continue
+        candidate = name
+        while candidate in taken:
+            repeats[name] = repeats.get(name, 0) + 1
+            candidate = f"{name}.{repeats[name]}"
+        taken.add(candidate)
+        unique.append(candidate)
+    return unique
+
+def clean_table(header, rows):
+    """DataFrame of the named, non-empty columns with compact types, sorted by season"""
+    named = [(position, str(name).strip()) for position, name in enumerate(header) if _present(name)]
+    columns = {}
+    for (position, _), name in zip(named, unique_names([name for _, name in named])):
+        values = [row[position] if position < len(row) else None for row in rows]
+        if any(_present(value) for value in values):
+            columns[name] = _typed_column(values)
+
+    df = pd.DataFrame(columns)
+    if SEASON_COLUMN in df.columns:
+        start_years = df[SEASON_COLUMN].map(season_start_year, na_action='ignore').astype('Int64')
+        df = df.iloc[np.argsort(start_years.fillna(np.iinfo(np.int64).max).to_numpy(), kind='stable')]
+    return df.reset_index(drop=True)
+
+def read_historical_sheet(excel_path, sheet=0):
+    """Read and clean one sheet of the historical Excel file"""
+    header, rows = read_sheet_rows(excel_path, sheet)
+    return clean_table(header, rows)
+
+def column_type(series):
+    """Type name of a cleaned column for the JSON payload"""
+    if series.name == SEASON_COLUMN:
+        return 'season'
+    if pd.api.types.is_integer_dtype(series.dtype):
+        return 'int'
+    if pd.api.types.is_float_dtype(series.dtype):
+        return 'float'
+    return 'text'
+
+def column_values(series):
+    """JSON-ready list with None for missing values"""
+    return [None if pd.isna(value) else value for value in series.astype(object).tolist()]
@@ -2,53 +2,111 @@
 Extract dominant colors from the club logo for website theme
 """
 from PIL import Image
-import json
-from collections import Counter
+import numpy as np
+import sys
+
+from instrumentation import instrumented
+from json_output import write_json
+from output_schemas import COLORS
 
 def rgb_to_hex(rgb):
     """Convert RGB tuple to hex color code"""
     return '#{:02x}{:02x}{:02x}'.format(rgb[0], rgb[1], rgb[2])
 
-def extract_colors(image_path, num_colors=8):
-    """Extract dominant colors from an image"""
-    # Open image
-    img = Image.open(image_path)
-
-    # Convert to RGB (remove alpha if present)
-    img = img.convert('RGB')
-
-    # Resize for faster processing
-    img = img.resize((150, 150))
-
-    # Get all pixels
-    pixels = list(img.getdata())
-
-    # Count color frequency
-    color_counts = Counter(pixels)
-
-    # Get most common colors
-    most_common = color_counts.most_common(num_colors * 3)
+def srgb_to_lab(rgb):
+    """Convert an (n, 3) array of sRGB values (0-255) to CIELAB (D65)"""
+    c = rgb / 255.0
+    linear = np.where(c > 0.04045, ((c + 0.055) / 1.055) ** 2.4, c / 12.92)
+    xyz = linear @ np.array([
+        [0.4124564, 0.2126729, 0.0193339],
+        [0.3575761, 0.7151522, 0.1191920],
+        [0.1804375, 0.0721750, 0.9503041],
+    ])
+    xyz /= np.array([0.95047, 1.0, 1.08883])
+    f = np.where(xyz > 216 / 24389, np.cbrt(xyz), (24389 / 27 * xyz + 16) / 116)
+    return np.stack([
+        116 * f[:, 1] - 16,
+        500 * (f[:, 0] - f[:, 1]),
+        200 * (f[:, 1] - f[:, 2]),
+    ], axis=1)
+
+@instrumented()
+def load_pixels(image_path, min_alpha=128):
+    """Opaque pixels of an image as an (n, 3) uint8 array, at full resolution"""
+    rgba = np.asarray(Image.open(image_path).convert('RGBA'))
+    pixels = rgba[..., :3].reshape(-1, 3)
+    return pixels[rgba[..., 3].reshape(-1) >= min_alpha]
+
+@instrumented()
+def median_cut(lab, weights, num_boxes):
+    """
+    Weighted median cut in Lab space
+
+    Repeatedly splits the box with the largest weighted squared error at the
+    weighted median of its widest axis. Returns a list of index arrays.
+    """
+    def sse(index):
+        w = weights[index]
+        mean = np.average(lab[index], axis=0, weights=w)
+        return float((w[:, None] * (lab[index] - mean) ** 2).sum())
+
+    boxes = [np.arange(len(lab))]
+    errors = [sse(boxes[0])] if len(lab) else [0.0]
+    while len(boxes) < num_boxes:
+        target = int(np.argmax(errors))
+        index = boxes[target]
+        if len(index) < 2 or errors[target] == 0:
+            break
 
-    # Filter out very light colors (likely background) and very dark
+        values = lab[index]
+        w = weights[index]
+        mean = np.average(values, axis=0, weights=w)
+        axis = int(np.argmax(np.average((values - mean) ** 2, axis=0, weights=w)))
+
+        order = np.argsort(values[:, axis], kind='stable')
+        cumulative = np.cumsum(w[order])
+        split = int(np.searchsorted(cumulative, cumulative[-1] / 2))
+        split = min(max(split, 1), len(order) - 1)
+
+        left, right = index[order[:split]], index[order[split:]]
+        boxes[target:target + 1] = [left, right]
+        errors[target:target + 1] = [sse(left), sse(right)]
+
+    return boxes
+
+@instrumented()
+def extract_colors(image_path, num_colors=8, min_distance=20):
+    """Extract dominant colors from an image (quantized, at full resolution)"""
+    pixels = load_pixels(image_path)
+
+    # Skip near-white and near-black (likely background and outlines)
+    keep = ~(np.all(pixels > 240, axis=1) | np.all(pixels < 15, axis=1))
+    pixels = pixels[keep]
+
+    # Count unique colors once; the quantizer works on weighted colors
+    packed = (pixels[:, 0].astype(np.uint32) << 16) | (pixels[:, 1].astype(np.uint32) << 8) | pixels[:, 2]
+    unique, counts = np.unique(packed, return_counts=True)
+    colors = np.stack([(unique >> 16) & 255, (unique >> 8) & 255, unique & 255], axis=1).astype(np.float64)
+    lab = srgb_to_lab(colors)
+
+    # Quantize, then order the boxes by how many pixels they cover
+    palette = []
+    for index in median_cut(lab, counts.astype(np.float64), num_colors * 2):
+        if len(index) == 0:
+            continue
+        weight = counts[index]
+        rgb = np.average(colors[index], axis=0, weights=weight)
+        palette.append((tuple(int(round(v)) for v in rgb), int(weight.sum())))
+    palette.sort(key=lambda entry: entry[1], reverse=True)
+
+    # Add variety - skip colors perceptually too close (Lab distance) to a more common one
     filtered_colors = []
-    for color, count in most_common:
-        r, g, b = color
-        # Skip near-white and near-black
-        if not (r > 240 and g > 240 and b > 240) and not (r < 15 and g < 15 and b < 15):
-            # Calculate brightness
-            brightness = (r + g + b) / 3
-            # Add variety - skip colors too similar in brightness to existing
-            is_unique = True
-            for existing_color, _ in filtered_colors:
-                er, eg, eb = existing_color
-                existing_brightness = (er + eg + eb) / 3
-                if abs(brightness - existing_brightness) < 30:
-                    is_unique = False
-                    break
-
-            if is_unique:
-                filtered_colors.append((color, count))
-
+    chosen_lab = []
+    for color, count in palette:
+        color_lab = srgb_to_lab(np.array([color], dtype=np.float64))[0]
+        if all(np.linalg.norm(color_lab - other) >= min_distance for other in chosen_lab):
+            filtered_colors.append((color, count))
+            chosen_lab.append(color_lab)
         if len(filtered_colors) >= num_colors:
             break
 
@@ -63,12 +121,11 @@ def extract_colors(image_path, num_colors=8):
 
     return colors
 
-if __name__ == '__main__':
-    logo_path = '/home/shell/test_fb/data/logo.png'
-    output_path = '/home/shell/test_fb/docs/assets/data/colors.json'
-
+@instrumented()
+def extract_colors_to_json(image_path, output_path, num_colors=8):
+    """Extract the color scheme from the logo and save it as JSON"""
     print("Extracting colors from logo...")
-    colors = extract_colors(logo_path)
+    colors = extract_colors(image_path, num_colors=num_colors)
 
     print("\nExtracted Color Scheme:")
     print(f"Primary:   {colors['primary']}")
@@ -78,7 +135,23 @@ if __name__ == '__main__':
     print(f"\nAll colors: {colors['all_colors']}")
 
     # Save to JSON
-    with open(output_path, 'w') as f:
-        json.dump(colors, f, indent=2)
+    write_json(colors, output_path, schema=COLORS)
 
     print(f"\nColors saved to {output_path}")
+    return colors
+
+if __name__ == '__main__':
+    from build_manifest import code_inputs, run_step
+    from instrumentation import profile_option, session
+
+    logo_path = '/home/shell/test_fb/data/logo.png'
+    output_path = '/home/shell/test_fb/docs/assets/data/colors.json'
+    manifest_path = '/home/shell/test_fb/data/build_manifest.json'
+
+    with session('extract_colors', profile=profile_option()):
+        run_step(
+            manifest_path, 'colors', extract_colors_to_json,
+            inputs=code_inputs(__file__) + [logo_path], outputs=[output_path],
+            params={'image_path': logo_path, 'output_path': output_path, 'num_colors': 8},
+            force='--force' in sys.argv
+        )
@@ -2,86 +2,36 @@
 """Extract football match data from HTML and write to CSV"""
 
 from bs4 import BeautifulSoup
+from concurrent.futures import ProcessPoolExecutor
+import argparse
 import csv
+import glob
+import os
 import re
+import time
 
-# Read HTML from file
-with open("/home/shell/test_fb/site.html", "r", encoding="utf-8") as f:
-    html_content = f.read()
+from clubs import DEFAULT_CLUB, resolve_club
+from instrumentation import PROFILERS, instrumented, session, span
 
-soup = BeautifulSoup(html_content, 'html.parser')
-
-# Find the main table
-table = soup.find('table', class_='listtable')
-
-matches = []
-current_competition = ""
-
-# Process table rows
-rows = table.find('tbody').find_all('tr')
-
-for row in rows:
-    # Check if this is a competition header row
-    td_colspan = row.find('td', colspan='12')
-    if td_colspan:
-        # Extract competition info
-        spans = td_colspan.find_all('span', class_='lh-lg')
-        if len(spans) >= 2:
-            comp_line1 = spans[0].get_text(strip=True)
-            comp_line2 = spans[1].get_text(strip=True)
-            current_competition = f"{comp_line1} | {comp_line2}"
-        continue
-
-    # Check if this is a match data row
-    if not row.get('class'):
-        continue
-
-    row_classes = ' '.join(row.get('class', []))
-    if 'jlistTr' not in row_classes:
-        continue
-
-    # Extract match data
-    tds = row.find_all('td')
-    if len(tds) < 10:
-        continue
-
-    # Get date (column 4)
-    date_div = tds[3].find('div', class_='d-flex')
-    if date_div:
-        date_spans = date_div.find_all('span', class_='dfb-label')
-        if len(date_spans) >= 3:
-            date_text = f"{date_spans[0].text} {date_spans[1].text} {date_spans[2].text}"
-        else:
-            date_text = date_div.get_text(strip=True)
-    else:
-        date_text = ""
-
-    # Get home team (column 6)
-    home_span = tds[5].find('span', class_='dfb-label')
-    home_team = home_span.text.strip() if home_span else ""
-
-    # Get away team (column 8)
-    away_span = tds[7].find('span', class_='dfb-label')
-    away_team = away_span.text.strip() if away_span else ""
-
-    # Get result (column 9)
-    result_span = tds[8].find('span', class_='dfb-label')
-    result = result_span.text.strip() if result_span else ""
+FIELDNAMES = ["date", "competition", "home_team", "away_team", "opponent", "goals_for", "goals_against", "result"]
+BATCH_FIELDNAMES = FIELDNAMES + ["source"]
 
+def build_match(date_text, competition, home_team, away_team, result, club=None):
+    """Build a match dict from the row cells, or None if the match has no result"""
     # Skip if no result or if it's empty
     if not result or ':' not in result:
-        continue
+        return None
 
     # Parse the result
     match = re.match(r'(\d+)\s*:\s*(\d+)', result)
     if not match:
-        continue
+        return None
 
     home_goals = match.group(1)
     away_goals = match.group(2)
 
-    # Determine goals for and against from TSV Marquartstein perspective
-    is_home = "Marquartstein" in home_team
+    # Determine goals for and against from the club's perspective
+    is_home = resolve_club(club).is_club_team(home_team)
 
     if is_home:
         goals_for = home_goals
@@ -92,9 +42,9 @@ for row in rows:
         goals_against = home_goals
         opponent = home_team
 
-    match_data = {
+    return {
         "date": date_text,
-        "competition": current_competition,
+        "competition": competition,
         "home_team": home_team,
         "away_team": away_team,
         "opponent": opponent,
@@ -103,15 +53,306 @@ for row in rows:
         "result": result
     }
 
-    matches.append(match_data)
+@instrumented()
+def parse_matches(html_content, club=None):
+    """Parse all matches from the listtable of a DFB match page (BeautifulSoup)"""
+    club = resolve_club(club)
+    soup = BeautifulSoup(html_content, 'html.parser')
+
+    # Find the main table
+    table = soup.find('table', class_='listtable')
+
+    matches = []
+    current_competition = ""
+
+    # Process table rows
+    rows = table.find('tbody').find_all('tr')
+
+    for row in rows:
+        # Check if this is a competition header row
+        td_colspan = row.find('td', colspan='12')
+        if td_colspan:
+            # Extract competition info
+            spans = td_colspan.find_all('span', class_='lh-lg')
+            if len(spans) >= 2:
+                comp_line1 = spans[0].get_text(strip=True)
+                comp_line2 = spans[1].get_text(strip=True)
+                current_competition = f"{comp_line1} | {comp_line2}"
+            continue
+
+        # Check if this is a match data row
+        if not row.get('class'):
+            continue
+
+        row_classes = ' '.join(row.get('class', []))
+        if 'jlistTr' not in row_classes:
+            continue
+
+        # Extract match data
+        tds = row.find_all('td')
+        if len(tds) < 10:
+            continue
+
+        # Get date (column 4)
+        date_div = tds[3].find('div', class_='d-flex')
+        if date_div:
+            date_spans = date_div.find_all('span', class_='dfb-label')
+            if len(date_spans) >= 3:
+                date_text = f"{date_spans[0].text} {date_spans[1].text} {date_spans[2].text}"
+            else:
+                date_text = date_div.get_text(strip=True)
+        else:
+            date_text = ""
+
+        # Get home team (column 6)
+        home_span = tds[5].find('span', class_='dfb-label')
+        home_team = home_span.text.strip() if home_span else ""
+
+        # Get away team (column 8)
+        away_span = tds[7].find('span', class_='dfb-label')
+        away_team = away_span.text.strip() if away_span else ""
+
+        # Get result (column 9)
+        result_span = tds[8].find('span', class_='dfb-label')
+        result = result_span.text.strip() if result_span else ""
+
+        match_data = build_match(date_text, current_competition, home_team, away_team, result, club)
+        if match_data:
+            matches.append(match_data)
+
+    return matches
+
+def _has_class(element, class_name):
+    """Check an lxml element's class attribute like BeautifulSoup's class_ filter"""
+    return class_name in element.get('class', '').split()
+
+def _find(element, tag, class_name):
+    """First descendant with the given tag and class (lxml)"""
+    for child in element.iterdescendants(tag):
+        if _has_class(child, class_name):
+            return child
+    return None
+
+def _find_all(element, tag, class_name):
+    """All descendants with the given tag and class (lxml)"""
+    return [child for child in element.iterdescendants(tag) if _has_class(child, class_name)]
+
+def _text(element):
+    """Concatenated text of an lxml element, like BeautifulSoup's .text"""
+    return ''.join(element.itertext())
+
+def _stripped_text(element):
+    """Like BeautifulSoup's get_text(strip=True)"""
+    return ''.join(part.strip() for part in element.itertext() if part.strip())
 
-# Write to CSV
-with open("/home/shell/test_fb/matches.csv", "w", newline="", encoding="utf-8") as csvfile:
-    fieldnames = ["date", "competition", "home_team", "away_team", "opponent", "goals_for", "goals_against", "result"]
-    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+def iter_matches_streaming(html_path, club=None):
+    """
+    Stream matches from the listtable of a DFB match page
 
-    writer.writeheader()
-    for match in matches:
-        writer.writerow(match)
+    Uses lxml's incremental HTML parser and clears every row once it has
+    been read, so memory stays flat regardless of page size. Yields the
+    same match dicts as parse_matches.
+    """
+    from lxml import etree
+
+    club = resolve_club(club)
+    current_competition = ""
+    in_table = False      # inside the first table.listtable
+    in_tbody = False      # inside that table's first tbody
+    table_done = False
+    tbody_seen = False
+    row_depth = 0         # nesting depth of open rows inside the tbody
+
+    events = etree.iterparse(html_path, events=('start', 'end'), html=True, encoding='utf-8')
+    for event, element in events:
+        tag = element.tag
+
+        if event == 'start':
+            if tag == 'table' and not in_table and not table_done and _has_class(element, 'listtable'):
+                in_table = True
+            elif tag == 'tbody' and in_table and not tbody_seen:
+                in_tbody = True
+                tbody_seen = True
+            elif tag == 'tr' and in_tbody:
+                row_depth += 1
+            continue
+
+        if in_tbody and tag == 'tr':
+            row_depth -= 1
+            match_data, current_competition = _parse_streamed_row(element, current_competition, club)
+            if match_data:
+                yield match_data
+            if row_depth == 0:
+                # Free the finished row and everything before it
+                element.clear(keep_tail=True)
+                parent = element.getparent()
+                while parent is not None and element.getprevious() is not None:
+                    del parent[0]
+            continue
+
+        if in_tbody and tag == 'tbody':
+            in_tbody = False
+        elif in_table and tag == 'table' and _has_class(element, 'listtable') and row_depth == 0:
+            in_table = False
+            table_done = True
+
+        if row_depth == 0 and not in_tbody:
+            # Nothing outside the match rows is needed once it has been parsed
+            element.clear(keep_tail=True)
+
+def _parse_streamed_row(row, current_competition, club):
+    """Parse one finished <tr> element; returns (match or None, competition)"""
+    # Check if this is a competition header row
+    td_colspan = next((td for td in row.iterdescendants('td') if td.get('colspan') == '12'), None)
+    if td_colspan is not None:
+        spans = _find_all(td_colspan, 'span', 'lh-lg')
+        if len(spans) >= 2:
+            current_competition = f"{_stripped_text(spans[0])} | {_stripped_text(spans[1])}"
+        return None, current_competition
+
+    # Check if this is a match data row
+    if 'jlistTr' not in ' '.join(row.get('class', '').split()):
+        return None, current_competition
+
+    tds = list(row.iterdescendants('td'))
+    if len(tds) < 10:
+        return None, current_competition
+
+    # Get date (column 4)
+    date_div = _find(tds[3], 'div', 'd-flex')
+    if date_div is not None:
+        date_spans = _find_all(date_div, 'span', 'dfb-label')
+        if len(date_spans) >= 3:
+            date_text = f"{_text(date_spans[0])} {_text(date_spans[1])} {_text(date_spans[2])}"
+        else:
+            date_text = _stripped_text(date_div)
+    else:
+        date_text = ""
+
+    # Get home team, away team and result (columns 6, 8, 9)
+    home_span = _find(tds[5], 'span', 'dfb-label')
+    home_team = _text(home_span).strip() if home_span is not None else ""
+    away_span = _find(tds[7], 'span', 'dfb-label')
+    away_team = _text(away_span).strip() if away_span is not None else ""
+    result_span = _find(tds[8], 'span', 'dfb-label')
+    result = _text(result_span).strip() if result_span is not None else ""
+
+    return build_match(date_text, current_competition, home_team, away_team, result, club), current_competition
+
+@instrumented()
+def extract_matches(html_path, streaming=False, club=None):
+    """Extract all matches from one saved DFB match page (club: config dict, see clubs.py)"""
+    if streaming:
+        return list(iter_matches_streaming(html_path, club))
+
+    # Read HTML from file
+    with open(html_path, "r", encoding="utf-8") as f:
+        html_content = f.read()
+    return parse_matches(html_content, club)
+
+def write_matches_csv(matches, output_path, fieldnames=FIELDNAMES):
+    """Write match dicts (any iterable) to CSV; returns the number of rows"""
+    count = 0
+    with span('write_matches_csv') as s, open(output_path, "w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+
+        writer.writeheader()
+        for match in matches:
+            writer.writerow(match)
+            count += 1
+        s.count('rows', count)
+
+    return count
+
+def find_html_files(path_or_pattern):
+    """Resolve a directory (all *.html inside) or a glob pattern to a sorted file list"""
+    if os.path.isdir(path_or_pattern):
+        path_or_pattern = os.path.join(path_or_pattern, '*.html')
+    return sorted(glob.glob(path_or_pattern))
+
+def merge_matches(pages):
+    """
+    Merge (source, matches) pairs into one list with a `source` column
+
+    Matches appearing on several pages (same date, teams and result) are
+    kept once, attributed to the first page. Returns (merged, number of
+    new matches per page).
+    """
+    merged = []
+    added = []
+    seen = set()
+    for source, matches in pages:
+        new = 0
+        for match in matches:
+            key = (match['date'], match['home_team'], match['away_team'], match['result'])
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append({**match, 'source': source})
+            new += 1
+        added.append(new)
+    return merged, added
+
+def _extract_timed(html_path, streaming, club):
+    """Worker: extract one file and measure how long it took"""
+    start = time.perf_counter()
+    matches = extract_matches(html_path, streaming=streaming, club=club)
+    return html_path, matches, time.perf_counter() - start
+
+@instrumented()
+def extract_matches_batch(path_or_pattern, output_path, workers=None, streaming=False, club=None):
+    """
+    Extract matches from many saved pages in parallel and merge them into one CSV
+
+    Each row gets a `source` column with the page's file name. Matches that
+    appear on several pages (same date, teams and result) are kept once,
+    attributed to the first page in sorted order.
+    """
+    print("\n=== Batch Match Extraction ===")
+    html_files = find_html_files(path_or_pattern)
+    print(f"Found {len(html_files)} HTML files")
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_extract_timed, html_files, [streaming] * len(html_files),
+                                    [club] * len(html_files)))
+
+    merged, added = merge_matches((os.path.basename(html_path), matches) for html_path, matches, _ in results)
+    for (html_path, matches, seconds), new in zip(results, added):
+        print(f"  {os.path.basename(html_path)}: {len(matches)} matches ({new} new) in {seconds:.3f}s")
+
+    count = write_matches_csv(merged, output_path, fieldnames=BATCH_FIELDNAMES)
+    total_rows = sum(len(matches) for _, matches, _ in results)
+    print(f"Extracted {total_rows} matches, {count} after deduplication, "
+          f"in {time.perf_counter() - start:.2f}s -> {output_path}")
+    return merged
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--batch', metavar='DIR_OR_GLOB',
+                        help='extract all pages in a directory or matching a glob pattern')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes for --batch')
+    parser.add_argument('--streaming', action='store_true', help='use the incremental lxml parser')
+    parser.add_argument('--input', default="/home/shell/test_fb/site.html")
+    parser.add_argument('--output', default="/home/shell/test_fb/matches.csv")
+    parser.add_argument('--club', metavar='NAME', help=f"club name as it appears in team names "
+                                                       f"(default: {DEFAULT_CLUB['names'][0]})")
+    parser.add_argument('--profile', nargs='?', const='cprofile', choices=PROFILERS,
+                        help='profile the run (cprofile or pyinstrument)')
+    args = parser.parse_args()
+
+    club = {'name': args.club, 'names': [args.club]} if args.club else None
+
+    with session('extract_matches', profile=args.profile):
+        if args.batch:
+            extract_matches_batch(args.batch, args.output, workers=args.workers, streaming=args.streaming,
+                                  club=club)
+        else:
+            if args.streaming:
+                # Incremental lxml parser for large pages, rows are written as they are parsed
+                matches = iter_matches_streaming(args.input, club)
+            else:
+                matches = extract_matches(args.input, club=club)
 
-print(f"Extracted {len(matches)} matches to matches.csv")
+            count = write_matches_csv(matches, args.output)
+            print(f"Extracted {count} matches to {os.path.basename(args.output)}")
@@ -0,0 +1,260 @@
+"""
+Fetch DFB match pages concurrently into an on-disk cache
+
+The pages to fetch are listed in a JSON file, one URL (or {"url", "name"})
+per team and season. Requests run concurrently on asyncio, at most
+max_connections at a time, and are conditional: the ETag/Last-Modified
+of the cached copy are sent along, so an unchanged page costs one 304
+response and neither bandwidth nor parsing. Only new or changed pages go
+through the extractor; their matches are cached next to the page and all
+pages are merged into the games CSV (with a `source` column, like
+extract_matches.py --batch).
+
+    python utils/fetch_pages.py pages.json --cache data/page_cache --output data/games.csv [--connections 4]
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import re
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+
+from extract_matches import BATCH_FIELDNAMES, extract_matches, merge_matches, write_matches_csv
+from instrumentation import PROFILERS, instrumented, session, span
+from json_output import write_atomic, write_json
+
+MAX_CONNECTIONS = 4
+TIMEOUT = 30
+USER_AGENT = 'tsv-statistics-fetcher/1.0'
+
+INDEX_FILE = 'index.json'
+
+def load_pages(pages_path):
+    """[{'url', 'name'}] from a JSON list of URLs or {"url", "name"} objects"""
+    with open(pages_path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    pages = []
+    for entry in entries:
+        page = {'url': entry} if isinstance(entry, str) else dict(entry)
+        name = page.get('name') or hashlib.sha256(page['url'].encode('utf-8')).hexdigest()[:16]
+        page['name'] = re.sub(r'[^A-Za-z0-9._-]+', '-', name)
+        pages.append(page)
+    if len({page['name'] for page in pages}) != len(pages):
+        raise ValueError(f"Duplicate page names in {pages_path}")
+    return pages
+
+def load_index(cache_dir):
+    """{url: cache entry} of the cached pages"""
+    try:
+        with open(os.path.join(cache_dir, INDEX_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def _get(url, etag=None, last_modified=None, timeout=TIMEOUT):
+    """Blocking conditional GET; returns (status, body or None, headers, bytes transferred)"""
+    headers = {'User-Agent': USER_AGENT, 'Accept-Encoding': 'gzip'}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=timeout) as response:
+            body = response.read()
+            transferred = len(body)
+            if response.headers.get('Content-Encoding') == 'gzip':
+                body = gzip.decompress(body)
+            return response.status, body, response.headers, transferred
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return 304, None, e.headers, 0
+        raise
+
+async def _fetch(page, cached, semaphore, timeout):
+    """Fetch one page (at most max_connections at a time); returns its result dict"""
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            status, body, headers, transferred = await asyncio.to_thread(
+                _get, page['url'], cached.get('etag'), cached.get('last_modified'), timeout)
+        except (OSError, ValueError) as e:
+            # URLError, timeouts, HTTP errors other than 304
+            return {**page, 'status': 'failed', 'error': str(e), 'bytes': 0,
+                    'seconds': time.perf_counter() - start}
+
+    result = {**page, 'bytes': transferred, 'seconds': time.perf_counter() - start}
+    if status == 304:
+        return {**result, 'status': 'not_modified'}
+
+    digest = hashlib.sha256(body).hexdigest()
+    if cached and digest == cached.get('sha256'):
+        # Server without validators, same content
+        state = 'unchanged'
+    else:
+        state = 'changed' if cached else 'new'
+    return {**result, 'status': state, 'body': body, 'sha256': digest,
+            'etag': headers.get('ETag'), 'last_modified': headers.get('Last-Modified')}
+
+async def fetch_all(pages, index, max_connections=MAX_CONNECTIONS, timeout=TIMEOUT):
+    """Fetch every page concurrently; results in the order of pages"""
+    semaphore = asyncio.Semaphore(max_connections)
+    return await asyncio.gather(*(_fetch(page, index.get(page['url'], {}), semaphore, timeout) for page in pages))
+
+@instrumented()
+def fetch_pages(pages, cache_dir, max_connections=MAX_CONNECTIONS, timeout=TIMEOUT):
+    """
+    Fetch pages into cache_dir and update its index
+
+    Returns (results, metrics): one dict per page with its status ('new',
+    'changed', 'unchanged', 'not_modified' or 'failed'), and the run's
+    throughput and cache hit numbers.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    index = load_index(cache_dir)
+
+    start = time.perf_counter()
+    results = asyncio.run(fetch_all(pages, index, max_connections=max_connections, timeout=timeout))
+    seconds = time.perf_counter() - start
+
+    for result in results:
+        fetched_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+        if result['status'] in ('new', 'changed'):
+            html_file = f"{result['name']}.html"
+            write_atomic(os.path.join(cache_dir, html_file), result.pop('body'))
+            index[result['url']] = {
+                'name': result['name'],
+                'file': html_file,
+                'sha256': result['sha256'],
+                'etag': result['etag'],
+                'last_modified': result['last_modified'],
+                'fetched': fetched_at,
+            }
+        elif result['status'] == 'unchanged':
+            # Same body, but the server may have sent new validators: keep them for the next 304
+            index[result['url']].update(etag=result['etag'], last_modified=result['last_modified'],
+                                        fetched=fetched_at)
+        result.pop('body', None)
+    write_json(index, os.path.join(cache_dir, INDEX_FILE))
+
+    counts = {status: sum(result['status'] == status for result in results)
+              for status in ('new', 'changed', 'unchanged', 'not_modified', 'failed')}
+    downloaded = sum(result['bytes'] for result in results)
+    fetched = len(results) - counts['failed']
+    metrics = {
+        'pages': len(results),
+        **counts,
+        # Cache hits: pages answered with 304 or identical content
+        'cache_hits': counts['not_modified'] + counts['unchanged'],
+        'hit_rate': round((counts['not_modified'] + counts['unchanged']) / fetched * 100, 1) if fetched else 0,
+        'bytes': downloaded,
+        'seconds': round(seconds, 3),
+        'pages_per_second': round(len(results) / seconds, 1) if seconds > 0 else 0,
+        'mb_per_second': round(downloaded / seconds / 1e6, 2) if seconds > 0 else 0,
+    }
+    return results, metrics
+
+def _extract_page(html_path, streaming, club):
+    """Worker: matches of one cached page"""
+    return extract_matches(html_path, streaming=streaming, club=club)
+
+@instrumented()
+def extract_changed(pages, cache_dir, club=None, streaming=False, workers=None):
+    """
+    Extract the matches of every cached page whose content or club changed
+
+    Matches are cached as <name>.matches.json next to the page. Returns the
+    names of the pages that were (re)extracted.
+    """
+    index = load_index(cache_dir)
+    club_key = json.dumps(club, sort_keys=True)
+    todo = []
+    for page in pages:
+        entry = index.get(page['url'])
+        if entry is None:
+            continue  # never fetched successfully
+        matches_path = os.path.join(cache_dir, f"{entry['name']}.matches.json")
+        if not os.path.exists(matches_path) or entry.get('extracted') != [entry['sha256'], club_key]:
+            todo.append(entry)
+
+    html_paths = [os.path.join(cache_dir, entry['file']) for entry in todo]
+    if len(todo) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            extracted = list(executor.map(_extract_page, html_paths, [streaming] * len(todo), [club] * len(todo)))
+    else:
+        extracted = [_extract_page(path, streaming, club) for path in html_paths]
+
+    for entry, matches in zip(todo, extracted):
+        write_json(matches, os.path.join(cache_dir, f"{entry['name']}.matches.json"), pretty=False)
+        entry['extracted'] = [entry['sha256'], club_key]
+    if todo:
+        write_json(index, os.path.join(cache_dir, INDEX_FILE))
+    return [entry['name'] for entry in todo]
+
+def write_merged_matches(pages, cache_dir, output_path):
+    """Merge the cached matches of all pages (in list order) into one CSV; returns the row count"""
+    index = load_index(cache_dir)
+
+    def cached_matches():
+        for page in pages:
+            entry = index.get(page['url'])
+            if entry is not None:
+                with open(os.path.join(cache_dir, f"{entry['name']}.matches.json"), 'r', encoding='utf-8') as f:
+                    yield entry['name'], json.load(f)
+
+    merged, _ = merge_matches(cached_matches())
+    return write_matches_csv(merged, output_path, fieldnames=BATCH_FIELDNAMES)
+
+def update_matches(pages_path, cache_dir, output_path, club=None, streaming=False,
+                   max_connections=MAX_CONNECTIONS, timeout=TIMEOUT):
+    """
+    Fetch the listed pages, extract what changed and rewrite the games CSV if needed
+
+    The CSV is left untouched when no page changed, so the stages reading
+    it are skipped by the build manifest. Returns the fetch metrics.
+    """
+    print("\n=== Fetching Match Pages ===")
+    pages = load_pages(pages_path)
+    with span('fetch') as s:
+        results, metrics = fetch_pages(pages, cache_dir, max_connections=max_connections, timeout=timeout)
+        s.count('pages', metrics['pages'])
+        s.count('bytes', metrics['bytes'])
+        s.count('cache_hits', metrics['cache_hits'])
+
+    for result in results:
+        detail = f" ({result['error']})" if result['status'] == 'failed' else ''
+        print(f"  {result['name']}: {result['status']}, {result['bytes']:,} bytes in {result['seconds']:.3f}s{detail}")
+    print(f"{metrics['pages']} pages in {metrics['seconds']:.2f}s ({metrics['pages_per_second']} pages/s, "
+          f"{metrics['mb_per_second']} MB/s): {metrics['new']} new, {metrics['changed']} changed, "
+          f"{metrics['cache_hits']} cache hits ({metrics['hit_rate']}%), {metrics['failed']} failed")
+
+    extracted = extract_changed(pages, cache_dir, club=club, streaming=streaming)
+    metrics['extracted'] = len(extracted)
+    if extracted or not os.path.exists(output_path):
+        count = write_merged_matches(pages, cache_dir, output_path)
+        print(f"Extracted {len(extracted)} pages, {count} matches -> {output_path}")
+    else:
+        print(f"No page changed, {os.path.basename(output_path)} left as is")
+    return metrics
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fetch DFB match pages and update the games CSV')
+    parser.add_argument('pages', help='JSON list of page URLs or {"url", "name"} objects')
+    parser.add_argument('--cache', default='data/page_cache', help='page cache directory')
+    parser.add_argument('--output', default='data/games_first_second_team_friendlies.csv')
+    parser.add_argument('--connections', type=int, default=MAX_CONNECTIONS, help='concurrent requests')
+    parser.add_argument('--timeout', type=float, default=TIMEOUT, help='seconds per request')
+    parser.add_argument('--streaming', action='store_true', help='use the incremental lxml parser')
+    parser.add_argument('--club', metavar='NAME', help='club name as it appears in team names')
+    parser.add_argument('--profile', nargs='?', const='cprofile', choices=PROFILERS,
+                        help='profile the run (cprofile or pyinstrument)')
+    args = parser.parse_args()
+
+    club = {'name': args.club, 'names': [args.club]} if args.club else None
+    with session('fetch_pages', profile=args.profile):
+        update_matches(args.pages, args.cache, args.output, club=club, streaming=args.streaming,
+                       max_connections=args.connections, timeout=args.timeout)
@@ -3,11 +3,71 @@ Generate QR Code for the TSV Marquartstein Statistics Website
 """
 import qrcode
 from PIL import Image, ImageDraw, ImageFont
-import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import argparse
+import csv
+import json
+import os
+import re
+import time
+
+from instrumentation import PROFILERS, instrumented, session
+
+# Same PNG settings for single and batch codes
+SAVE_OPTIONS = {'optimize': True}
+
+@lru_cache(maxsize=None)
+def load_logo(logo_path):
+    """Open the logo once per process"""
+    logo = Image.open(logo_path)
+    logo.load()
+    return logo
+
+@lru_cache(maxsize=None)
+def logo_badge(logo_path, logo_size):
+    """
+    Logo resized to fit logo_size, centered on a white square (cached per size)
+    """
+    logo = load_logo(logo_path).copy()
 
-def generate_qr_code(url, output_path, logo_path=None):
+    # Resize logo maintaining aspect ratio
+    logo.thumbnail((logo_size, logo_size), Image.Resampling.LANCZOS)
+
+    # Get actual logo dimensions after thumbnail
+    logo_w, logo_h = logo.size
+
+    # Create a white square background
+    logo_bg_size = logo_size + 20
+    logo_bg = Image.new('RGB', (logo_bg_size, logo_bg_size), 'white')
+
+    # Center the logo on the white background
+    logo_x = (logo_bg_size - logo_w) // 2
+    logo_y = (logo_bg_size - logo_h) // 2
+    logo_bg.paste(logo, (logo_x, logo_y), logo if logo.mode == 'RGBA' else None)
+
+    return logo_bg
+
+@lru_cache(maxsize=None)
+def load_fonts():
+    """Title, subtitle and text fonts, loaded once per process"""
+    try:
+        # Try to use a nice font
+        title_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 48)
+        subtitle_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 32)
+        text_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 24)
+    except OSError:
+        # Fallback to default
+        title_font = ImageFont.load_default()
+        subtitle_font = ImageFont.load_default()
+        text_font = ImageFont.load_default()
+    return title_font, subtitle_font, text_font
+
+def render_qr_code(url, logo_path=None):
     """
-    Generate a QR code with optional logo overlay
+    Render a QR code image in memory, with optional logo overlay
+
+    Returns (image, whether the logo was added).
     """
     # Create QR code instance
     qr = qrcode.QRCode(
@@ -25,52 +85,44 @@ def generate_qr_code(url, output_path, logo_path=None):
     qr_img = qr.make_image(fill_color="#165b33", back_color="white").convert('RGB')
 
     # If logo provided, add it to the center
+    logo_added = False
     if logo_path:
         try:
-            logo = Image.open(logo_path)
-
             # Calculate logo size (should be about 1/5 of QR code size)
             qr_width, qr_height = qr_img.size
-            logo_size = qr_width // 5
-
-            # Resize logo maintaining aspect ratio
-            logo.thumbnail((logo_size, logo_size), Image.Resampling.LANCZOS)
-
-            # Get actual logo dimensions after thumbnail
-            logo_w, logo_h = logo.size
-
-            # Create a white square background
-            logo_bg_size = logo_size + 20
-            logo_bg = Image.new('RGB', (logo_bg_size, logo_bg_size), 'white')
-
-            # Center the logo on the white background
-            logo_x = (logo_bg_size - logo_w) // 2
-            logo_y = (logo_bg_size - logo_h) // 2
-            logo_bg.paste(logo, (logo_x, logo_y), logo if logo.mode == 'RGBA' else None)
+            logo_bg = logo_badge(logo_path, qr_width // 5)
 
             # Calculate position for logo background (center of QR code)
+            logo_bg_size = logo_bg.size[0]
             bg_pos = ((qr_width - logo_bg_size) // 2, (qr_height - logo_bg_size) // 2)
 
             # Paste logo background onto QR code
             qr_img.paste(logo_bg, bg_pos)
-
-            print(f"✓ Logo added to QR code (aspect ratio preserved)")
+            logo_added = True
         except Exception as e:
             print(f"⚠ Could not add logo: {e}")
 
+    return qr_img, logo_added
+
+@instrumented()
+def generate_qr_code(url, output_path, logo_path=None):
+    """
+    Generate a QR code with optional logo overlay
+    """
+    qr_img, logo_added = render_qr_code(url, logo_path)
+    if logo_added:
+        print(f"✓ Logo added to QR code (aspect ratio preserved)")
+
     # Save QR code
-    qr_img.save(output_path, quality=95)
+    qr_img.save(output_path, **SAVE_OPTIONS)
     print(f"✓ QR code saved to: {output_path}")
 
     return qr_img
 
-def create_printable_qr(url, output_path, logo_path=None):
+def render_printable_qr(url, qr_img, subtitle="Saison 2025 Statistiken"):
     """
-    Create a printable QR code with title and instructions
+    Lay out a rendered QR code on a printable canvas with title and instructions
     """
-    # Generate base QR code
-    qr_img = generate_qr_code(url, output_path + '_temp.png', logo_path)
-
     # Create larger canvas for printable version
     canvas_width = 800
     canvas_height = 1000
@@ -93,22 +145,10 @@ def create_printable_qr(url, output_path, logo_path=None):
     # Paste QR code
     canvas.paste(qr_img, (qr_x, qr_y))
 
-    # Add title (we'll use default font since we don't have custom fonts)
-    try:
-        # Try to use a nice font
-        from PIL import ImageFont
-        title_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 48)
-        subtitle_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 32)
-        text_font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 24)
-    except:
-        # Fallback to default
-        title_font = ImageFont.load_default()
-        subtitle_font = ImageFont.load_default()
-        text_font = ImageFont.load_default()
+    title_font, subtitle_font, text_font = load_fonts()
 
     # Add title text
     title = "TSV Marquartstein"
-    subtitle = "Saison 2025 Statistiken"
     instruction = "Scanne den QR-Code mit deinem Smartphone"
 
     # Calculate text positions (centered)
@@ -144,35 +184,150 @@ def create_printable_qr(url, output_path, logo_path=None):
     draw.text((50, canvas_height - 60), "🎄", font=title_font)
     draw.text((canvas_width - 100, canvas_height - 60), "🎄", font=title_font)
 
+    return canvas
+
+@instrumented()
+def create_printable_qr(url, output_path, logo_path=None):
+    """
+    Create a printable QR code with title and instructions
+    """
+    # Generate base QR code (in memory, no temp file)
+    qr_img, _ = render_qr_code(url, logo_path)
+    canvas = render_printable_qr(url, qr_img)
+
     # Save printable version
-    canvas.save(output_path, quality=95)
+    canvas.save(output_path, **SAVE_OPTIONS)
     print(f"✓ Printable QR code saved to: {output_path}")
 
-    # Clean up temp file
-    import os
-    try:
-        os.remove(output_path + '_temp.png')
-    except:
-        pass
+def read_qr_entries(list_path):
+    """
+    Read URLs and labels from a CSV with a `url` column (optional `label` and
+    `filename` columns) or from a plain list with one URL per line
+    """
+    with open(list_path, 'r', encoding='utf-8', newline='') as f:
+        lines = [line for line in f.read().splitlines() if line.strip()]
+
+    if lines and 'url' in next(csv.reader([lines[0]])):
+        rows = list(csv.DictReader(lines))
+    else:
+        rows = [{'url': line.strip()} for line in lines]
+
+    return [
+        {'url': row['url'], 'label': row.get('label') or '', 'filename': row.get('filename') or ''}
+        for row in rows
+    ]
+
+def _slug(text):
+    """File-name friendly version of a label"""
+    return re.sub(r'[^A-Za-z0-9]+', '_', text).strip('_').lower()
+
+def _entry_files(index, entry, printable):
+    """File names of one entry: the QR code and, if printable, its printable version"""
+    # Only the file name of the CSV value: no directories, nothing outside output_dir
+    name = os.path.splitext(os.path.basename(entry['filename']))[0].strip('.')
+    if not name:
+        name = f"qr_{index:04d}" + (f"_{_slug(entry['label'])}" if entry['label'] else '')
+    return [f"{name}.png"] + ([f"{name}_printable.png"] if printable else [])
+
+def _render_entry(index, entry, output_dir, logo_path, printable):
+    """Worker: render and save one QR code (and its printable version)"""
+    files = _entry_files(index, entry, printable)
+
+    qr_img, _ = render_qr_code(entry['url'], logo_path)
+    qr_img.save(os.path.join(output_dir, files[0]), **SAVE_OPTIONS)
+
+    if printable:
+        subtitle = entry['label'] or "Saison 2025 Statistiken"
+        render_printable_qr(entry['url'], qr_img, subtitle=subtitle).save(
+            os.path.join(output_dir, files[1]), **SAVE_OPTIONS)
+
+    return files
+
+def _init_worker(logo_path):
+    """Load the logo and fonts once per worker process"""
+    if logo_path:
+        try:
+            load_logo(logo_path)
+        except OSError:
+            pass  # reported per code by render_qr_code
+    load_fonts()
+
+@instrumented()
+def generate_qr_batch(entries, output_dir, logo_path=None, printable=True, workers=None):
+    """
+    Render many QR codes in a process pool and write qr_report.json with the throughput
+    """
+    # Rows writing the same file would overwrite each other's codes
+    rows = {}
+    for index, entry in enumerate(entries, 1):
+        for file in _entry_files(index, entry, printable):
+            rows.setdefault(file, []).append(index)
+    conflicts = {file: indices for file, indices in rows.items() if len(indices) > 1}
+    if conflicts:
+        details = '; '.join(f"{file}: rows {', '.join(map(str, indices))}" for file, indices in conflicts.items())
+        raise ValueError(f"Duplicate QR code file names ({details})")
+
+    print(f"\n🎄 Generating {len(entries)} QR codes into {output_dir}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(logo_path,)) as executor:
+        futures = [
+            executor.submit(_render_entry, index, entry, output_dir, logo_path, printable)
+            for index, entry in enumerate(entries, 1)
+        ]
+        files = [future.result() for future in futures]
+    seconds = time.perf_counter() - start
+
+    report = {
+        'codes': len(entries),
+        'printable': printable,
+        'workers': workers or os.cpu_count(),
+        'seconds': round(seconds, 3),
+        'codes_per_second': round(len(entries) / seconds, 1) if seconds > 0 else 0,
+        'files': [{'url': entry['url'], 'label': entry['label'], 'files': written}
+                  for entry, written in zip(entries, files)]
+    }
+    with open(os.path.join(output_dir, 'qr_report.json'), 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    print(f"✓ {len(entries)} QR codes in {seconds:.2f}s ({report['codes_per_second']} codes/s)")
+    return report
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
     # Get URL from command line or use placeholder
-    url = sys.argv[1] if len(sys.argv) > 1 else 'https://YOUR-USERNAME.github.io/tsv-marquartstein-stats'
-
-    logo_path = '/home/shell/test_fb/data/logo.png'
-    output_basic = '/home/shell/test_fb/docs/qr_code.png'
-    output_printable = '/home/shell/test_fb/docs/qr_code_printable.png'
-
-    print(f"\n🎄 Generating QR Codes for TSV Marquartstein")
-    print(f"URL: {url}\n")
-
-    # Generate basic QR code
-    generate_qr_code(url, output_basic, logo_path)
-
-    # Generate printable version
-    create_printable_qr(url, output_printable, logo_path)
-
-    print(f"\n✅ QR Codes generated successfully!")
-    print(f"\nBasic QR: {output_basic}")
-    print(f"Printable QR: {output_printable}")
-    print(f"\n📱 Scan these codes to view the statistics website!")
+    parser.add_argument('url', nargs='?', default='https://YOUR-USERNAME.github.io/tsv-marquartstein-stats')
+    parser.add_argument('--batch', metavar='CSV', help='CSV (url,label[,filename]) or list of URLs')
+    parser.add_argument('--output-dir', default='/home/shell/test_fb/docs/qr_codes')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--no-printable', action='store_true', help='skip the printable versions in --batch')
+    parser.add_argument('--logo', default='/home/shell/test_fb/data/logo.png')
+    parser.add_argument('--profile', nargs='?', const='cprofile', choices=PROFILERS,
+                        help='profile the run (cprofile or pyinstrument)')
+    args = parser.parse_args()
+
+    logo_path = args.logo
+
+    with session('generate_qr', profile=args.profile):
+        if args.batch:
+            generate_qr_batch(read_qr_entries(args.batch), args.output_dir, logo_path,
+                              printable=not args.no_printable, workers=args.workers)
+        else:
+            url = args.url
+            output_basic = '/home/shell/test_fb/docs/qr_code.png'
+            output_printable = '/home/shell/test_fb/docs/qr_code_printable.png'
+
+            print(f"\n🎄 Generating QR Codes for TSV Marquartstein")
+            print(f"URL: {url}\n")
+
+            # Generate basic QR code
+            generate_qr_code(url, output_basic, logo_path)
+
+            # Generate printable version
+            create_printable_qr(url, output_printable, logo_path)
+
+            print(f"\n✅ QR Codes generated successfully!")
+            print(f"\nBasic QR: {output_basic}")
+            print(f"Printable QR: {output_printable}")
+            print(f"\n📱 Scan these codes to view the statistics website!")
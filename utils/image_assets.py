@@ -0,0 +1,218 @@
+"""
+Responsive image variants of the logo and QR codes
+
+Every source image is resized to a few display widths and encoded as AVIF
+(if Pillow supports it), WebP and optimized PNG, all variants in parallel.
+images.json lists the variants per asset with a ready-made srcset per
+format. Variants are only re-encoded when the content hash of their source
+or the settings changed:
+
+    python utils/image_assets.py --output-dir docs/assets/images [--html logo]
+"""
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from PIL import Image, features
+
+from build_manifest import file_hash
+from instrumentation import PROFILERS, instrumented, session
+from json_output import write_json
+from output_schemas import IMAGES
+
+# name: (display widths in px, kind). Logo: 150px in the header at 1x/2x/3x;
+# widths beyond the source are capped to it. Graphics (QR codes: few flat
+# colors) are resized without smoothing, so modules stay sharp, and get
+# palette WebP (lossless) and PNG; photos get lossy WebP and true color PNGs.
+ASSETS = {
+    'logo': ((150, 300, 450), 'photo'),
+    'qr_code': ((256, 512), 'graphic'),
+    'qr_code_printable': ((400, 800), 'graphic'),
+}
+
+# Preferred first, the order of <source> elements in a <picture>
+FORMATS = [fmt for fmt in ('avif', 'webp', 'png') if fmt != 'avif' or features.check('avif')]
+
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'png': 'image/png'}
+
+ENCODER_OPTIONS = {
+    ('avif', 'photo'): {'quality': 60, 'speed': 6},
+    ('avif', 'graphic'): {'quality': 85, 'speed': 6},
+    ('webp', 'photo'): {'quality': 80, 'method': 6},
+    ('webp', 'graphic'): {'lossless': True, 'method': 6},
+    ('png', 'photo'): {'optimize': True},
+    ('png', 'graphic'): {'optimize': True},
+}
+
+# Colors of a graphic's palette WebP/PNG (antialiased text needs a few shades)
+PALETTE_COLORS = 32
+
+def settings_key(widths, kind):
+    """Hash of everything besides the source that shapes the variants"""
+    settings = {'widths': list(widths), 'kind': kind, 'formats': FORMATS,
+                'options': {fmt: ENCODER_OPTIONS[(fmt, kind)] for fmt in FORMATS},
+                'palette': PALETTE_COLORS, 'resample': 'nearest' if kind == 'graphic' else 'lanczos',
+                'pillow': Image.__version__}
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+def variant_widths(widths, source_width):
+    """Requested widths capped to the source width, without duplicates"""
+    return sorted({min(width, source_width) for width in widths})
+
+@lru_cache(maxsize=8)
+def load_source(path, sha256):
+    """Decode a source once per worker process (keyed by content, not just path)"""
+    with Image.open(path) as img:
+        img.load()
+        return img.convert('RGBA' if 'A' in img.getbands() or 'transparency' in img.info else 'RGB')
+
+def encode_variant(path, sha256, width, fmt, kind, output_path):
+    """Worker: resize one source to width, encode it as fmt and write it atomically; returns (height, bytes)"""
+    img = load_source(path, sha256)
+    height = max(1, round(img.height * width / img.width))
+    if width != img.width:
+        resample = Image.Resampling.NEAREST if kind == 'graphic' else Image.Resampling.LANCZOS
+        img = img.resize((width, height), resample)
+    if fmt in ('webp', 'png') and kind == 'graphic':
+        method = Image.Quantize.FASTOCTREE if img.mode == 'RGBA' else Image.Quantize.MEDIANCUT
+        img = img.quantize(colors=PALETTE_COLORS, method=method)
+
+    tmp_path = output_path + '.tmp'
+    img.save(tmp_path, format=fmt.upper(), **ENCODER_OPTIONS[(fmt, kind)])
+    os.replace(tmp_path, output_path)
+    return height, os.path.getsize(output_path)
+
+def load_images_manifest(manifest_path):
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def _is_current(entry, sha256, settings, output_dir):
+    """True if a manifest entry was built from this content and settings and its files exist"""
+    return (entry is not None and entry['sha256'] == sha256 and entry['settings'] == settings
+            and all(os.path.exists(os.path.join(output_dir, variant['file']))
+                    for variants in entry['variants'].values() for variant in variants))
+
+@instrumented()
+def build_image_assets(sources, output_dir, workers=None, force=False):
+    """
+    Encode the variants of {asset name: source path} into output_dir and write images.json
+
+    Assets whose source content and settings are unchanged keep their
+    variants. Returns the manifest: per asset the source size and hash,
+    the variants per format (width, height, file, bytes) and a srcset string
+    per format.
+    """
+    print("\n=== Building Image Assets ===")
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, 'images.json')
+    previous = load_images_manifest(manifest_path)
+
+    manifest = {}
+    jobs = {}
+    for name, path in sources.items():
+        widths, kind = ASSETS[name]
+        sha256 = file_hash(path)
+        settings = settings_key(widths, kind)
+        if not force and _is_current(previous.get(name), sha256, settings, output_dir):
+            manifest[name] = previous[name]
+            continue
+
+        with Image.open(path) as img:
+            source_width, source_height = img.size
+        manifest[name] = {
+            'source': os.path.basename(path),
+            'sha256': sha256,
+            'settings': settings,
+            'width': source_width,
+            'height': source_height,
+            'bytes': os.path.getsize(path),
+            'variants': {},
+        }
+        for fmt in FORMATS:
+            for width in variant_widths(widths, source_width):
+                jobs[(name, fmt, width)] = (path, sha256, width, fmt, kind,
+                                            os.path.join(output_dir, f"{name}-{width}.{fmt}"))
+
+    start = time.perf_counter()
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {key: executor.submit(encode_variant, *args) for key, args in jobs.items()}
+            for (name, fmt, width), future in futures.items():
+                height, size = future.result()
+                manifest[name]['variants'].setdefault(fmt, []).append(
+                    {'width': width, 'height': height, 'file': f"{name}-{width}.{fmt}", 'bytes': size})
+    seconds = time.perf_counter() - start
+
+    for entry in manifest.values():
+        entry['srcset'] = {fmt: ', '.join(f"{variant['file']} {variant['width']}w" for variant in variants)
+                           for fmt, variants in entry['variants'].items()}
+
+    if manifest != previous:
+        write_json(manifest, manifest_path, schema=IMAGES)
+
+    rebuilt = {name for name, _, _ in jobs}
+    for name, entry in manifest.items():
+        state = 'encoded' if name in rebuilt else 'unchanged'
+        print(f"{name} ({entry['width']}x{entry['height']}, {entry['bytes'] / 1024:.0f} KB, {state}):")
+        for line in savings_report(entry):
+            print(f"  {line}")
+    print(f"Encoded {len(jobs)} variants of {len(rebuilt)} assets in {seconds:.2f}s -> {manifest_path}")
+    return manifest
+
+def savings_report(entry):
+    """Per width: smallest variant and bytes saved against the source file"""
+    lines = []
+    for width in sorted({variant['width'] for variants in entry['variants'].values() for variant in variants}):
+        sizes = {fmt: variant['bytes'] for fmt, variants in entry['variants'].items()
+                 for variant in variants if variant['width'] == width}
+        best = min(sizes, key=sizes.get)
+        saved = entry['bytes'] - sizes[best]
+        formats = ', '.join(f"{fmt} {size / 1024:.1f} KB" for fmt, size in sizes.items())
+        lines.append(f"{width}w: {formats} -> {best} saves {saved / 1024:.1f} KB "
+                     f"({saved / entry['bytes'] * 100:.0f}%)")
+    return lines
+
+def picture_html(entry, base, alt, sizes, css_class=None):
+    """<picture> markup for a manifest entry, base is the URL prefix of the variant files"""
+    # Browsers without srcset get the 1x PNG
+    fallback = min(entry['variants']['png'], key=lambda variant: variant['width'])
+    lines = ['<picture>']
+    for fmt in FORMATS[:-1]:
+        if fmt in entry['srcset']:
+            srcset = ', '.join(f"{base}{part}" for part in entry['srcset'][fmt].split(', '))
+            lines.append(f'    <source type="{MIME_TYPES[fmt]}" srcset="{srcset}" sizes="{sizes}">')
+    srcset = ', '.join(f"{base}{part}" for part in entry['srcset']['png'].split(', '))
+    class_attr = f' class="{css_class}"' if css_class else ''
+    lines.append(f'    <img src="{base}{fallback["file"]}" srcset="{srcset}" sizes="{sizes}" '
+                 f'width="{fallback["width"]}" height="{fallback["height"]}" alt="{alt}"{class_attr}>')
+    lines.append('</picture>')
+    return '\n'.join(lines)
+
+if __name__ == '__main__':
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description='Build responsive WebP/AVIF/PNG variants of the site images')
+    parser.add_argument('--logo', default=os.path.join(root, 'data', 'logo.png'))
+    parser.add_argument('--qr-code', default=os.path.join(root, 'docs', 'qr_code.png'))
+    parser.add_argument('--qr-printable', default=os.path.join(root, 'docs', 'qr_code_printable.png'))
+    parser.add_argument('--output-dir', default=os.path.join(root, 'docs', 'assets', 'images'))
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--force', action='store_true', help='re-encode unchanged sources too')
+    parser.add_argument('--html', metavar='ASSET', help='print <picture> markup for an asset')
+    parser.add_argument('--sizes', default='(max-width: 768px) 100px, 150px', help='sizes attribute for --html')
+    parser.add_argument('--profile', nargs='?', const='cprofile', choices=PROFILERS,
+                        help='profile the run (cprofile or pyinstrument)')
+    args = parser.parse_args()
+
+    sources = {'logo': args.logo, 'qr_code': args.qr_code, 'qr_code_printable': args.qr_printable}
+    with session('image_assets', profile=args.profile):
+        manifest = build_image_assets({name: path for name, path in sources.items() if path and os.path.exists(path)},
+                                      args.output_dir, workers=args.workers, force=args.force)
+    if args.html:
+        print(picture_html(manifest[args.html], 'assets/images/', alt=args.html, sizes=args.sizes))
@@ -0,0 +1,241 @@
+"""
+Timing spans, counters and peak memory for the pipeline steps
+
+Wrap a step in `with span('name') as s:` (or decorate a function with
+@instrumented()) and count what it processed with s.count('rows', n).
+Finished spans record their wall time, counters, their own peak RSS
+(peak_rss_mb; where the peak cannot be reset, as on macOS, only its growth
+during the span: peak_rss_growth_mb) and their parent span. A session collects the spans of one script run,
+optionally profiles it, and writes them to
+<metrics_dir>/<script>-<timestamp>.json so runs can be compared over time.
+"""
+import cProfile
+import functools
+import io
+import json
+import os
+import platform
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows: no peak RSS
+    resource = None
+
+METRICS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'metrics')
+
+PROFILERS = ('cprofile', 'pyinstrument')
+
+_spans = []
+_local = threading.local()
+
+# Linux keeps the peak RSS since the last reset as VmHWM in /proc/self/status;
+# writing "5" to /proc/self/clear_refs resets it to the current RSS
+_STATUS = '/proc/self/status'
+_CLEAR_REFS = '/proc/self/clear_refs'
+
+_open_spans = []
+_memory_lock = threading.Lock()
+_process_peak_mb = 0.0
+_can_reset = None
+
+def _high_water_mb():
+    """Peak RSS since the last reset (process start without resets) in MB, None if unknown"""
+    try:
+        with open(_STATUS, 'r') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def _reset_high_water():
+    """Reset VmHWM to the current RSS; False where that is not possible"""
+    global _can_reset
+    if _can_reset is not False:
+        try:
+            with open(_CLEAR_REFS, 'w') as f:
+                f.write('5')
+            _can_reset = True
+        except OSError:
+            _can_reset = False
+    return _can_reset
+
+def _observe():
+    """Fold the high-water mark since the last reset into the open spans and the process peak"""
+    global _process_peak_mb
+    peak = _high_water_mb()
+    if peak is None:
+        return None
+    _process_peak_mb = max(_process_peak_mb, peak)
+    for open_span in _open_spans:
+        open_span.peak_mb = max(open_span.peak_mb, peak)
+    return peak
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far in MB (None if unknown)"""
+    with _memory_lock:
+        peak = _observe()
+    return None if peak is None else _process_peak_mb
+
+class Span:
+    """One timed step with its counters"""
+
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.parent = parent
+        self.counters = {}
+        self.peak_mb = 0.0
+        self.start_peak_mb = None
+
+    def count(self, key, n=1):
+        """Add n to a counter (rows, files, bytes, ...)"""
+        self.counters[key] = self.counters.get(key, 0) + int(n)
+
+@contextmanager
+def span(name, **counters):
+    """Time a named step; nested spans record their parent"""
+    stack = _local.__dict__.setdefault('stack', [])
+    current = Span(name, parent=stack[-1].name if stack else None)
+    for key, n in counters.items():
+        current.count(key, n)
+
+    with _memory_lock:
+        # Start a fresh high-water mark; the enclosing spans keep theirs
+        current.start_peak_mb = _observe()
+        if _reset_high_water():
+            current.peak_mb = _high_water_mb()
+        _open_spans.append(current)
+
+    stack.append(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    finally:
+        seconds = time.perf_counter() - start
+        stack.pop()
+        with _memory_lock:
+            end_peak_mb = _observe()
+            _open_spans.remove(current)
+        finished = {'name': name, 'parent': current.parent, 'seconds': round(seconds, 4)}
+        if _can_reset:
+            finished['peak_rss_mb'] = round(current.peak_mb, 1)
+        elif end_peak_mb is not None:
+            # Without resets only the growth of the process peak is known
+            finished['peak_rss_growth_mb'] = round(end_peak_mb - current.start_peak_mb, 1)
+        _spans.append({**finished, **current.counters})
+
+def instrumented(name=None):
+    """Decorator running the function inside a span named after it"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name or func.__name__):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def collected(clear=False):
+    """Spans finished so far in this process (oldest first)"""
+    spans = list(_spans)
+    if clear:
+        _spans.clear()
+    return spans
+
+def record(spans, parent=None):
+    """Add spans finished elsewhere (e.g. in a worker process) under `parent` (default: the open span)"""
+    stack = _local.__dict__.get('stack')
+    parent = parent or (stack[-1].name if stack else None)
+    for finished in spans:
+        _spans.append({**finished, 'parent': finished['parent'] or parent})
+
+def profile_option(argv=None):
+    """Profiler requested with --profile[=cprofile|pyinstrument] on the command line, or None"""
+    for arg in (sys.argv if argv is None else argv):
+        if arg == '--profile':
+            return 'cprofile'
+        if arg.startswith('--profile='):
+            profiler = arg.split('=', 1)[1]
+            if profiler not in PROFILERS:
+                raise ValueError(f"Unknown profiler {profiler!r}, use one of {', '.join(PROFILERS)}")
+            return profiler
+    return None
+
+@contextmanager
+def profiled(profiler, output_stem):
+    """Run the block under cProfile or pyinstrument and save/print the result"""
+    if profiler == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print("⚠ pyinstrument not installed, using cProfile")
+            profiler = 'cprofile'
+        else:
+            profile = Profiler()
+            profile.start()
+            try:
+                yield
+            finally:
+                profile.stop()
+                with open(output_stem + '.html', 'w', encoding='utf-8') as f:
+                    f.write(profile.output_html())
+                print(profile.output_text(unicode=True, color=False))
+                print(f"Profile saved to {output_stem}.html")
+            return
+
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        profile.dump_stats(output_stem + '.prof')
+        summary = io.StringIO()
+        pstats.Stats(profile, stream=summary).sort_stats('cumulative').print_stats(25)
+        print(summary.getvalue())
+        print(f"Profile saved to {output_stem}.prof")
+
+@contextmanager
+def session(script, profile=None, metrics_dir=METRICS_DIR):
+    """
+    Collect the spans of one script run and write them as JSON metrics
+
+    profile: None, 'cprofile' or 'pyinstrument' (see profile_option).
+    """
+    os.makedirs(metrics_dir, exist_ok=True)
+    started = datetime.now()
+    output_stem = os.path.join(metrics_dir, f"{script}-{started:%Y%m%d-%H%M%S}")
+    collected(clear=True)
+
+    start = time.perf_counter()
+    try:
+        if profile:
+            with profiled(profile, output_stem), span(script):
+                yield
+        else:
+            with span(script):
+                yield
+    finally:
+        peak = peak_rss_mb()
+        metrics = {
+            'script': script,
+            'started': started.isoformat(timespec='seconds'),
+            'argv': sys.argv[1:],
+            'python': platform.python_version(),
+            'seconds': round(time.perf_counter() - start, 4),
+            'peak_rss_mb': None if peak is None else round(peak, 1),
+            'spans': collected(clear=True)
+        }
+        with open(output_stem + '.json', 'w', encoding='utf-8') as f:
+            json.dump(metrics, f, indent=2)
+        print(f"Metrics saved to {output_stem}.json")
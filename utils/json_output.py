@@ -0,0 +1,210 @@
+"""
+Typed JSON output for the website data files
+
+Payloads are encoded with orjson when it is installed (the stdlib json
+module otherwise, with the same result): NumPy scalars and arrays,
+datetimes, pandas Timestamps and categoricals are written as their JSON
+values instead of str(), missing values (None, NaN, NaT, pd.NA) become
+null. Before writing, a payload can be checked against its declared
+schema (see output_schemas.py), and files are replaced atomically so the
+site never reads a half-written file.
+"""
+import json
+import math
+import os
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class SchemaError(ValueError):
+    """A payload does not match its declared schema"""
+
+def _is_missing(value):
+    """True for values written as null: None, NaN/inf, NaT and pd.NA"""
+    if value is None or value is pd.NaT or value is pd.NA:
+        return True
+    return isinstance(value, (float, np.floating)) and not math.isfinite(value)
+
+def _default(value):
+    """JSON value of a type the encoders do not handle themselves"""
+    if value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Series, pd.Index, pd.api.extensions.ExtensionArray)):
+        # Categoricals and nullable arrays: their values, missing ones as None
+        return [None if _is_missing(item) else item for item in np.asarray(value, dtype=object).tolist()]
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def to_native(value):
+    """Plain Python version of a payload for the stdlib encoder"""
+    if isinstance(value, dict):
+        return {key if isinstance(key, str) else str(to_native(key)): to_native(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_native(item) for item in value]
+    if value is None or isinstance(value, (str, bool, int)):
+        return value
+    if isinstance(value, float):
+        return float(value) if math.isfinite(value) else None
+    return to_native(_default(value))
+
+def dumps(data, pretty=True):
+    """UTF-8 JSON bytes of data, indented by 2 or minified"""
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=_default, option=option)
+    return json.dumps(to_native(data), ensure_ascii=False, allow_nan=False,
+                      indent=2 if pretty else None, separators=None if pretty else (',', ':')).encode('utf-8')
+
+_CHECKS = {
+    'integer': lambda v: isinstance(v, (int, np.integer)) and not isinstance(v, bool),
+    'number': lambda v: isinstance(v, (int, float, np.integer, np.floating)) and not isinstance(v, bool),
+    'string': lambda v: isinstance(v, str),
+    'boolean': lambda v: isinstance(v, (bool, np.bool_)),
+    'datetime': lambda v: isinstance(v, (datetime, date)),
+    'any': lambda v: True,
+}
+
+# dtype kinds an array may have for an item type
+_ARRAY_KINDS = {'integer': 'iu', 'number': 'iuf', 'boolean': 'b', 'datetime': 'M', 'string': 'UO', 'any': 'biufMUO'}
+
+def _describe(value):
+    text = repr(value)
+    return f"{type(value).__name__} ({text[:40] + '...' if len(text) > 40 else text})"
+
+def _predicate(schema):
+    """Fast boolean check compiled from a schema (see validate)"""
+    if isinstance(schema, dict):
+        fields = [(key.rstrip('?'), key.endswith('?'), _predicate(value)) for key, value in schema.items() if key != '*']
+        declared = {key.rstrip('?') for key in schema}
+        other = _predicate(schema['*']) if '*' in schema else None
+
+        def check(value):
+            if not isinstance(value, dict):
+                return False
+            for name, optional, matches in fields:
+                if name in value:
+                    if not matches(value[name]):
+                        return False
+                elif not optional:
+                    return False
+            return other is None or all(other(item) for key, item in value.items() if key not in declared)
+        return check
+
+    if isinstance(schema, list):
+        item_schema = schema[0]
+        matches = _predicate(item_schema)
+        scalar_items = isinstance(item_schema, str)
+
+        def check(value):
+            if isinstance(value, np.ndarray) and scalar_items:
+                return _array_matches(value, item_schema)
+            return isinstance(value, (list, tuple)) and all(map(matches, value))
+        return check
+
+    type_check = _CHECKS[schema.rstrip('?')]
+    if schema.endswith('?') or schema == 'any':
+        return lambda value: _is_missing(value) or type_check(value)
+    if schema in ('integer', 'string', 'boolean'):
+        # None fails the type check already, NaN is a float
+        return type_check
+    return lambda value: type_check(value) and not _is_missing(value)
+
+def _array_matches(array, item_schema):
+    """True if a NumPy array's dtype fits a scalar item schema (NaN counts as null)"""
+    nullable = item_schema.endswith('?')
+    kinds = _ARRAY_KINDS[item_schema.rstrip('?')] + ('f' if nullable else '')
+    if array.dtype.kind not in kinds:
+        return False
+    return nullable or array.dtype.kind != 'f' or bool(np.isfinite(array).all())
+
+_predicates = {}
+
+def validate(data, schema, path='$'):
+    """
+    Raise SchemaError naming the first value of data that does not match schema
+
+    Schemas are plain values (see output_schemas.py): a type name
+    ('integer', 'number', 'string', 'boolean', 'datetime', 'any'; a trailing
+    '?' allows null), [item schema] for arrays and {key: schema} for objects.
+    Object keys ending in '?' are optional, '*' applies to every other key;
+    undeclared keys are allowed. Schemas are compiled once; the payload is
+    only walked path by path to describe a mismatch.
+    """
+    cached = _predicates.get(id(schema))
+    if cached is None or cached[0] is not schema:
+        cached = _predicates[id(schema)] = (schema, _predicate(schema))
+    if not cached[1](data):
+        _explain(data, schema, path)
+        raise SchemaError(f"{path}: does not match its schema")
+
+def _explain(data, schema, path):
+    """Raise SchemaError at the first mismatch below path"""
+    if isinstance(schema, dict):
+        if not isinstance(data, dict):
+            raise SchemaError(f"{path}: expected object, got {_describe(data)}")
+        for key, value_schema in schema.items():
+            name = key.rstrip('?')
+            if key == '*':
+                continue
+            if name in data:
+                _explain(data[name], value_schema, f"{path}.{name}")
+            elif not key.endswith('?'):
+                raise SchemaError(f"{path}: missing key {name!r}")
+        if '*' in schema:
+            declared = {key.rstrip('?') for key in schema}
+            for key, value in data.items():
+                if key not in declared:
+                    _explain(value, schema['*'], f"{path}.{key}")
+        return
+
+    if isinstance(schema, list):
+        if isinstance(data, np.ndarray) and isinstance(schema[0], str):
+            if not _array_matches(data, schema[0]):
+                raise SchemaError(f"{path}: expected array of {schema[0]}, got {data.dtype} array")
+            return
+        if not isinstance(data, (list, tuple)):
+            raise SchemaError(f"{path}: expected array, got {_describe(data)}")
+        for index, item in enumerate(data):
+            _explain(item, schema[0], f"{path}[{index}]")
+        return
+
+    type_name = schema.rstrip('?')
+    if _is_missing(data):
+        if schema.endswith('?') or type_name == 'any':
+            return
+        raise SchemaError(f"{path}: expected {type_name}, got null ({_describe(data)})")
+    if not _CHECKS[type_name](data):
+        raise SchemaError(f"{path}: expected {type_name}, got {_describe(data)}")
+
+def write_atomic(path, data):
+    """Write bytes to a temporary file next to path and rename it over path"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def write_json(data, output_path, schema=None, pretty=True):
+    """Validate data against schema (if given) and write it atomically; returns the bytes written"""
+    if schema is not None:
+        validate(data, schema, os.path.basename(output_path))
+    encoded = dumps(data, pretty=pretty)
+    write_atomic(output_path, encoded)
+    return len(encoded)
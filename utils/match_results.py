@@ -0,0 +1,75 @@
+"""
+Vectorized match results: result codes, points, form and streaks
+
+All values are derived from the goals_for/goals_against arrays of games in
+date order, without any per-row Python code.
+"""
+import numpy as np
+
+# Outcome index = sign(goal difference) + 1
+RESULT_CODES = np.array(['L', 'D', 'W'])
+POINTS = np.array([0, 1, 3])
+
+LOSS, DRAW, WIN = 0, 1, 2
+
+def run_lengths(values):
+    """Length of the run of equal values ending at each position"""
+    n = len(values)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    positions = np.arange(n)
+    starts = np.empty(n, dtype=bool)
+    starts[0] = True
+    starts[1:] = values[1:] != values[:-1]
+    run_start = np.maximum.accumulate(np.where(starts, positions, 0))
+    return positions - run_start + 1
+
+def form_strings(codes, length=5):
+    """Last `length` result codes up to and including each game, oldest first"""
+    n = len(codes)
+    if n == 0:
+        return np.zeros(0, dtype='U1')
+
+    code_bytes = np.char.encode(codes, 'ascii').view(np.uint8)
+    count = np.minimum(np.arange(n) + 1, length)
+    offsets = np.arange(length)
+    index = (np.arange(n) - count + 1)[:, None] + offsets
+    window = np.where(offsets < count[:, None], code_bytes[np.clip(index, 0, n - 1)], 0)
+
+    # Rows of bytes -> fixed-width byte strings (trailing padding is dropped)
+    return np.ascontiguousarray(window.astype(np.uint8)).view(f'S{length}').ravel().astype('U')
+
+def compute_results(goals_for, goals_against, form_length=5):
+    """Per-game result fields and season totals for played games (no missing goals) in date order"""
+    goals_for = np.asarray(goals_for, dtype=np.int64)
+    goals_against = np.asarray(goals_against, dtype=np.int64)
+
+    goal_difference = goals_for - goals_against
+    outcome = np.sign(goal_difference) + 1
+    codes = RESULT_CODES[outcome]
+    points = POINTS[outcome]
+
+    streak = run_lengths(outcome)
+    form = form_strings(codes, form_length)
+    unbeaten = run_lengths(outcome != LOSS) * (outcome != LOSS)
+    counts = np.bincount(outcome, minlength=3)
+
+    return {
+        'result_code': codes,
+        'points': points,
+        'cumulative_points': np.cumsum(points),
+        'goal_difference': goal_difference,
+        'streak': streak,
+        'form': form,
+        'totals': {
+            'wins': int(counts[WIN]),
+            'draws': int(counts[DRAW]),
+            'losses': int(counts[LOSS]),
+            'points': int(points.sum()),
+            'longest_win_streak': int(streak[outcome == WIN].max(initial=0)),
+            'longest_unbeaten_streak': int(unbeaten.max(initial=0)),
+            'current_streak': f"{int(streak[-1])}{codes[-1]}" if len(codes) else '',
+            'form': str(form[-1]) if len(codes) else ''
+        }
+    }
@@ -0,0 +1,343 @@
+"""
+SQLite store for matches and training/game registrations
+
+Instead of reparsing the full CSV history on every run, new matchdays are
+upserted into one database file: a match is identified by date and teams,
+a registration by event and player, so ingesting the same rows again
+changes nothing and a corrected result or a changed response simply
+replaces the old row. Tables are indexed on date, team, user_id and
+event_type; the participation statistics are aggregated in SQL.
+
+    python utils/match_store.py data/club.sqlite --games data/games.csv --playerlist data/playerlist.csv
+    python utils/match_store.py data/club.sqlite --html data/site.html
+"""
+import argparse
+import csv
+import os
+import re
+import sqlite3
+import time
+from contextlib import closing
+from datetime import date, datetime
+
+import pandas as pd
+
+from attendance_cube import cube_payload
+from clubs import resolve_club
+from columnar_cache import GAMES_CATEGORICALS, PLAYERLIST_CATEGORICALS
+from instrumentation import instrumented, span
+from participation_stream import NO_RESPONSE
+from season_shards import SEASON_START_MONTH
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    date TEXT NOT NULL,
+    kickoff TEXT,
+    competition TEXT,
+    home_team TEXT NOT NULL,
+    away_team TEXT NOT NULL,
+    opponent TEXT,
+    goals_for INTEGER,
+    goals_against INTEGER,
+    result TEXT,
+    source TEXT,
+    UNIQUE (date, home_team, away_team)
+);
+CREATE INDEX IF NOT EXISTS matches_home_team ON matches (home_team);
+CREATE INDEX IF NOT EXISTS matches_away_team ON matches (away_team);
+
+CREATE TABLE IF NOT EXISTS events (
+    event_id INTEGER PRIMARY KEY,
+    event_type TEXT,
+    event_date TEXT
+);
+CREATE INDEX IF NOT EXISTS events_date ON events (event_date);
+CREATE INDEX IF NOT EXISTS events_type ON events (event_type, event_date);
+
+CREATE TABLE IF NOT EXISTS players (
+    user_id INTEGER PRIMARY KEY,
+    user_name TEXT
+);
+
+CREATE TABLE IF NOT EXISTS registrations (
+    event_id INTEGER NOT NULL REFERENCES events (event_id),
+    user_id INTEGER NOT NULL REFERENCES players (user_id),
+    team_name TEXT,
+    user_participation TEXT,
+    UNIQUE (event_id, user_id)
+);
+CREATE INDEX IF NOT EXISTS registrations_user ON registrations (user_id);
+CREATE INDEX IF NOT EXISTS registrations_team ON registrations (team_name);
+"""
+
+# Same columns (and order) as the games CSV
+GAMES_COLUMNS = ['date', 'competition', 'home_team', 'away_team', 'opponent', 'goals_for', 'goals_against', 'result']
+
+UPSERT_MATCH = """
+INSERT INTO matches (date, kickoff, competition, home_team, away_team, opponent, goals_for, goals_against,
+                     result, source)
+VALUES (:date, :kickoff, :competition, :home_team, :away_team, :opponent, :goals_for, :goals_against,
+        :result, :source)
+ON CONFLICT (date, home_team, away_team) DO UPDATE SET
+    kickoff = excluded.kickoff, competition = excluded.competition, opponent = excluded.opponent,
+    goals_for = excluded.goals_for, goals_against = excluded.goals_against, result = excluded.result,
+    source = coalesce(matches.source, excluded.source)
+WHERE kickoff IS NOT excluded.kickoff OR competition IS NOT excluded.competition
+    OR goals_for IS NOT excluded.goals_for OR goals_against IS NOT excluded.goals_against
+    OR result IS NOT excluded.result
+"""
+
+UPSERT_EVENT = """
+INSERT INTO events (event_id, event_type, event_date) VALUES (?, ?, ?)
+ON CONFLICT (event_id) DO UPDATE SET event_type = excluded.event_type, event_date = excluded.event_date
+WHERE event_type IS NOT excluded.event_type OR event_date IS NOT excluded.event_date
+"""
+
+UPSERT_PLAYER = """
+INSERT INTO players (user_id, user_name) VALUES (?, ?)
+ON CONFLICT (user_id) DO UPDATE SET user_name = excluded.user_name
+WHERE user_name IS NOT excluded.user_name
+"""
+
+UPSERT_REGISTRATION = """
+INSERT INTO registrations (event_id, user_id, team_name, user_participation) VALUES (?, ?, ?, ?)
+ON CONFLICT (event_id, user_id) DO UPDATE SET
+    team_name = excluded.team_name, user_participation = excluded.user_participation
+WHERE team_name IS NOT excluded.team_name OR user_participation IS NOT excluded.user_participation
+"""
+
+def connect(db_path):
+    """Open (and create if needed) the store"""
+    # Default rollback journal: committed rows are in the file itself, so the
+    # build manifest sees every change in the file hash
+    conn = sqlite3.connect(db_path)
+    conn.execute('PRAGMA foreign_keys = ON')
+    conn.executescript(SCHEMA)
+    return conn
+
+def match_date(text):
+    """ISO date of a match date like "So. 27.07.2025 18:00" (None if there is none)"""
+    match = re.search(r'(\d{2})\.(\d{2})\.(\d{4})', text or '')
+    return f"{match.group(3)}-{match.group(2)}-{match.group(1)}" if match else None
+
+def event_date(text):
+    """ISO date of a playerlist date like "17-11-2025" (None if unparseable)"""
+    try:
+        return datetime.strptime(text.strip(), '%d-%m-%Y').date().isoformat()
+    except (AttributeError, ValueError):
+        return None
+
+def _integer(value):
+    """int of a CSV cell, None for an empty one"""
+    return int(value) if value not in (None, '') else None
+
+@instrumented()
+def upsert_matches(conn, matches):
+    """
+    Insert or update match dicts (as written by extract_matches.py)
+
+    Returns (rows written, rows skipped without a date); unchanged matches
+    are not written again.
+    """
+    rows = []
+    skipped = 0
+    for match in matches:
+        day = match_date(match['date'])
+        if day is None:
+            skipped += 1
+            continue
+        rows.append({
+            **{column: match.get(column) for column in GAMES_COLUMNS},
+            'date': day,
+            'kickoff': match['date'],
+            'goals_for': _integer(match.get('goals_for')),
+            'goals_against': _integer(match.get('goals_against')),
+            'source': match.get('source') or None,
+        })
+
+    before = conn.total_changes
+    with conn:
+        conn.executemany(UPSERT_MATCH, rows)
+    return conn.total_changes - before, skipped
+
+@instrumented()
+def upsert_registrations(conn, registrations):
+    """
+    Insert or update playerlist rows (dicts with the CSV columns)
+
+    Events and players are upserted along with their registrations. Returns
+    (rows written in all three tables, rows skipped without event or user id).
+    """
+    events, players, rows = {}, {}, []
+    skipped = 0
+    for row in registrations:
+        event_id, user_id = _integer(row.get('event_id')), _integer(row.get('user_id'))
+        if event_id is None or user_id is None:
+            skipped += 1
+            continue
+        events[event_id] = (event_id, row.get('event_type'), event_date(row.get('event_date_start')))
+        players[user_id] = (user_id, row.get('user_name'))
+        rows.append((event_id, user_id, row.get('team_name'), row.get('user_participation')))
+
+    before = conn.total_changes
+    with conn:
+        conn.executemany(UPSERT_EVENT, events.values())
+        conn.executemany(UPSERT_PLAYER, players.values())
+        conn.executemany(UPSERT_REGISTRATION, rows)
+    return conn.total_changes - before, skipped
+
+def ingest_games_csv(conn, csv_path):
+    """Upsert every match of a games CSV (plain or batch with `source`)"""
+    with open(csv_path, 'r', newline='', encoding='utf-8') as f:
+        return upsert_matches(conn, csv.DictReader(f))
+
+def ingest_playerlist_csv(conn, csv_path, chunksize=50_000):
+    """Upsert the semicolon separated playerlist in batches of chunksize rows"""
+    written = skipped = 0
+    with open(csv_path, 'r', newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f, delimiter=';')
+        while True:
+            batch = [row for _, row in zip(range(chunksize), reader)]
+            if not batch:
+                break
+            counts = upsert_registrations(conn, batch)
+            written += counts[0]
+            skipped += counts[1]
+    return written, skipped
+
+def _categorize(df, columns):
+    for column in columns:
+        if column in df.columns:
+            df[column] = df[column].astype('category')
+    return df
+
+@instrumented()
+def read_games(conn, first_team_only=False, club=None):
+    """Games table like columnar_cache.load_games, optionally without the club's second team games"""
+    where, params = '', []
+    if first_team_only:
+        condition, params = resolve_club(club).second_team_sql()
+        where = f"WHERE NOT {condition}"
+    has_source = conn.execute('SELECT 1 FROM matches WHERE source IS NOT NULL LIMIT 1').fetchone()
+    columns = GAMES_COLUMNS + (['source'] if has_source else [])
+    with span('read_sql') as s:
+        df = pd.read_sql_query(f"SELECT {', '.join(columns)} FROM matches {where} ORDER BY date, rowid", conn,
+                               params=params)
+        s.count('rows', len(df))
+    df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d')
+    return _categorize(df, GAMES_CATEGORICALS)
+
+@instrumented()
+def read_playerlist(conn):
+    """Registrations like columnar_cache.load_playerlist, in ingestion order"""
+    with span('read_sql') as s:
+        df = pd.read_sql_query("""
+            SELECT r.event_id, e.event_type, e.event_date AS event_date_start, r.team_name, r.user_id,
+                   p.user_name, r.user_participation
+            FROM registrations r JOIN events e USING (event_id) JOIN players p USING (user_id)
+            ORDER BY r.rowid""", conn)
+        s.count('rows', len(df))
+    df['event_date_start'] = pd.to_datetime(df['event_date_start'], format='%Y-%m-%d')
+    return _categorize(df, PLAYERLIST_CATEGORICALS)
+
+def season_bounds(start_year):
+    """First day of the season and of the next one (ISO dates)"""
+    return (date(start_year, SEASON_START_MONTH, 1).isoformat(),
+            date(start_year + 1, SEASON_START_MONTH, 1).isoformat())
+
+def _season_filter(start_year):
+    """WHERE clause and parameters restricting events to one season (or none)"""
+    if start_year is None:
+        return '', ()
+    return 'WHERE e.event_date >= ? AND e.event_date < ?', season_bounds(start_year)
+
+def participation_seasons(conn):
+    """Start years of the seasons with registrations, oldest first"""
+    rows = conn.execute("""
+        SELECT DISTINCT CAST(strftime('%Y', event_date) AS INTEGER)
+               - (CAST(strftime('%m', event_date) AS INTEGER) < ?)
+        FROM events WHERE event_date IS NOT NULL ORDER BY 1""", (SEASON_START_MONTH,))
+    return [start_year for start_year, in rows]
+
+@instrumented()
+def participation_totals(conn, start_year=None):
+    """Registration and session counts in the layout of participation_payload (optionally one season)"""
+    where, params = _season_filter(start_year)
+    no_response = ', '.join('?' * len(NO_RESPONSE))
+    row = conn.execute(f"""
+        SELECT count(DISTINCT r.user_id),
+               count(DISTINCT CASE WHEN e.event_type = 'training' THEN r.event_id END),
+               count(DISTINCT CASE WHEN e.event_type = 'game' THEN r.event_id END),
+               count(*),
+               coalesce(sum(r.user_participation = 'STATUS_CONFIRMED'), 0),
+               coalesce(sum(r.user_participation = 'STATUS_REJECTED'), 0),
+               coalesce(sum(r.user_participation = 'STATUS_ABSENCE'), 0),
+               coalesce(sum(r.user_participation IN ({no_response})), 0)
+        FROM registrations r JOIN events e USING (event_id) {where}""", (*NO_RESPONSE, *params)).fetchone()
+    keys = ['unique_players', 'training_sessions', 'game_sessions', 'registrations', 'confirmed', 'rejected',
+            'absence', 'no_response']
+    return dict(zip(keys, row))
+
+@instrumented()
+def training_attendance(conn, start_year=None):
+    """Confirmed attendees per training with a date (event_id, date, confirmed_count)"""
+    where, params = _season_filter(start_year)
+    where = f"{where} AND" if where else 'WHERE'
+    df = pd.read_sql_query(f"""
+        SELECT r.event_id, e.event_date AS date, sum(r.user_participation = 'STATUS_CONFIRMED') AS confirmed_count
+        FROM registrations r JOIN events e USING (event_id)
+        {where} e.event_type = 'training' AND e.event_date IS NOT NULL
+        GROUP BY r.event_id ORDER BY r.event_id""", conn, params=params)
+    df['date'] = pd.to_datetime(df['date'], format='%Y-%m-%d')
+    return df
+
+@instrumented()
+def attendance_cube(conn, start_year=None):
+    """Attendance cube block (see attendance_cube.py) grouped in SQL"""
+    where, params = _season_filter(start_year)
+    where = f"{where} AND" if where else 'WHERE'
+    registrations = conn.execute(f"""
+        SELECT strftime('%Y-%m', e.event_date), coalesce(r.team_name, ''), coalesce(e.event_type, ''),
+               coalesce(r.user_participation, ''), count(*)
+        FROM registrations r JOIN events e USING (event_id)
+        {where} e.event_date IS NOT NULL GROUP BY 1, 2, 3, 4""", params).fetchall()
+    sessions = conn.execute(f"""
+        SELECT strftime('%Y-%m', e.event_date), coalesce(e.event_type, ''), count(*)
+        FROM events e {where} e.event_date IS NOT NULL GROUP BY 1, 2""", params).fetchall()
+    return cube_payload(pd.Series({tuple(row[:-1]): row[-1] for row in registrations}, dtype='int64'),
+                        pd.Series({tuple(row[:-1]): row[-1] for row in sessions}, dtype='int64'))
+
+def store_summary(conn):
+    """Row counts per table"""
+    return {table: conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+            for table in ('matches', 'events', 'players', 'registrations')}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Upsert matches and registrations into the SQLite store')
+    parser.add_argument('store', help='SQLite database file (created if missing)')
+    parser.add_argument('--games', nargs='*', default=[], help='games CSV(s) from extract_matches.py')
+    parser.add_argument('--html', nargs='*', default=[], help='saved DFB page(s) to extract matches from')
+    parser.add_argument('--playerlist', nargs='*', default=[], help='semicolon separated playerlist export(s)')
+    args = parser.parse_args()
+
+    with closing(connect(args.store)) as conn:
+        for path in args.games:
+            start = time.perf_counter()
+            written, skipped = ingest_games_csv(conn, path)
+            print(f"{os.path.basename(path)}: {written} matches written, {skipped} without date "
+                  f"({(time.perf_counter() - start) * 1000:.1f}ms)")
+
+        for path in args.html:
+            from extract_matches import extract_matches
+            start = time.perf_counter()
+            written, skipped = upsert_matches(conn, extract_matches(path))
+            print(f"{os.path.basename(path)}: {written} matches written "
+                  f"({(time.perf_counter() - start) * 1000:.1f}ms)")
+
+        for path in args.playerlist:
+            start = time.perf_counter()
+            written, skipped = ingest_playerlist_csv(conn, path)
+            print(f"{os.path.basename(path)}: {written} rows written, {skipped} without event/user id "
+                  f"({(time.perf_counter() - start) * 1000:.1f}ms)")
+
+        print(', '.join(f"{count} {table}" for table, count in store_summary(conn).items()))
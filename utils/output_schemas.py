@@ -0,0 +1,175 @@
+"""
+Declared layout of every website data file (checked by json_output.validate)
+
+A type name ('integer', 'number', 'string', 'boolean', 'datetime', 'any',
+'?' suffix: may be null), [item schema] for arrays, {key: schema} for
+objects ('key?' optional, '*' every other key). The charts in docs/js read
+these fields; keys not listed here may be added freely.
+"""
+
+# {window: [values]} per aggregation, as returned by rolling_stats
+ROLLING_STATS = {'*': {'*': ['number?']}}
+
+# {target points: [indices]}, as returned by downsample.level_of_detail
+LEVEL_OF_DETAIL = {'*': ['integer']}
+
+GAMES_STATS = {
+    'games': [{
+        'date?': 'datetime',  # left out of the compact layout
+        'date_str': 'string',
+        'competition': 'string?',
+        'home_team': 'string',
+        'away_team': 'string',
+        'opponent': 'string',
+        'goals_for': 'integer',
+        'goals_against': 'integer',
+        'result': 'string',
+        'result_code': 'string',
+        'points': 'integer',
+        'cumulative_points': 'integer',
+        'form': 'string',
+        'streak': 'integer',
+        'goal_difference': 'integer',
+        'goals_for_rolling': 'number?',
+        'goals_against_rolling': 'number?',
+    }],
+    'statistics': {
+        'total_games': 'integer',
+        'wins': 'integer',
+        'draws': 'integer',
+        'losses': 'integer',
+        'total_goals_for': 'integer',
+        'total_goals_against': 'integer',
+        'goal_difference': 'integer',
+        'win_percentage': 'number',
+        'average_goals_for': 'number',
+        'average_goals_against': 'number',
+        'points': 'integer',
+        'form': 'string',
+        'current_streak': 'string',
+        'longest_win_streak': 'integer',
+        'longest_unbeaten_streak': 'integer',
+    },
+    'rolling_average_data': {
+        'dates': ['string'],
+        'goals_for': ['number?'],
+        'goals_against': ['number?'],
+        'goal_difference': ['integer'],
+        'lod': LEVEL_OF_DETAIL,
+    },
+    'rolling_stats': {'*': ROLLING_STATS},
+}
+
+ATTENDANCE_CUBE = {
+    'dimensions': ['string'],
+    'labels': {'*': ['string']},
+    'shape': ['integer'],
+    'dtype': 'string',
+    'registrations': 'string',
+    'sessions': {
+        'dimensions': ['string'],
+        'shape': ['integer'],
+        'data': 'string',
+    },
+}
+
+PLAYER_PARTICIPATION = {
+    'overall_statistics': {
+        'unique_players': 'integer',
+        'total_training_sessions': 'integer',
+        'total_game_sessions': 'integer',
+        'total_events': 'integer',
+        'total_event_registrations': 'integer',
+        'total_confirmed': 'integer',
+        'total_rejected': 'integer',
+        'total_absence': 'integer',
+        'total_responses': 'integer',
+        'total_no_response': 'integer',
+        'response_rate': 'number',
+        'no_response_rate': 'number',
+        'overall_attendance_rate': 'number',
+        'avg_attendees_per_training': 'number',
+    },
+    'monthly_training_stats': {
+        'months': ['string'],
+        'training_counts': ['integer'],
+        'avg_attendees': ['number'],
+    },
+    'training_attendance_over_time': {
+        'dates': ['string'],
+        'attendees': ['integer'],
+        'rolling_avg': ['number?'],
+        'rolling_stats': ROLLING_STATS,
+        'lod': LEVEL_OF_DETAIL,
+    },
+    'attendance_cube?': ATTENDANCE_CUBE,
+}
+
+PLAYER_AVAILABILITY = {
+    'players': {
+        'ids': ['integer'],
+        'names': ['string'],
+        'teams': ['string'],
+    },
+    'events': {
+        'dates': ['string'],
+        'types': ['string'],
+    },
+    'availability': {
+        'states': ['string'],
+        'rows': 'integer',
+        'columns': 'integer',
+        'bytes_per_row': 'integer',
+        'data': 'string',
+    },
+    'attendance': {
+        'window_months': 'integer',
+        'months': ['string'],
+        'rates': [['number?']],
+    },
+}
+
+HISTORICAL_PLAYERS = {
+    'columns': ['string'],
+    'types': {'*': 'string'},
+    'data': {'$columnar': {'*': ['any']}},
+    'summary': {
+        'total_rows': 'integer',
+        'years': ['string?'],
+    },
+}
+
+COLORS = {
+    'primary': 'string',
+    'secondary': 'string',
+    'accent': 'string',
+    'highlight': 'string',
+    'all_colors': ['string'],
+}
+
+SEASON_INDEX = {
+    'current_season': 'string?',
+    'seasons': [{
+        'season': 'string',
+        'start_year': 'integer',
+        '*': {'file': 'string', 'summary': {'*': 'any'}},
+    }],
+}
+
+IMAGES = {
+    '*': {
+        'source': 'string',
+        'sha256': 'string',
+        'width': 'integer',
+        'height': 'integer',
+        'bytes': 'integer',
+        'variants': {'*': [{'width': 'integer', 'height': 'integer', 'file': 'string', 'bytes': 'integer'}]},
+        'srcset': {'*': 'string'},
+    },
+}
+
+# Season shards use the layout of the full file of their kind
+SHARD_SCHEMAS = {
+    'games': GAMES_STATS,
+    'participation': PLAYER_PARTICIPATION,
+}
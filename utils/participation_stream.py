@@ -0,0 +1,176 @@
+"""
+Out-of-core aggregation of the training/game playerlist export
+
+The club-wide export is read in chunks with only the columns the
+participation statistics need, categoricals for the repeated strings, and
+every chunk is folded into running aggregates: status counts, sets of
+player and event ids, and confirmed attendees per training. A repeated
+(event, player) registration replaces the earlier one, like in the CSV
+reader and match_store, so besides the aggregates only the team and status
+of every registration are kept (a packed key and two references, about
+24 bytes per registration) instead of the rows.
+"""
+import numpy as np
+import pandas as pd
+
+from attendance_cube import cube_payload, registration_counts
+from columnar_cache import REGISTRATION_KEY, dedupe_registrations
+from instrumentation import span
+from season_shards import season_start_years
+
+CHUNK_SIZE = 200_000
+
+USECOLS = ['event_id', 'event_type', 'event_date_start', 'team_name', 'user_id', 'user_participation']
+DTYPES = {'event_type': 'category', 'team_name': 'category', 'user_participation': 'category'}
+
+NO_RESPONSE = ['STATUS_NOT_NOMINATED', 'STATUS_NOT_CHOOSED']
+
+def read_playerlist_chunks(csv_path, chunksize=CHUNK_SIZE):
+    """Yield the playerlist in chunks of narrow columns with parsed dates"""
+    reader = pd.read_csv(csv_path, sep=';', usecols=USECOLS, dtype=DTYPES, chunksize=chunksize)
+    with reader:
+        for chunk in reader:
+            chunk['event_date_start'] = pd.to_datetime(chunk['event_date_start'], format='%d-%m-%Y',
+                                                       errors='coerce')
+            yield chunk
+
+class ParticipationAggregates:
+    """Running totals of the participation statistics, fed one chunk at a time"""
+
+    def __init__(self):
+        self.registrations = 0
+        self.status_counts = {}
+        self.players = set()
+        self.missing_player = False
+        self.training_sessions = set()
+        self.game_sessions = set()
+        # (event_id, date) -> confirmed count, for trainings with a date
+        self.training_confirmed = {}
+        # Attendance cube cells -> registrations, and (month, event_type, event_id) of dated events
+        self.cube_counts = {}
+        self.cube_events = set()
+        # Registrations counted so far: sorted packed (event_id, user_id) keys with their team and status
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.teams = np.zeros(0, dtype=object)
+        self.statuses = np.zeros(0, dtype=object)
+
+    def add(self, chunk):
+        """Fold one chunk of registrations into the aggregates"""
+        chunk = dedupe_registrations(chunk)
+        replaced = self._register(chunk)
+        self._fold(chunk)
+        if len(replaced):
+            # Take back what the earlier version of a repeated registration added
+            self._fold(replaced, sign=-1)
+
+    def _register(self, chunk):
+        """Remember the chunk's registrations; returns the earlier versions of the ones seen before"""
+        rows = chunk[chunk[REGISTRATION_KEY].notna().all(axis=1)]
+        event_ids = rows['event_id'].to_numpy(dtype=np.int64)
+        user_ids = rows['user_id'].to_numpy(dtype=np.int64)
+        if len(rows) and (event_ids.min() < 0 or event_ids.max() >= 1 << 31 or
+                          user_ids.min() < 0 or user_ids.max() >= 1 << 32):
+            raise ValueError("event_id/user_id out of range for the streaming repeat check")
+        keys = (event_ids << 32) | user_ids
+        teams = rows['team_name'].to_numpy(dtype=object)
+        statuses = rows['user_participation'].to_numpy(dtype=object)
+
+        positions = np.searchsorted(self.keys, keys)
+        found = positions < len(self.keys)
+        found[found] = self.keys[positions[found]] == keys[found]
+
+        replaced = rows[found].astype({'team_name': object, 'user_participation': object})
+        replaced['team_name'] = self.teams[positions[found]]
+        replaced['user_participation'] = self.statuses[positions[found]]
+        self.teams[positions[found]] = teams[found]
+        self.statuses[positions[found]] = statuses[found]
+
+        new = np.flatnonzero(~found)
+        new = new[np.argsort(keys[new], kind='stable')]
+        self.keys = np.insert(self.keys, positions[new], keys[new])
+        self.teams = np.insert(self.teams, positions[new], teams[new])
+        self.statuses = np.insert(self.statuses, positions[new], statuses[new])
+        return replaced
+
+    def _fold(self, chunk, sign=1):
+        """Add (sign=1) or take back (sign=-1) the counts of registrations"""
+        self.registrations += sign * len(chunk)
+        for status, count in chunk['user_participation'].value_counts().items():
+            self.status_counts[status] = self.status_counts.get(status, 0) + sign * int(count)
+        if sign < 0:
+            # Same events and players as their replacements: the id sets stay as they are
+            self._fold_counts(chunk, sign)
+            return
+
+        self.players.update(chunk['user_id'].dropna().unique().tolist())
+        self.missing_player = self.missing_player or bool(chunk['user_id'].isna().any())
+        event_type = chunk['event_type']
+        self.training_sessions.update(chunk.loc[event_type == 'training', 'event_id'].dropna().unique().tolist())
+        self.game_sessions.update(chunk.loc[event_type == 'game', 'event_id'].dropna().unique().tolist())
+
+        self._fold_counts(chunk, sign)
+        dated = chunk[chunk['event_date_start'].notna()].drop_duplicates('event_id')
+        months = dated['event_date_start'].dt.strftime('%Y-%m')
+        event_types = dated['event_type'].astype(object).where(dated['event_type'].notna(), '').astype(str)
+        self.cube_events.update(zip(months, event_types, dated['event_id']))
+
+    def _fold_counts(self, chunk, sign):
+        """Confirmed attendees per training and attendance cube cells"""
+        training = chunk[chunk['event_type'] == 'training']
+        confirmed = (training['user_participation'] == 'STATUS_CONFIRMED').groupby(
+            [training['event_id'], training['event_date_start']]).sum()
+        for key, count in confirmed.items():
+            self.training_confirmed[key] = self.training_confirmed.get(key, 0) + sign * int(count)
+
+        for key, count in registration_counts(chunk).items():
+            self.cube_counts[key] = self.cube_counts.get(key, 0) + sign * int(count)
+
+    def totals(self):
+        """Registration and session counts in the layout of participation_payload"""
+        count = self.status_counts.get
+        return {
+            # A missing user id counts as one player, like Series.unique()
+            'unique_players': len(self.players) + self.missing_player,
+            'training_sessions': len(self.training_sessions),
+            'game_sessions': len(self.game_sessions),
+            'registrations': self.registrations,
+            'confirmed': count('STATUS_CONFIRMED', 0),
+            'rejected': count('STATUS_REJECTED', 0),
+            'absence': count('STATUS_ABSENCE', 0),
+            'no_response': sum(count(status, 0) for status in NO_RESPONSE),
+        }
+
+    def training_attendance(self):
+        """Confirmed attendees per training, in the row order of a groupby over the full file"""
+        keys = sorted(self.training_confirmed)
+        return pd.DataFrame({
+            'event_id': [event_id for event_id, _ in keys],
+            'date': pd.to_datetime([date for _, date in keys]),
+            'confirmed_count': [self.training_confirmed[key] for key in keys],
+        })
+
+    def cube(self):
+        """Attendance cube block of everything added so far"""
+        sessions = {}
+        for month, event_type, _ in self.cube_events:
+            sessions[(month, event_type)] = sessions.get((month, event_type), 0) + 1
+        return cube_payload(pd.Series(self.cube_counts, dtype='int64'), pd.Series(sessions, dtype='int64'))
+
+def aggregate_playerlist(csv_path, chunksize=CHUNK_SIZE, by_season=False):
+    """
+    Stream the playerlist into ParticipationAggregates
+
+    Returns (overall, seasons) where seasons maps season start year to the
+    aggregates of that season (empty unless by_season).
+    """
+    overall = ParticipationAggregates()
+    seasons = {}
+    with span('aggregate_playerlist') as s:
+        for chunk in read_playerlist_chunks(csv_path, chunksize):
+            s.count('rows', len(chunk))
+            s.count('chunks')
+            overall.add(chunk)
+            if by_season:
+                for start_year, season_chunk in chunk.groupby(season_start_years(chunk['event_date_start'])):
+                    seasons.setdefault(int(start_year), ParticipationAggregates()).add(season_chunk)
+    return overall, dict(sorted(seasons.items()))
@@ -2,64 +2,71 @@
 Process all CSV data and generate JSON files for the website
 """
 import pandas as pd
-import json
+import sys
+from contextlib import closing
 from datetime import datetime
 
-def calculate_rolling_average(df, window=5):
-    """Calculate rolling average for goals"""
-    df['goals_for_rolling'] = df['goals_for'].rolling(window=window, min_periods=1).mean().round(2)
-    df['goals_against_rolling'] = df['goals_against'].rolling(window=window, min_periods=1).mean().round(2)
-    return df
-
-def process_games_data(csv_path, output_path):
-    """Process games data with rolling averages"""
-    print("\n=== Processing Games Data ===")
-
-    # Read CSV
-    df = pd.read_csv(csv_path)
-    print(f"Loaded {len(df)} games")
-
-    # Filter out second team games (C Klasse and "Marquartstein II")
-    second_team_mask = (
-        df['competition'].str.contains('C Klasse', case=False, na=False) |
-        df['competition'].str.contains('C-Klasse', case=False, na=False) |
-        df['home_team'].str.contains('Marquartstein II', case=False, na=False) |
-        df['away_team'].str.contains('Marquartstein II', case=False, na=False)
-    )
-    df = df[~second_team_mask]
-    print(f"After filtering second team: {len(df)} games (first team only)")
-
-    # Parse dates - format: "So. 27.07.2025 18:00"
-    # Extract just the date portion after the day abbreviation
-    df['date'] = df['date'].str.extract(r'(\d{2}\.\d{2}\.\d{4})')[0]
-    df['date'] = pd.to_datetime(df['date'], format='%d.%m.%Y')
-    df = df.sort_values('date')
-
-    # Calculate W/D/L from goals
-    def get_result_code(row):
-        if row['goals_for'] > row['goals_against']:
-            return 'W'
-        elif row['goals_for'] < row['goals_against']:
-            return 'L'
-        else:
-            return 'D'
-
-    df['result_code'] = df.apply(get_result_code, axis=1)
-
-    # Calculate rolling averages (5-game window)
-    df = calculate_rolling_average(df, window=5)
+from attendance_cube import build_cube
+from availability import build_availability_data
+from clubs import resolve_club
+from columnar_cache import load_games, load_playerlist
+from compact_output import write_compact_json
+from downsample import day_numbers, level_of_detail
+from instrumentation import instrumented, span
+from json_output import write_json
+from match_results import compute_results
+import match_store
+from output_schemas import GAMES_STATS, PLAYER_AVAILABILITY, PLAYER_PARTICIPATION
+from participation_stream import CHUNK_SIZE, aggregate_playerlist
+from rolling_stats import rolling_stats
+from season_shards import index_path, write_season_shards, write_shards
+
+# Rolling windows: the main charts use GAMES_WINDOW / TRAINING_WINDOW, the
+# others are written to the JSON so the charts can switch between them
+GAMES_WINDOW = 5
+GAMES_WINDOWS = (3, 5, 10, '30D')
+TRAINING_WINDOW = 6
+TRAINING_WINDOWS = (3, 6, 10, '30D')
+
+def calculate_rolling_stats(df, columns, windows, main_window, date_column, decimals):
+    """Multi-window rolling stats per column; the main window's mean goes to <column>_rolling"""
+    windows = tuple(dict.fromkeys((main_window,) + tuple(windows)))
+    rolling = {}
+    for column in columns:
+        rolling[column] = rolling_stats(df[column], windows=windows, dates=df[date_column], decimals=decimals)
+        df[f'{column}_rolling'] = rolling[column]['mean'][str(main_window)]
+    return rolling
+
+@instrumented()
+def build_games_data(df, windows=GAMES_WINDOWS):
+    """Build the games JSON payload from date-sorted games (first team only)"""
+    # Games without a result yet (empty goal cells) are not counted
+    played = df['goals_for'].notna() & df['goals_against'].notna()
+    df = df[played].astype({'goals_for': 'int64', 'goals_against': 'int64'})
+
+    # Calculate W/D/L, points, form and streaks from goals (vectorized)
+    results = compute_results(df['goals_for'].to_numpy(), df['goals_against'].to_numpy())
+    df['result_code'] = results['result_code']
+    df['points'] = results['points']
+    df['cumulative_points'] = results['cumulative_points']
+    df['form'] = results['form']
+    df['streak'] = results['streak']
+    totals = results['totals']
+
+    # Calculate rolling averages (5-game window, plus the other windows for the charts)
+    rolling = calculate_rolling_stats(df, ['goals_for', 'goals_against'], windows, GAMES_WINDOW, 'date', decimals=2)
 
     # Calculate additional statistics
-    df['goal_difference'] = df['goals_for'] - df['goals_against']
+    df['goal_difference'] = results['goal_difference']
 
     # Convert date to string for JSON
     df['date_str'] = df['date'].dt.strftime('%d.%m.%Y')
 
     # Overall statistics
     total_games = len(df)
-    wins = len(df[df['result_code'] == 'W'])
-    draws = len(df[df['result_code'] == 'D'])
-    losses = len(df[df['result_code'] == 'L'])
+    wins = totals['wins']
+    draws = totals['draws']
+    losses = totals['losses']
     total_goals_for = df['goals_for'].sum()
     total_goals_against = df['goals_against'].sum()
 
@@ -67,121 +74,190 @@ def process_games_data(csv_path, output_path):
     games_data = {
         'games': df.to_dict('records'),
         'statistics': {
-            'total_games': int(total_games),
-            'wins': int(wins),
-            'draws': int(draws),
-            'losses': int(losses),
-            'total_goals_for': int(total_goals_for),
-            'total_goals_against': int(total_goals_against),
-            'goal_difference': int(total_goals_for - total_goals_against),
+            'total_games': total_games,
+            'wins': wins,
+            'draws': draws,
+            'losses': losses,
+            'total_goals_for': total_goals_for,
+            'total_goals_against': total_goals_against,
+            'goal_difference': total_goals_for - total_goals_against,
             'win_percentage': round(wins / total_games * 100, 1) if total_games > 0 else 0,
             'average_goals_for': round(total_goals_for / total_games, 2) if total_games > 0 else 0,
-            'average_goals_against': round(total_goals_against / total_games, 2) if total_games > 0 else 0
+            'average_goals_against': round(total_goals_against / total_games, 2) if total_games > 0 else 0,
+            'points': totals['points'],
+            'form': totals['form'],
+            'current_streak': totals['current_streak'],
+            'longest_win_streak': totals['longest_win_streak'],
+            'longest_unbeaten_streak': totals['longest_unbeaten_streak']
         },
         'rolling_average_data': {
             'dates': df['date_str'].tolist(),
             'goals_for': df['goals_for_rolling'].tolist(),
             'goals_against': df['goals_against_rolling'].tolist(),
-            'goal_difference': df['goal_difference'].tolist()
-        }
+            'goal_difference': df['goal_difference'].tolist(),
+            # Downsampled variants for small screens: {target points: indices into the arrays above}
+            'lod': level_of_detail(day_numbers(df['date']), [df['goals_for_rolling'], df['goals_against_rolling']])
+        },
+        'rolling_stats': rolling
     }
 
-    # Save to JSON
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(games_data, f, indent=2, ensure_ascii=False, default=str)
-
-    print(f"Games data saved to {output_path}")
-    print(f"Statistics: {wins}W-{draws}D-{losses}L")
-    print(f"Goals: {total_goals_for} for, {total_goals_against} against")
-
     return games_data
 
-def process_player_participation(csv_path, output_path, anonymize=True):
-    """Process player participation data with optional anonymization"""
-    print("\n=== Processing Player Participation Data ===")
-
-    # Read CSV with semicolon delimiter
-    df = pd.read_csv(csv_path, sep=';')
-    print(f"Loaded {len(df)} participation records")
+@instrumented()
+def process_games_data(csv_path, output_path, compact=False, shard_dir=None, cache_dir=None, store_path=None,
+                       club=None):
+    """
+    Process games data with rolling averages
 
-    # Parse dates - format: "17-11-2025"
-    df['event_date_start'] = pd.to_datetime(df['event_date_start'], format='%d-%m-%Y', errors='coerce')
+    With store_path the first team games are read from the SQLite store
+    (see match_store.py) instead of the CSV. club: config dict with the
+    second team rules (default: clubs.DEFAULT_CLUB).
+    """
+    print("\n=== Processing Games Data ===")
+    club = resolve_club(club)
+
+    if store_path:
+        with span('load_games') as s, closing(match_store.connect(store_path)) as conn:
+            df = match_store.read_games(conn, first_team_only=True, club=club)
+            s.count('rows', len(df))
+        print(f"Loaded {len(df)} first team games from {store_path}")
+    else:
+        # Read CSV (dates parsed, served from the Parquet cache if available)
+        with span('load_games') as s:
+            df = load_games(csv_path, cache_dir=cache_dir)
+            s.count('rows', len(df))
+        print(f"Loaded {len(df)} games")
+
+        # Filter out second team games (e.g. C Klasse and "Marquartstein II")
+        df = df[~club.second_team_mask(df)]
+        print(f"After filtering second team: {len(df)} games (first team only)")
 
-    # Create anonymization mapping if needed
-    player_name_map = {}
-    if anonymize:
-        unique_ids = sorted(df['user_id'].unique())
-        for idx, user_id in enumerate(unique_ids, 1):
-            player_name_map[user_id] = f"Spieler {idx}"
-        print(f"Anonymizing {len(player_name_map)} players")
+    df = df.sort_values('date')
 
-    # Calculate statistics per player
-    player_stats = []
+    games_data = build_games_data(df)
+    stats = games_data['statistics']
 
-    for user_id in df['user_id'].unique():
-        player_data = df[df['user_id'] == user_id]
-        real_name = player_data['user_name'].iloc[0]
-        player_name = player_name_map.get(user_id, real_name) if anonymize else real_name
-        team_name = player_data['team_name'].iloc[0]
+    # Save to JSON
+    if compact:
+        # Columnar layout; the full 'date' timestamp is dropped since date_str carries the day
+        games = [{key: value for key, value in game.items() if key != 'date'} for game in games_data['games']]
+        write_compact_json({**games_data, 'games': games}, output_path, schema=GAMES_STATS)
+    else:
+        with span('write_json'):
+            write_json(games_data, output_path, schema=GAMES_STATS)
 
-        # Count participation types
-        confirmed = len(player_data[player_data['user_participation'] == 'STATUS_CONFIRMED'])
-        rejected = len(player_data[player_data['user_participation'] == 'STATUS_REJECTED'])
-        absent = len(player_data[player_data['user_participation'] == 'STATUS_ABSENCE'])
+    print(f"Games data saved to {output_path}")
+    print(f"Statistics: {stats['wins']}W-{stats['draws']}D-{stats['losses']}L")
+    print(f"Goals: {stats['total_goals_for']} for, {stats['total_goals_against']} against")
 
-        # Separate training and games
-        training_events = player_data[player_data['event_type'] == 'training']
-        game_events = player_data[player_data['event_type'] == 'game']
+    if shard_dir:
+        write_season_shards('games', df, 'date', build_games_data, shard_dir,
+                            summarize=lambda data: data['statistics'], compact=compact)
 
-        training_confirmed = len(training_events[training_events['user_participation'] == 'STATUS_CONFIRMED'])
-        games_confirmed = len(game_events[game_events['user_participation'] == 'STATUS_CONFIRMED'])
+    return games_data
 
-        total_events = len(player_data)
-        attendance_rate = round(confirmed / total_events * 100, 1) if total_events > 0 else 0
+@instrumented()
+def build_player_stats(df, anonymize=True):
+    """Aggregate per-player participation counts in a single groupby pass"""
+    status = df['user_participation']
+    confirmed = status == 'STATUS_CONFIRMED'
+
+    # One boolean column per counter, summed per player (first-seen order)
+    counts = pd.DataFrame({
+        'user_id': df['user_id'],
+        'total_events': 1,
+        'confirmed': confirmed,
+        'rejected': status == 'STATUS_REJECTED',
+        'absent': status == 'STATUS_ABSENCE',
+        'training_confirmed': confirmed & (df['event_type'] == 'training'),
+        'games_confirmed': confirmed & (df['event_type'] == 'game'),
+    }).groupby('user_id', sort=False, dropna=False).sum()
+
+    # Name and team come from each player's first record
+    first_rows = df.drop_duplicates('user_id').set_index('user_id').reindex(counts.index)
+    names = first_rows['user_name'].tolist()
+    teams = first_rows['team_name'].tolist()
+
+    # Anonymized ids are sequential numbers over the sorted user ids
+    anon_ids = {}
+    if anonymize:
+        anon_ids = {user_id: idx for idx, user_id in enumerate(sorted(counts.index), 1)}
 
-        # Anonymize user_id as well (just use sequential numbers)
-        anon_user_id = list(player_name_map.keys()).index(user_id) + 1 if anonymize else int(user_id)
+    player_stats = []
+    for user_id, name, team, row in zip(counts.index, names, teams, counts.itertuples(index=False)):
+        total_events = int(row.total_events)
+        confirmed_count = int(row.confirmed)
+        if anonymize:
+            player_id = anon_ids[user_id]
+            player_name = f"Spieler {player_id}"
+        else:
+            player_id = int(user_id)
+            player_name = name
 
         player_stats.append({
-            'user_id': anon_user_id,
+            'user_id': player_id,
             'user_name': player_name,
-            'team_name': team_name,
-            'total_events': int(total_events),
-            'confirmed': int(confirmed),
-            'rejected': int(rejected),
-            'absent': int(absent),
-            'training_confirmed': int(training_confirmed),
-            'games_confirmed': int(games_confirmed),
-            'attendance_rate': attendance_rate
+            'team_name': team,
+            'total_events': total_events,
+            'confirmed': confirmed_count,
+            'rejected': int(row.rejected),
+            'absent': int(row.absent),
+            'training_confirmed': int(row.training_confirmed),
+            'games_confirmed': int(row.games_confirmed),
+            'attendance_rate': round(confirmed_count / total_events * 100, 1) if total_events > 0 else 0
         })
 
     # Sort by attendance rate
     player_stats.sort(key=lambda x: x['attendance_rate'], reverse=True)
+    return player_stats
+
+def participation_totals(df):
+    """Registration and session counts of the participation records"""
+    status = df['user_participation']
+    return {
+        'unique_players': len(df['user_id'].unique()),
+        'training_sessions': df[df['event_type'] == 'training']['event_id'].nunique(),
+        'game_sessions': df[df['event_type'] == 'game']['event_id'].nunique(),
+        'registrations': len(df),
+        'confirmed': int((status == 'STATUS_CONFIRMED').sum()),
+        'rejected': int((status == 'STATUS_REJECTED').sum()),
+        'absence': int((status == 'STATUS_ABSENCE').sum()),
+        # STATUS_NOT_NOMINATED or STATUS_NOT_CHOOSED means didn't respond
+        'no_response': int(status.isin(['STATUS_NOT_NOMINATED', 'STATUS_NOT_CHOOSED']).sum()),
+    }
 
-    # Calculate aggregate statistics
-    total_events = len(df)
-    total_confirmed = len(df[df['user_participation'] == 'STATUS_CONFIRMED'])
-    total_rejected = len(df[df['user_participation'] == 'STATUS_REJECTED'])
-    total_absence = len(df[df['user_participation'] == 'STATUS_ABSENCE'])
+def training_attendance_table(df):
+    """Confirmed attendees per training session (event_id, date, confirmed_count)"""
+    training_df = df[df['event_type'] == 'training']
+    training_attendance = training_df.groupby(['event_id', 'event_date_start']).agg({
+        'user_participation': lambda x: (x == 'STATUS_CONFIRMED').sum()
+    }).reset_index()
+    training_attendance.columns = ['event_id', 'date', 'confirmed_count']
+    return training_attendance
 
-    # Calculate non-responses (STATUS_NOT_NOMINATED or STATUS_NOT_CHOOSED means didn't respond)
-    total_no_response = len(df[df['user_participation'].isin(['STATUS_NOT_NOMINATED', 'STATUS_NOT_CHOOSED'])])
-    total_responses = total_confirmed + total_rejected + total_absence
+def participation_payload(totals, training_attendance, cube=None):
+    """
+    Build the participation JSON payload from participation_totals and training_attendance_table
+
+    cube: attendance cube block (see attendance_cube.py) added as 'attendance_cube'.
+    """
+    # Calculate aggregate statistics
+    total_events = totals['registrations']
+    total_confirmed = totals['confirmed']
+    total_no_response = totals['no_response']
+    total_responses = total_confirmed + totals['rejected'] + totals['absence']
 
     # Get unique training and game sessions
-    unique_training_sessions = df[df['event_type'] == 'training']['event_id'].nunique()
-    unique_game_sessions = df[df['event_type'] == 'game']['event_id'].nunique()
+    unique_training_sessions = totals['training_sessions']
+    unique_game_sessions = totals['game_sessions']
 
     # Calculate average attendance per training over time
-    training_df = df[df['event_type'] == 'training'].copy()
-    training_attendance = training_df.groupby(['event_id', 'event_date_start']).agg({
-        'user_participation': lambda x: (x == 'STATUS_CONFIRMED').sum()
-    }).reset_index()
-    training_attendance.columns = ['event_id', 'date', 'confirmed_count']
     training_attendance = training_attendance.sort_values('date')
 
-    # Calculate rolling average (6-session window)
-    training_attendance['rolling_avg'] = training_attendance['confirmed_count'].rolling(window=6, min_periods=1).mean().round(1)
+    # Calculate rolling average (6-session window, plus the other windows for the charts)
+    rolling = calculate_rolling_stats(training_attendance, ['confirmed_count'], TRAINING_WINDOWS, TRAINING_WINDOW,
+                                      'date', decimals=1)
+    training_attendance['rolling_avg'] = training_attendance.pop('confirmed_count_rolling')
 
     # Monthly aggregation
     training_attendance['month'] = training_attendance['date'].dt.to_period('M').astype(str)
@@ -193,16 +269,16 @@ def process_player_participation(csv_path, output_path, anonymize=True):
 
     participation_data = {
         'overall_statistics': {
-            'unique_players': len(df['user_id'].unique()),
-            'total_training_sessions': int(unique_training_sessions),
-            'total_game_sessions': int(unique_game_sessions),
-            'total_events': int(unique_training_sessions + unique_game_sessions),
-            'total_event_registrations': int(total_events),
-            'total_confirmed': int(total_confirmed),
-            'total_rejected': int(total_rejected),
-            'total_absence': int(total_absence),
-            'total_responses': int(total_responses),
-            'total_no_response': int(total_no_response),
+            'unique_players': totals['unique_players'],
+            'total_training_sessions': unique_training_sessions,
+            'total_game_sessions': unique_game_sessions,
+            'total_events': unique_training_sessions + unique_game_sessions,
+            'total_event_registrations': total_events,
+            'total_confirmed': total_confirmed,
+            'total_rejected': totals['rejected'],
+            'total_absence': totals['absence'],
+            'total_responses': total_responses,
+            'total_no_response': total_no_response,
             'response_rate': round(total_responses / total_events * 100, 1) if total_events > 0 else 0,
             'no_response_rate': round(total_no_response / total_events * 100, 1) if total_events > 0 else 0,
             'overall_attendance_rate': round(total_confirmed / total_events * 100, 1) if total_events > 0 else 0,
@@ -216,21 +292,142 @@ def process_player_participation(csv_path, output_path, anonymize=True):
         'training_attendance_over_time': {
             'dates': [d.strftime('%d.%m.%Y') if pd.notna(d) else '' for d in training_attendance['date']],
             'attendees': training_attendance['confirmed_count'].tolist(),
-            'rolling_avg': training_attendance['rolling_avg'].tolist()
+            'rolling_avg': training_attendance['rolling_avg'].tolist(),
+            'rolling_stats': rolling['confirmed_count'],
+            'lod': level_of_detail(day_numbers(training_attendance['date']),
+                                   [training_attendance['confirmed_count'], training_attendance['rolling_avg']])
         }
     }
+    if cube is not None:
+        participation_data['attendance_cube'] = cube
+
+    return participation_data
+
+@instrumented()
+def build_participation_data(df):
+    """Build the participation JSON payload from registrations with parsed dates"""
+    return participation_payload(participation_totals(df), training_attendance_table(df), build_cube(df))
+
+@instrumented()
+def process_player_participation(csv_path, output_path, anonymize=True, compact=False, shard_dir=None,
+                                 cache_dir=None, chunksize=None, availability_path=None, store_path=None):
+    """
+    Process player participation data with optional anonymization
+
+    With chunksize the CSV is streamed in chunks of that many rows and folded
+    into running aggregates, so memory stays bounded for club-wide exports.
+    With store_path the statistics are aggregated in the SQLite store
+    instead (see match_store.py). availability_path additionally gets the
+    player x event availability matrix and per-player attendance (not in
+    chunked mode).
+    """
+    print("\n=== Processing Player Participation Data ===")
+
+    if store_path:
+        return process_player_participation_store(store_path, output_path, anonymize=anonymize, compact=compact,
+                                                  shard_dir=shard_dir, availability_path=availability_path)
+    if chunksize:
+        return process_player_participation_chunked(csv_path, output_path, compact=compact, shard_dir=shard_dir,
+                                                    chunksize=chunksize)
+
+    # Read CSV with semicolon delimiter (dates parsed, served from the Parquet cache if available)
+    with span('load_playerlist') as s:
+        df = load_playerlist(csv_path, cache_dir=cache_dir)
+        s.count('rows', len(df))
+    print(f"Loaded {len(df)} participation records")
+
+    if anonymize:
+        print(f"Anonymizing {df['user_id'].nunique()} players")
+
+    # Calculate statistics per player
+    player_stats = build_player_stats(df, anonymize=anonymize)
+
+    participation_data = build_participation_data(df)
+    write_participation_json(participation_data, output_path, compact=compact)
 
+    if availability_path:
+        write_availability_json(df, availability_path, anonymize=anonymize, compact=compact)
+
+    if shard_dir:
+        write_season_shards('participation', df, 'event_date_start', build_participation_data, shard_dir,
+                            summarize=lambda data: data['overall_statistics'], compact=compact)
+
+    return participation_data
+
+@instrumented()
+def process_player_participation_chunked(csv_path, output_path, compact=False, shard_dir=None,
+                                         chunksize=CHUNK_SIZE):
+    """Streaming variant of process_player_participation (no per-player statistics)"""
+    overall, seasons = aggregate_playerlist(csv_path, chunksize=chunksize, by_season=bool(shard_dir))
+    print(f"Streamed {overall.registrations} participation records in chunks of {chunksize}")
+
+    participation_data = participation_payload(overall.totals(), overall.training_attendance(), overall.cube())
+    write_participation_json(participation_data, output_path, compact=compact)
+
+    if shard_dir:
+        payloads = ((start_year, participation_payload(season.totals(), season.training_attendance(), season.cube()))
+                    for start_year, season in seasons.items())
+        write_shards('participation', payloads, shard_dir,
+                     summarize=lambda data: data['overall_statistics'], compact=compact)
+
+    return participation_data
+
+@instrumented()
+def process_player_participation_store(store_path, output_path, anonymize=True, compact=False, shard_dir=None,
+                                       availability_path=None):
+    """Variant of process_player_participation aggregating in the SQLite store"""
+    with closing(match_store.connect(store_path)) as conn:
+        totals = match_store.participation_totals(conn)
+        print(f"Aggregated {totals['registrations']} participation records in {store_path}")
+
+        participation_data = participation_payload(totals, match_store.training_attendance(conn),
+                                                   match_store.attendance_cube(conn))
+        write_participation_json(participation_data, output_path, compact=compact)
+
+        if availability_path:
+            # The matrix needs every registration
+            write_availability_json(match_store.read_playerlist(conn), availability_path, anonymize=anonymize,
+                                    compact=compact)
+
+        if shard_dir:
+            payloads = ((start_year, participation_payload(match_store.participation_totals(conn, start_year),
+                                                           match_store.training_attendance(conn, start_year),
+                                                           match_store.attendance_cube(conn, start_year)))
+                        for start_year in match_store.participation_seasons(conn))
+            write_shards('participation', payloads, shard_dir,
+                         summarize=lambda data: data['overall_statistics'], compact=compact)
+
+    return participation_data
+
+def write_availability_json(df, output_path, anonymize=True, compact=False):
+    """Save the player x event availability matrix and per-player attendance"""
+    availability_data = build_availability_data(df, anonymize=anonymize)
+    if compact:
+        write_compact_json(availability_data, output_path, schema=PLAYER_AVAILABILITY)
+    else:
+        with span('write_json'):
+            write_json(availability_data, output_path, schema=PLAYER_AVAILABILITY)
+    matrix = availability_data['availability']
+    print(f"Availability matrix ({matrix['rows']} players x {matrix['columns']} events) "
+          f"saved to {output_path}")
+
+def write_participation_json(participation_data, output_path, compact=False):
+    """Save the participation payload and print its headline numbers"""
     # Save to JSON
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(participation_data, f, indent=2, ensure_ascii=False)
+    if compact:
+        write_compact_json(participation_data, output_path, schema=PLAYER_PARTICIPATION)
+    else:
+        with span('write_json'):
+            write_json(participation_data, output_path, schema=PLAYER_PARTICIPATION)
 
     print(f"Player participation data saved to {output_path}")
-    print(f"Unique players: {len(df['user_id'].unique())}")
+    print(f"Unique players: {participation_data['overall_statistics']['unique_players']}")
     print(f"Overall attendance rate: {participation_data['overall_statistics']['overall_attendance_rate']}%")
 
-    return participation_data
-
 if __name__ == '__main__':
+    from build_manifest import code_inputs, run_step
+    from instrumentation import profile_option, session
+
     # File paths
     games_csv = '/home/shell/test_fb/data/games_first_second_team_friendlies.csv'
     player_csv = '/home/shell/test_fb/data/training_game_playerlist.csv'
@@ -238,12 +435,45 @@ if __name__ == '__main__':
     games_output = '/home/shell/test_fb/docs/assets/data/games_stats.json'
     player_output = '/home/shell/test_fb/docs/assets/data/player_participation.json'
 
-    # Process all data
-    print("Starting data processing...")
-
-    games_data = process_games_data(games_csv, games_output)
-    player_data = process_player_participation(player_csv, player_output)
-
-    print("\n=== All Data Processing Complete! ===")
-    print(f"Games data: {games_output}")
-    print(f"Player data: {player_output}")
+    manifest_path = '/home/shell/test_fb/data/build_manifest.json'
+    force = '--force' in sys.argv
+    compact = '--compact' in sys.argv
+    shard_dir = '/home/shell/test_fb/docs/assets/data/seasons' if '--shards' in sys.argv else None
+    cache_dir = '/home/shell/test_fb/data/cache'
+    # --chunked: stream the playerlist instead of loading it (for club-wide exports)
+    chunksize = CHUNK_SIZE if '--chunked' in sys.argv else None
+    # The availability matrix needs the whole playerlist in memory
+    availability_output = None if chunksize else '/home/shell/test_fb/docs/assets/data/player_availability.json'
+    # --store: read from the SQLite store filled by match_store.py instead of the CSVs
+    store_path = '/home/shell/test_fb/data/club.sqlite' if '--store' in sys.argv else None
+
+    games_outputs = [games_output]
+    player_outputs = [player_output] + ([availability_output] if availability_output else [])
+    if shard_dir:
+        # The season index is merged from one entries file per kind
+        games_outputs += [index_path(shard_dir), index_path(shard_dir, 'games')]
+        player_outputs += [index_path(shard_dir), index_path(shard_dir, 'participation')]
+
+    with session('process_all_data', profile=profile_option()):
+        # Process all data (steps with unchanged inputs are skipped)
+        print("Starting data processing...")
+
+        games_data = run_step(
+            manifest_path, 'games_stats', process_games_data,
+            inputs=code_inputs(__file__) + [store_path or games_csv], outputs=games_outputs,
+            params={'csv_path': games_csv, 'output_path': games_output, 'compact': compact,
+                    'shard_dir': shard_dir, 'cache_dir': cache_dir, 'store_path': store_path},
+            force=force
+        )
+        player_data = run_step(
+            manifest_path, 'player_participation', process_player_participation,
+            inputs=code_inputs(__file__) + [store_path or player_csv], outputs=player_outputs,
+            params={'csv_path': player_csv, 'output_path': player_output, 'anonymize': True,
+                    'compact': compact, 'shard_dir': shard_dir, 'cache_dir': cache_dir, 'chunksize': chunksize,
+                    'availability_path': availability_output, 'store_path': store_path},
+            force=force
+        )
+
+        print("\n=== All Data Processing Complete! ===")
+        print(f"Games data: {games_output}")
+        print(f"Player data: {player_output}")
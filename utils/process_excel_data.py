@@ -1,45 +1,65 @@
 """
 Process Excel file containing 10-year historical player count data
 """
-import pandas as pd
-import json
+import sys
 
-def process_excel_to_json(excel_path, output_path):
-    """Convert Excel historical data to JSON format"""
-
-    # Read the Excel file
-    df = pd.read_excel(excel_path)
-
-    print("Excel file columns:", df.columns.tolist())
-    print("\nFirst few rows:")
-    print(df.head())
-    print(f"\nTotal rows: {len(df)}")
+from columnar_cache import load_excel
+from compact_output import COLUMNAR_KEY, write_compact_json
+from excel_ingest import SEASON_COLUMN, column_type, column_values
+from instrumentation import instrumented, span
+from json_output import write_json
+from output_schemas import HISTORICAL_PLAYERS
 
-    # Replace NaN values with None for valid JSON
-    df = df.fillna(0)
-
-    # Convert to dictionary format suitable for web charts
-    data = {
+def historical_payload(df):
+    """Typed, column-oriented payload of the cleaned historical table"""
+    seasons = column_values(df[SEASON_COLUMN]) if SEASON_COLUMN in df.columns else []
+    return {
         'columns': df.columns.tolist(),
-        'data': df.to_dict('records'),
+        'types': {column: column_type(df[column]) for column in df.columns},
+        'data': {COLUMNAR_KEY: {column: column_values(df[column]) for column in df.columns}},
         'summary': {
             'total_rows': len(df),
-            'years': df.columns.tolist() if 'year' not in str(df.columns[0]).lower() else df.iloc[:, 0].tolist()
+            'years': seasons
         }
     }
 
-    # Save to JSON (replace NaN with null)
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False, allow_nan=False, default=str)
+@instrumented()
+def process_excel_to_json(excel_path, output_path, compact=False, cache_dir=None):
+    """Convert Excel historical data to JSON format"""
 
-    print(f"\nData saved to {output_path}")
+    # Read the Excel file (served from the Parquet cache if available)
+    df = load_excel(excel_path, cache_dir=cache_dir)
+    print(f"Loaded {len(df)} seasons, columns: {', '.join(df.columns)}")
+
+    # Column-oriented payload; the website expands it into row records
+    data = historical_payload(df)
+
+    # Save to JSON
+    if compact:
+        write_compact_json(data, output_path, schema=HISTORICAL_PLAYERS)
+    else:
+        with span('write_json'):
+            write_json(data, output_path, schema=HISTORICAL_PLAYERS)
+
+    print(f"Data saved to {output_path}")
     return data
 
 if __name__ == '__main__':
+    from build_manifest import code_inputs, run_step
+    from instrumentation import profile_option, session
+
     excel_path = '/home/shell/test_fb/data/First_Second_A_youth_playerscount_years.xlsx'
     output_path = '/home/shell/test_fb/docs/assets/data/historical_players.json'
+    manifest_path = '/home/shell/test_fb/data/build_manifest.json'
 
-    print("Processing Excel file...")
-    data = process_excel_to_json(excel_path, output_path)
+    with session('process_excel_data', profile=profile_option()):
+        print("Processing Excel file...")
+        data = run_step(
+            manifest_path, 'historical_players', process_excel_to_json,
+            inputs=code_inputs(__file__) + [excel_path], outputs=[output_path],
+            params={'excel_path': excel_path, 'output_path': output_path, 'compact': '--compact' in sys.argv,
+                    'cache_dir': '/home/shell/test_fb/data/cache'},
+            force='--force' in sys.argv
+        )
 
-    print("\nProcessing complete!")
+        print("\nProcessing complete!")
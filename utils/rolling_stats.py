@@ -0,0 +1,85 @@
+"""
+Rolling statistics over several windows in one pass
+
+Count windows (e.g. 5 = the last five games) and time windows (e.g. '30D')
+are computed from a single cumulative sum of the series, so adding windows
+costs one subtraction per window rather than another pandas rolling call.
+Every window behaves like pandas rolling(..., min_periods=1): early values
+average over the games seen so far, missing values are skipped and a window
+without any value is None. EWMA uses span=N for count windows and
+halflife=N for time windows.
+"""
+import numpy as np
+import pandas as pd
+
+DEFAULT_WINDOWS = (3, 5, 10, '30D')
+DEFAULT_AGGREGATIONS = ('mean', 'ewm', 'sum')
+
+def _window_starts(n, window, dates=None):
+    """Index of the first element inside the window ending at each position"""
+    if isinstance(window, str):
+        # (t - window, t], like pandas' time-based rolling
+        offset = pd.Timedelta(window).to_timedelta64()
+        return np.searchsorted(dates, dates - offset, side='right')
+    return np.maximum(np.arange(n) - int(window) + 1, 0)
+
+def _ewm(values, window, dates=None):
+    """Exponentially weighted mean for one window"""
+    series = pd.Series(values)
+    if isinstance(window, str):
+        return series.ewm(halflife=pd.Timedelta(window), times=pd.DatetimeIndex(dates)).mean().to_numpy()
+    return series.ewm(span=int(window), min_periods=1).mean().to_numpy()
+
+def _to_list(values, decimals):
+    """Rounded JSON-ready list (NaN becomes None)"""
+    rounded = np.round(values, decimals)
+    return [None if np.isnan(value) else value for value in rounded.tolist()]
+
+def rolling_stats(values, windows=DEFAULT_WINDOWS, aggregations=DEFAULT_AGGREGATIONS, dates=None, decimals=2):
+    """
+    Compute {aggregation: {window: [values]}} for a series in chronological order
+
+    Time windows need `dates` (sorted ascending); positions without a date
+    get None for those windows.
+    """
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    n = len(values)
+
+    if dates is not None:
+        dates = np.asarray(pd.to_datetime(dates), dtype='datetime64[ns]')
+        dated = ~np.isnat(dates)
+    elif any(isinstance(window, str) for window in windows):
+        raise ValueError("Time-based windows need dates")
+
+    result = {aggregation: {} for aggregation in aggregations}
+    for window in windows:
+        key = str(window)
+        sums = np.full(n, np.nan)
+        means = np.full(n, np.nan)
+        ewm = np.full(n, np.nan)
+
+        # Time windows are computed over the dated positions only
+        mask = dated if isinstance(window, str) else np.ones(n, dtype=bool)
+        subset = values[mask]
+        subset_dates = dates[mask] if isinstance(window, str) else None
+
+        if len(subset):
+            # NaN-aware: sums of the valid values and how many there are per window
+            valid = ~np.isnan(subset)
+            cumulative = np.concatenate(([0.0], np.cumsum(np.where(valid, subset, 0.0))))
+            cumulative_counts = np.concatenate(([0], np.cumsum(valid)))
+            positions = np.arange(len(subset))
+            starts = _window_starts(len(subset), window, subset_dates)
+            window_sums = cumulative[positions + 1] - cumulative[starts]
+            window_counts = cumulative_counts[positions + 1] - cumulative_counts[starts]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                sums[mask] = np.where(window_counts > 0, window_sums, np.nan)
+                means[mask] = window_sums / window_counts
+            if 'ewm' in aggregations:
+                ewm[mask] = _ewm(subset, window, subset_dates)
+
+        computed = {'sum': sums, 'mean': means, 'ewm': ewm}
+        for aggregation in aggregations:
+            result[aggregation][key] = _to_list(computed[aggregation], decimals)
+
+    return result
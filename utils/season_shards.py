@@ -0,0 +1,136 @@
+"""
+Split games and participation output into per-season shard files
+
+Shards are named like games_25-26.json / participation_25-26.json and use
+the same layout as the full files. index.json lists every season with the
+shard file names and a small summary, so the website can load the current
+season first and fetch older seasons on demand. Each kind also keeps its own
+entries in index_<kind>.json, from which index.json is merged: a step whose
+outputs are unchanged is skipped without losing its part of the index.
+"""
+import glob
+import json
+import os
+import re
+
+from build_manifest import locked
+from compact_output import write_compact_json
+from instrumentation import instrumented
+from json_output import write_json
+from output_schemas import SEASON_INDEX, SHARD_SCHEMAS
+
+# A football season runs from July to June ("25/26")
+SEASON_START_MONTH = 7
+
+INDEX_FILE = 'index.json'
+
+def season_start_years(dates):
+    """Calendar year in which each date's season started (NaN for missing dates)"""
+    return dates.dt.year.where(dates.dt.month >= SEASON_START_MONTH, dates.dt.year - 1)
+
+def season_label(start_year):
+    """Season label as used in historical_players.json, e.g. 2025 -> '25/26'"""
+    start_year = int(start_year)
+    return f"{start_year % 100:02d}/{(start_year + 1) % 100:02d}"
+
+def shard_filename(kind, season):
+    """File name of one season shard, e.g. ('games', '25/26') -> 'games_25-26.json'"""
+    return f"{kind}_{season.replace('/', '-')}.json"
+
+def _write_json(data, output_path, compact=False, schema=None):
+    """Write a shard in the same format as the full output file"""
+    if compact:
+        write_compact_json(data, output_path, schema=schema)
+    else:
+        write_json(data, output_path, schema=schema)
+
+def index_path(shard_dir, kind=None):
+    """Path of index.json, or of the entries of one kind (outputs of the steps that write shards)"""
+    return os.path.join(shard_dir, f"index_{kind}.json" if kind else INDEX_FILE)
+
+def _load_entries(shard_dir):
+    """{kind: {start_year: entry}} from the index_<kind>.json files"""
+    entries = {}
+    for path in glob.glob(os.path.join(shard_dir, 'index_*.json')):
+        kind = re.fullmatch(r"index_(\w+)\.json", os.path.basename(path)).group(1)
+        with open(path, 'r', encoding='utf-8') as f:
+            entries[kind] = {int(start_year): entry for start_year, entry in json.load(f).items()}
+    return entries
+
+def load_index(shard_dir):
+    """Load index.json, or an empty index if there is none yet"""
+    try:
+        with open(index_path(shard_dir), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'current_season': None, 'seasons': []}
+
+def update_index(shard_dir, kind, entries):
+    """
+    Replace the `kind` entries of index.json with {start_year: entry}
+
+    The games and participation steps may run at the same time (build.py),
+    so the read-modify-write happens under the index lock.
+    """
+    with locked(index_path(shard_dir)):
+        write_json({str(start_year): entry for start_year, entry in entries.items()}, index_path(shard_dir, kind))
+        index = load_index(shard_dir)
+        seasons = {season['start_year']: season for season in index['seasons']}
+
+        # Every kind with an entries file replaces its part (shards that no longer exist are dropped)
+        for entry_kind, kind_entries in _load_entries(shard_dir).items():
+            for season in seasons.values():
+                season.pop(entry_kind, None)
+            for start_year, entry in kind_entries.items():
+                seasons.setdefault(start_year, {'season': season_label(start_year), 'start_year': start_year})
+                seasons[start_year][entry_kind] = entry
+
+        # Newest season first; seasons without any shard left are removed
+        ordered = [season for _, season in sorted(seasons.items(), reverse=True) if len(season) > 2]
+        index = {
+            'current_season': ordered[0]['season'] if ordered else None,
+            'seasons': ordered
+        }
+
+        write_json(index, index_path(shard_dir), schema=SEASON_INDEX)
+    return index
+
+@instrumented()
+def write_shards(kind, payloads, shard_dir, summarize, compact=False):
+    """
+    Write one shard per (start_year, payload) pair and register them in index.json
+
+    summarize(payload) returns the summary statistics stored in the index.
+    """
+    os.makedirs(shard_dir, exist_ok=True)
+
+    entries = {}
+    for start_year, data in payloads:
+        start_year = int(start_year)
+        filename = shard_filename(kind, season_label(start_year))
+
+        _write_json(data, os.path.join(shard_dir, filename), compact=compact, schema=SHARD_SCHEMAS.get(kind))
+        entries[start_year] = {'file': filename, 'summary': summarize(data)}
+
+    index = update_index(shard_dir, kind, entries)
+
+    # Shards of seasons no longer in the data (plus their .gz/.br copies)
+    current = {entry['file'] for entry in entries.values()}
+    for path in glob.glob(os.path.join(shard_dir, f"{kind}_*.json*")):
+        match = re.fullmatch(rf"({kind}_\d{{2}}-\d{{2}}\.json)(\.gz|\.br)?", os.path.basename(path))
+        if match and match.group(1) not in current:
+            os.remove(path)
+
+    print(f"Wrote {len(entries)} {kind} season shards to {shard_dir} (current: {index['current_season']})")
+    return entries
+
+def write_season_shards(kind, df, date_column, build, shard_dir, summarize, compact=False):
+    """
+    Split df by season and write one shard per season
+
+    build(season_df) returns the shard payload; payloads are built one
+    season at a time.
+    """
+    seasons = df.groupby(season_start_years(df[date_column]), sort=True)
+    payloads = ((start_year, build(season_df.copy())) for start_year, season_df in seasons)
+    return write_shards(kind, payloads, shard_dir, summarize, compact=compact)
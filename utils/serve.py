@@ -0,0 +1,238 @@
+"""
+Local preview server for docs/ with caching headers and live rebuild
+
+Serves the website with a thread per request, strong ETags (content hash),
+Cache-Control and the precompressed .br/.gz siblings written by
+compact_output.py when the browser accepts them. The pipeline inputs are
+polled and a change reruns only the affected build stages. Every request
+is logged with its latency; a summary per path is printed on exit.
+
+    python utils/serve.py [--port 8000] [--config build_config.json] [--max-age 3600] [--no-watch]
+"""
+import argparse
+import mimetypes
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from build import ROOT, STAGES, affected_stages, load_config
+from build_manifest import file_hash
+
+DOCS_DIR = os.path.join(ROOT, 'docs')
+
+# Content-Encoding -> file suffix, in order of preference
+PRECOMPRESSED = [('br', '.br'), ('gzip', '.gz')]
+
+POLL_INTERVAL = 1.0
+
+_etags = {}
+_etags_lock = threading.Lock()
+
+def file_etag(path):
+    """Strong ETag from the file content, cached until size or mtime change"""
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    with _etags_lock:
+        etag = _etags.get(key)
+    if etag is None:
+        etag = f'"{file_hash(path)[:32]}"'
+        with _etags_lock:
+            _etags[key] = etag
+    return etag
+
+def accepted_encodings(header):
+    """Encodings from an Accept-Encoding header, without those refused with q=0"""
+    encodings = set()
+    for part in (header or '').split(','):
+        name, _, params = part.strip().partition(';')
+        if params.replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            encodings.add(name.strip().lower())
+    return encodings
+
+class LatencyStats:
+    """Thread-safe per-path request latencies"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = {}
+
+    def record(self, path, milliseconds, size):
+        with self.lock:
+            self.requests.setdefault(path, []).append((milliseconds, size))
+
+    def print_summary(self):
+        print("\n=== Request Latency ===")
+        print(f"{'Path':<50} {'Requests':>8} {'Median':>9} {'p95':>9} {'Bytes':>10}")
+        with self.lock:
+            items = sorted(self.requests.items())
+        for path, entries in items:
+            latencies = sorted(ms for ms, _ in entries)
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            print(f"{path[:50]:<50} {len(entries):>8} {statistics.median(latencies):>7.1f}ms "
+                  f"{p95:>7.1f}ms {entries[-1][1]:>10,}")
+
+class PreviewHandler(SimpleHTTPRequestHandler):
+    """Static file handler with ETags, Cache-Control and precompressed variants"""
+
+    max_age = 0
+    stats = LatencyStats()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, directory=DOCS_DIR, **kwargs)
+
+    def do_GET(self):
+        self._timed(super().do_GET)
+
+    def do_HEAD(self):
+        self._timed(super().do_HEAD)
+
+    def _timed(self, handle):
+        self._status, self._size, self._encoding = None, 0, None
+        start = time.perf_counter()
+        handle()
+        milliseconds = (time.perf_counter() - start) * 1000
+
+        path = self.path.split('?', 1)[0]
+        self.stats.record(path, milliseconds, self._size)
+        encoding = f" {self._encoding}" if self._encoding else ''
+        sys.stderr.write(f"{self.command} {path} {self._status} {self._size:,}B{encoding} {milliseconds:.1f}ms\n")
+
+    def send_response(self, code, message=None):
+        self._status = int(code)
+        super().send_response(code, message)
+
+    def log_request(self, code='-', size='-'):
+        pass  # logged with the latency in _timed
+
+    def cache_control(self):
+        return f"public, max-age={self.max_age}" if self.max_age else 'no-cache'
+
+    def select_variant(self, path):
+        """Precompressed sibling the client accepts and that is not older than the file"""
+        accepted = accepted_encodings(self.headers.get('Accept-Encoding'))
+        mtime = os.path.getmtime(path)
+        for encoding, suffix in PRECOMPRESSED:
+            variant = path + suffix
+            if encoding in accepted and os.path.isfile(variant) and os.path.getmtime(variant) >= mtime:
+                return variant, encoding
+        return path, None
+
+    def send_head(self):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path) and self.path.split('?', 1)[0].endswith('/'):
+            path = os.path.join(path, 'index.html')
+        if not os.path.isfile(path):
+            # Directory redirects and 404s as usual
+            return super().send_head()
+
+        served, encoding = self.select_variant(path)
+        etag = file_etag(served)
+        if etag in [tag.strip() for tag in self.headers.get('If-None-Match', '').split(',')]:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_common_headers(etag, encoding)
+            self.end_headers()
+            return None
+
+        f = open(served, 'rb')
+        try:
+            stat = os.fstat(f.fileno())
+            self.send_response(HTTPStatus.OK)
+            self.send_header('Content-Type', self.guess_type(path))
+            self.send_header('Content-Length', str(stat.st_size))
+            self.send_header('Last-Modified', formatdate(stat.st_mtime, usegmt=True))
+            if encoding:
+                self.send_header('Content-Encoding', encoding)
+            self.send_common_headers(etag, encoding)
+            self.end_headers()
+        except Exception:
+            f.close()
+            raise
+
+        self._size, self._encoding = stat.st_size, encoding
+        return f
+
+    def send_common_headers(self, etag, encoding):
+        self.send_header('ETag', etag)
+        self.send_header('Cache-Control', self.cache_control())
+        self.send_header('Vary', 'Accept-Encoding')
+
+def watched_files(config):
+    """{path: config key} of every pipeline input that exists"""
+    import extract_matches
+
+    files = {}
+    for inputs, _, _ in STAGES.values():
+        for key in inputs:
+            if key == 'html' and config['html']:
+                files.update({path: key for path in extract_matches.find_html_files(config['html'])})
+            elif config.get(key) and os.path.isfile(config[key]):
+                files[config[key]] = key
+    return files
+
+def snapshot(files):
+    """(size, mtime) per watched file"""
+    state = {}
+    for path in files:
+        try:
+            stat = os.stat(path)
+            state[path] = (stat.st_size, stat.st_mtime_ns)
+        except FileNotFoundError:
+            state[path] = None
+    return state
+
+def watch_inputs(config, config_path=None, interval=POLL_INTERVAL):
+    """Poll the pipeline inputs and rerun the affected stages when one changes"""
+    files = watched_files(config)
+    state = snapshot(files)
+    print(f"Watching {len(files)} input files")
+
+    while True:
+        time.sleep(interval)
+        current = snapshot(files)
+        changed = [path for path in files if current[path] != state[path]]
+        state = current
+        if not changed:
+            continue
+
+        stages = affected_stages({files[path] for path in changed})
+        print(f"\n↻ {', '.join(os.path.basename(path) for path in changed)} changed, "
+              f"rebuilding: {', '.join(stages)}")
+        command = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'build.py'),
+                   '--only', *stages]
+        if config_path:
+            command += ['--config', config_path]
+        subprocess.run(command)
+        # Inputs written by the rebuild itself (the games CSV) are not a new change
+        state = snapshot(files)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Preview server for docs/')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--bind', default='127.0.0.1')
+    parser.add_argument('--config', help='build config JSON (see build.py)')
+    parser.add_argument('--max-age', type=int, default=0,
+                        help='Cache-Control max-age in seconds (default: no-cache, revalidate via ETag)')
+    parser.add_argument('--no-watch', action='store_true', help='do not rebuild when inputs change')
+    args = parser.parse_args()
+
+    mimetypes.add_type('application/json', '.json')
+    PreviewHandler.max_age = args.max_age
+
+    if not args.no_watch:
+        threading.Thread(target=watch_inputs, args=(load_config(args.config), args.config), daemon=True).start()
+
+    server = ThreadingHTTPServer((args.bind, args.port), PreviewHandler)
+    print(f"Serving {DOCS_DIR} on http://{args.bind}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        PreviewHandler.stats.print_summary()
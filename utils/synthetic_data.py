@@ -0,0 +1,236 @@
+"""
+Generate synthetic input data for benchmarking the processing scripts
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+PARTICIPATION_STATUSES = [
+    'STATUS_CONFIRMED',
+    'STATUS_REJECTED',
+    'STATUS_ABSENCE',
+    'STATUS_NOT_NOMINATED',
+    'STATUS_NOT_CHOOSED',
+]
+PARTICIPATION_WEIGHTS = [0.27, 0.28, 0.08, 0.30, 0.07]
+
+TEAM_NAMES = ['Herren', 'Herren II', 'A-Jugend']
+
+def generate_playerlist(num_rows=10_000, num_players=None, seed=42):
+    """Generate a registration table shaped like training_game_playerlist.csv"""
+    rng = np.random.default_rng(seed)
+
+    if num_players is None:
+        num_players = max(10, int(num_rows ** 0.5))
+    num_events = max(1, num_rows // num_players)
+
+    # Events: one date per event, roughly 2/3 trainings and 1/3 games
+    event_ids = np.arange(100_000, 100_000 + num_events)
+    event_types = np.where(rng.random(num_events) < 0.67, 'training', 'game')
+    event_dates = pd.Timestamp('2015-01-01') + pd.to_timedelta(
+        np.sort(rng.integers(0, 3650, num_events)), unit='D'
+    )
+
+    # Registrations: random player/event pairs
+    user_ids = rng.integers(1000, 1000 + num_players, num_rows)
+    event_idx = rng.integers(0, num_events, num_rows)
+
+    return pd.DataFrame({
+        'event_id': event_ids[event_idx],
+        'event_type': event_types[event_idx],
+        'event_date_start': event_dates[event_idx].strftime('%d-%m-%Y'),
+        'team_name': np.array(TEAM_NAMES)[user_ids % len(TEAM_NAMES)],
+        'user_id': user_ids,
+        'user_name': pd.Series(user_ids).map(lambda uid: f"Player {uid}").to_numpy(),
+        'user_participation': rng.choice(PARTICIPATION_STATUSES, num_rows, p=PARTICIPATION_WEIGHTS),
+    })
+
+def write_playerlist_csv(output_path, num_rows=10_000, num_players=None, seed=42):
+    """Write a synthetic playerlist CSV (semicolon separated, like the club export)"""
+    df = generate_playerlist(num_rows, num_players=num_players, seed=seed)
+    df.to_csv(output_path, sep=';', index=False)
+    return df
+
+OPPONENTS = [
+    'FC Reit im Winkl', '(SG) Weißbach / Inzell', '(SG) Söllhuben / Frasdorf',
+    'TSV Grassau', 'SV Unterwössen', 'TuS Traunreut', 'SC Anger', 'ASV Piding',
+]
+
+COMPETITIONS = [
+    ('Herren, B Klasse, Kreis Inn / Salzach', '310114 - Meisterschaft, 332 B-Klasse 2'),
+    ('Herren, C Klasse, Kreis Inn / Salzach', '310115 - Meisterschaft, 333 C-Klasse 4'),
+    ('Herren, Kreisfreundschaftsspiele, Kreis Inn / Salzach', '510011 - Freundschaftsspiel, FS / H / K-FS / I / S / 1'),
+]
+
+WEEKDAYS = ['Mo.', 'Di.', 'Mi.', 'Do.', 'Fr.', 'Sa.', 'So.']
+
+def _match_row(date, home_team, away_team, result):
+    """One DFB-style listtable match row with twelve cells"""
+    return (
+        '<tr class="row-competition jlistTr">'
+        '<td></td><td></td><td></td>'
+        '<td><div class="d-flex flex-column">'
+        f'<span class="dfb-label">{WEEKDAYS[date.dayofweek]}</span>'
+        f'<span class="dfb-label">{date:%d.%m.%Y}</span>'
+        f'<span class="dfb-label">{date:%H:%M}</span>'
+        '</div></td>'
+        '<td></td>'
+        f'<td><span class="dfb-label">{home_team}</span></td>'
+        '<td>-</td>'
+        f'<td><span class="dfb-label">{away_team}</span></td>'
+        f'<td><span class="dfb-label">{result}</span></td>'
+        '<td></td><td></td><td></td>'
+        '</tr>\n'
+    )
+
+def generate_match_page(num_matches=50, seed=42, club='TSV Marquartstein'):
+    """Generate an HTML page with a DFB-style table.listtable of matches"""
+    rng = np.random.default_rng(seed)
+    parts = ['<!DOCTYPE html>\n<html><head><meta charset="utf-8"><title>Spiele</title></head><body>\n',
+             '<table class="table listtable"><thead><tr><th colspan="12">Spiele</th></tr></thead><tbody>\n']
+
+    date = pd.Timestamp('2015-03-01 15:00')
+    for i in range(num_matches):
+        # A competition header every ten matches
+        if i % 10 == 0:
+            line1, line2 = COMPETITIONS[(i // 10) % len(COMPETITIONS)]
+            parts.append(
+                '<tr><td colspan="12"><div>'
+                f'<span class="lh-lg">{line1}</span><br><span class="lh-lg">{line2}</span>'
+                '</div></td></tr>\n'
+            )
+
+        date += pd.Timedelta(days=int(rng.integers(3, 10)))
+        opponent = OPPONENTS[int(rng.integers(len(OPPONENTS)))]
+        team = club if rng.random() < 0.85 else f'{club} II'
+        home, away = (team, opponent) if rng.random() < 0.5 else (opponent, team)
+        # Some fixtures are not played yet
+        result = '' if rng.random() < 0.05 else f'{rng.poisson(1.8)} : {rng.poisson(1.5)}'
+        parts.append(_match_row(date, home, away, result))
+
+    parts.append('</tbody></table>\n</body></html>\n')
+    return ''.join(parts)
+
+def write_match_page(output_path, num_matches=50, seed=42):
+    """Write a synthetic DFB match page"""
+    html = generate_match_page(num_matches, seed=seed)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(html)
+    return output_path
+
+def generate_games_csv_rows(num_matches=50, seed=42):
+    """Games table in the CSV layout written by extract_matches.py"""
+    from extract_matches import parse_matches
+    return pd.DataFrame(parse_matches(generate_match_page(num_matches, seed=seed)))
+
+def write_games_csv(output_path, num_matches=50, seed=42):
+    """Write a synthetic games CSV"""
+    df = generate_games_csv_rows(num_matches, seed=seed)
+    df.to_csv(output_path, index=False)
+    return df
+
+def generate_historical_players(num_seasons=10, seed=42, last_season_start=2025):
+    """Player counts per season like the historical Excel sheet (newest season first)"""
+    rng = np.random.default_rng(seed)
+    start_years = np.arange(last_season_start, last_season_start - num_seasons, -1)
+
+    first_team = rng.integers(20, 35, num_seasons)
+    second_team = np.where(rng.random(num_seasons) < 0.6, rng.integers(15, 45, num_seasons), np.nan)
+    youth = rng.integers(0, 12, num_seasons)
+
+    # Free-text notes in an unnamed column, mostly empty
+    notes = np.where(rng.random(num_seasons) < 0.2, 'notiz', None)
+
+    return pd.DataFrame({
+        'Saison': [f"{y % 100:02d}/{(y + 1) % 100:02d}" for y in start_years],
+        '1.Mannschaft': first_team,
+        '2.Mannschaft': second_team,
+        'A-Jugend': youth,
+        'Spieler': first_team + np.nan_to_num(second_team).astype(int) // 2,
+        'Klasse': rng.choice(['A', 'B', 'C'], num_seasons),
+        None: notes,
+    })
+
+def write_historical_excel(output_path, num_seasons=10, num_sheets=1, seed=42):
+    """Write a synthetic historical Excel workbook (one sheet per team group)"""
+    with pd.ExcelWriter(output_path) as writer:
+        for sheet in range(num_sheets):
+            df = generate_historical_players(num_seasons, seed=seed + sheet)
+            df.to_excel(writer, sheet_name=f"Tabelle{sheet + 1}", index=False)
+    return output_path
+
+def generate_logo(size=400, seed=42):
+    """Club-style RGBA logo: colored rings and stripes on a transparent background"""
+    from PIL import Image, ImageDraw
+
+    rng = np.random.default_rng(seed)
+    img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(img)
+
+    draw.ellipse([0, 0, size - 1, size - 1], fill='#165b33')
+    draw.ellipse([size // 10, size // 10, size - size // 10, size - size // 10], fill='white')
+    stripe = max(1, size // 12)
+    for x in range(size // 5, size - size // 5, 2 * stripe):
+        draw.rectangle([x, size // 4, x + stripe, size - size // 4], fill='#53a612')
+
+    # Some antialiasing-like noise so the palette is not trivially small
+    pixels = np.asarray(img).copy()
+    opaque = pixels[..., 3] > 0
+    noise = rng.integers(-6, 7, pixels[..., :3].shape)
+    pixels[..., :3] = np.where(opaque[..., None], np.clip(pixels[..., :3] + noise, 0, 255), 0)
+    return Image.fromarray(pixels.astype(np.uint8), 'RGBA')
+
+def write_logo(output_path, size=400, seed=42):
+    """Write a synthetic logo PNG"""
+    generate_logo(size, seed=seed).save(output_path)
+    return output_path
+
+# Input sizes at scale 1x, roughly one season of one club
+BASE_SIZES = {
+    'matches': 300,
+    'playerlist_rows': 20_000,
+    'seasons': 30,
+    'logo_px': 400,
+    'qr_codes': 10,
+}
+
+def scaled_sizes(scale=1):
+    """BASE_SIZES multiplied by scale (the logo grows in area, not side length)"""
+    sizes = {key: int(value * scale) for key, value in BASE_SIZES.items()}
+    sizes['logo_px'] = int(BASE_SIZES['logo_px'] * scale ** 0.5)
+    return sizes
+
+def write_inputs(output_dir, scale=1, seed=42):
+    """
+    Write a full set of synthetic inputs (match page, games CSV, playerlist CSV,
+    historical Excel, logo) at the given scale and return their paths
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    sizes = scaled_sizes(scale)
+    paths = {
+        'html': os.path.join(output_dir, 'site.html'),
+        'games_csv': os.path.join(output_dir, 'games_first_second_team_friendlies.csv'),
+        'player_csv': os.path.join(output_dir, 'training_game_playerlist.csv'),
+        'excel': os.path.join(output_dir, 'First_Second_A_youth_playerscount_years.xlsx'),
+        'logo': os.path.join(output_dir, 'logo.png'),
+    }
+
+    write_match_page(paths['html'], sizes['matches'], seed=seed)
+    write_games_csv(paths['games_csv'], sizes['matches'], seed=seed)
+    write_playerlist_csv(paths['player_csv'], sizes['playerlist_rows'], seed=seed)
+    write_historical_excel(paths['excel'], sizes['seasons'], seed=seed)
+    write_logo(paths['logo'], sizes['logo_px'], seed=seed)
+    return paths
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Write synthetic inputs for all processing scripts')
+    parser.add_argument('output_dir')
+    parser.add_argument('--scale', type=float, default=1, help='multiple of BASE_SIZES')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    for name, path in write_inputs(args.output_dir, args.scale, args.seed).items():
+        print(f"{name}: {path}")